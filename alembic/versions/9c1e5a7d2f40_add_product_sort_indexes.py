@@ -0,0 +1,52 @@
+"""Add product sort indexes
+
+Revision ID: 9c1e5a7d2f40
+Revises: 4b30c36d3edf
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "9c1e5a7d2f40"
+down_revision = "4b30c36d3edf"
+branch_labels = None
+depends_on = None
+
+
+# (name, columns): one per sort_by of GET /products, id as tie-breaker
+INDEXES = [
+    ("ix_products_category_id_id", ["category_id", "id"]),
+    ("ix_products_category_id_price_id", ["category_id", "price", "id"]),
+    ("ix_products_category_id_created_at_id", ["category_id", "created_at", "id"]),
+    ("ix_products_price_id", ["price", "id"]),
+    ("ix_products_created_at_id", ["created_at", "id"]),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY: the products table stays writable while indexes build
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name,
+                "products",
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+    op.execute("ANALYZE products")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name="products",
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
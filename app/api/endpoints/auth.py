@@ -5,16 +5,17 @@ Endpoints for user registration, login, and token refresh
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.database import get_db
+from sqlalchemy import select, update
+from app.db.database import get_db, get_read_db, AsyncSessionLocal
 from app.models.user import User
 from app.schemas.user import UserCreate, UserPublic, Token, RefreshTokenRequest
 from app.core.security import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
     decode_token,
+    token_claims,
 )
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -37,6 +38,9 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     Raises:
         HTTPException: If email already exists
     """
+    # Hash first: no pooled connection is held while bcrypt runs
+    hashed_password = await get_password_hash_async(user_data.password)
+
     # Check if user already exists
     result = await db.execute(select(User).where(User.email == user_data.email))
     existing_user = result.scalar_one_or_none()
@@ -47,7 +51,6 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
         )
 
     # Create new user with hashed password
-    hashed_password = get_password_hash(user_data.password)
     new_user = User(email=user_data.email, hashed_password=hashed_password)
 
     db.add(new_user)
@@ -57,8 +60,22 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     return new_user
 
 
+async def rehash_password(user_id: int, new_hash: str) -> None:
+    """
+    Store an upgraded hash of the same password (login runs on a read-only session)
+
+    A Core UPDATE: the password does not change, so cached users
+    (app/core/dependencies.py) stay valid.
+    """
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(User).where(User.id == user_id).values(hashed_password=new_hash)
+        )
+        await session.commit()
+
+
 @router.post("/login", response_model=Token)
-async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+async def login(user_data: UserCreate, db: AsyncSession = Depends(get_read_db)):
     """
     Authenticate user and return JWT tokens
 
@@ -76,8 +93,18 @@ async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == user_data.email))
     user = result.scalar_one_or_none()
 
+    # Return the connection to the pool before bcrypt (user stays loaded)
+    await db.close()
+
     # Verify password
-    if not user or not verify_password(user_data.password, user.hashed_password):
+    if user:
+        valid, new_hash = await verify_and_update_password(
+            user_data.password, user.hashed_password
+        )
+    else:
+        valid, new_hash = False, None
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -90,8 +117,12 @@ async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
         )
 
+    # Hash made with another BCRYPT_ROUNDS: store it with the current cost
+    if new_hash is not None:
+        await rehash_password(user.id, new_hash)
+
     # Create tokens
-    token_data = {"sub": user.email, "user_id": user.id}
+    token_data = token_claims(user)
     access_token = create_access_token(data=token_data)
     refresh_token = create_refresh_token(data=token_data)
 
@@ -104,7 +135,7 @@ async def login(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
-    token_request: RefreshTokenRequest, db: AsyncSession = Depends(get_db)
+    token_request: RefreshTokenRequest, db: AsyncSession = Depends(get_read_db)
 ):
     """
     Refresh access token using refresh token
@@ -153,7 +184,7 @@ async def refresh_token(
         )
 
     # Create new tokens
-    token_data = {"sub": user.email, "user_id": user.id}
+    token_data = token_claims(user)
     new_access_token = create_access_token(data=token_data)
     new_refresh_token = create_refresh_token(data=token_data)
 
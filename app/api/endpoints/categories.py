@@ -6,7 +6,7 @@ Handles category operations
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.database import get_db
+from app.db.database import get_read_db
 from app.models.category import Category
 from app.schemas.category import CategoryPublic
 
@@ -14,7 +14,7 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("", response_model=list[CategoryPublic])
-async def get_categories(db: AsyncSession = Depends(get_db)):
+async def get_categories(db: AsyncSession = Depends(get_read_db)):
     """
     Get list of all categories
 
@@ -28,7 +28,7 @@ async def get_categories(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/{category_id}", response_model=CategoryPublic)
-async def get_category(category_id: int, db: AsyncSession = Depends(get_db)):
+async def get_category(category_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Get single category by ID
 
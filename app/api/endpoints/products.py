@@ -1,20 +1,137 @@
 """
 Products API Endpoints
 Handles product catalog operations
+
+Product endpoints select only the columns of ProductPublic (one JOIN for
+category_name) and serialize the rows straight to JSON bytes with a
+precompiled TypeAdapter. Returning a Response skips the second validation
+through response_model, which is kept for the OpenAPI schema.
+
+GET /products/cursor is the keyset-paginated variant of the list: the page
+starts after the (sort value, id) of the previous page's last product, an
+index range scan on the indexes of the Product model whatever the depth.
+
+/products/batch splits large id lists into chunks fetched concurrently on
+separate pooled connections, and keeps the JSON of recently fetched products
+in a per-process LRU for at most PRODUCT_CACHE_TTL seconds (see
+fetch_products_json).
 """
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc, asc
-from sqlalchemy.orm import joinedload
+from sqlalchemy import select, desc, asc, tuple_
+import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from typing import Optional
-from app.db.database import get_db
+from app.core.config import settings
+from app.db.database import get_read_db, AsyncReadSessionLocal
 from app.models.product import Product
 from app.models.category import Category
-from app.schemas.product import ProductPublic, ProductBatchRequest
+from app.schemas.product import (
+    ProductPublic,
+    ProductBatchRequest,
+    ProductCursorPage,
+    product_row_adapter,
+    product_rows_adapter,
+    product_page_adapter,
+)
+from app.utils.cache import LRUCache
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Columns of ProductPublic, in its field order
+PRODUCT_PUBLIC_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.price,
+    Product.is_new,
+    Product.main_image_url,
+    Product.category_id,
+    Category.name.label("category_name"),
+    Product.description,
+    Product.created_at,
+    Product.updated_at,
+)
+
+
+def product_rows_query():
+    """SELECT of ProductPublic columns (no ORM objects, no identity map)"""
+    return select(*PRODUCT_PUBLIC_COLUMNS).join(
+        Category, Product.category_id == Category.id
+    )
+
+
+def product_versions_query():
+    """SELECT id and the timestamps a cached product row depends on"""
+    return select(Product.id, Product.updated_at, Category.updated_at).join(
+        Category, Product.category_id == Category.id
+    )
+
+
+def json_response(content: bytes) -> Response:
+    return Response(content=content, media_type="application/json")
+
+
+# sort_by -> (sort column, descending); id breaks ties, default order is by id
+PRODUCT_SORTS = {
+    "price_asc": (Product.price, False),
+    "price_desc": (Product.price, True),
+    "newest": (Product.created_at, True),
+}
+
+
+def product_sort(sort_by: Optional[str]):
+    """(sort column, descending) of a sort_by value, unknown values sort by id"""
+    return PRODUCT_SORTS.get(sort_by, (Product.id, False))
+
+
+def product_order_by(sort_by: Optional[str]) -> list:
+    column, descending = product_sort(sort_by)
+    direction = desc if descending else asc
+    if column is Product.id:
+        return [direction(Product.id)]
+    return [direction(column), direction(Product.id)]
+
+
+def encode_cursor(sort_by: Optional[str], row) -> str:
+    """Opaque cursor: the sort value and id of the last row of a page"""
+    column, _ = product_sort(sort_by)
+    value = row[column.key]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, Decimal):
+        value = str(value)
+    data = json.dumps([sort_by, value, row["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort_by: Optional[str], cursor: str):
+    """(sort value, id) of a cursor, 400 if it is malformed or from another sort_by"""
+    column, _ = product_sort(sort_by)
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, value, last_id = json.loads(data)
+        if cursor_sort_by != sort_by or not isinstance(last_id, int):
+            raise ValueError(cursor_sort_by)
+        if column is Product.price:
+            value = Decimal(value)
+        elif column is Product.created_at:
+            value = datetime.fromisoformat(value)
+    except (binascii.Error, ValueError, TypeError, InvalidOperation):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, last_id
+
+
+# product id -> ((product updated_at, category updated_at), row JSON bytes)
+product_cache = LRUCache(
+    settings.PRODUCT_CACHE_SIZE if settings.PRODUCT_CACHE_TTL > 0 else 0,
+    ttl=settings.PRODUCT_CACHE_TTL,
+)
+
 
 @router.get("", response_model=list[ProductPublic])
 async def get_products(
@@ -24,7 +141,7 @@ async def get_products(
     ),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(12, ge=1, le=100, description="Items per page"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Get list of products with filtering, sorting, and pagination
@@ -38,23 +155,15 @@ async def get_products(
     Returns list of products with category information
     """
 
-    # Build base query with eager loading of category to avoid N+1 queries
-    query = select(Product).join(Category).options(joinedload(Product.category))
+    # Only the needed columns, category name from the same JOIN
+    query = product_rows_query()
 
     # Apply category filter
     if category_id is not None:
         query = query.where(Product.category_id == category_id)
 
-    # Apply sorting
-    if sort_by == "price_asc":
-        query = query.order_by(asc(Product.price))
-    elif sort_by == "price_desc":
-        query = query.order_by(desc(Product.price))
-    elif sort_by == "newest":
-        query = query.order_by(desc(Product.created_at))
-    else:
-        # Default sorting by id
-        query = query.order_by(asc(Product.id))
+    # Apply sorting (id breaks ties: pages do not overlap)
+    query = query.order_by(*product_order_by(sort_by))
 
     # Calculate offset for pagination
     offset = (page - 1) * limit
@@ -64,30 +173,65 @@ async def get_products(
 
     # Execute query
     result = await db.execute(query)
-    products = result.scalars().unique().all()
-
-    # Transform to response format with category name
-    products_response = []
-    for product in products:
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "price": product.price,
-            "is_new": product.is_new,
-            "main_image_url": product.main_image_url,
-            "category_id": product.category_id,
-            "category_name": product.category.name,
-            "description": product.description,
-            "created_at": product.created_at,
-            "updated_at": product.updated_at,
-        }
-        products_response.append(ProductPublic(**product_dict))
-
-    return products_response
+    rows = [dict(row) for row in result.mappings()]
+
+    return json_response(product_rows_adapter.dump_json(rows))
+
+
+@router.get("/cursor", response_model=ProductCursorPage)
+async def get_products_cursor(
+    category_id: Optional[int] = Query(None, description="Filter by category ID"),
+    sort_by: Optional[str] = Query(
+        None, description="Sort by: price_asc, price_desc, newest"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(12, ge=1, le=100, description="Items per page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Get list of products with keyset (cursor) pagination
+
+    Parameters:
+    - category_id: Filter products by category
+    - sort_by: Sort options (price_asc, price_desc, newest)
+    - cursor: Omit for the first page, then pass next_cursor
+    - limit: Number of items per page
+
+    Returns {"items": [...], "next_cursor": "..." or null}
+    Unlike page=N, the cost of a page does not grow with its depth
+    """
+    query = product_rows_query()
+
+    if category_id is not None:
+        query = query.where(Product.category_id == category_id)
+
+    if cursor is not None:
+        value, last_id = decode_cursor(sort_by, cursor)
+        column, descending = product_sort(sort_by)
+        if column is Product.id:
+            key, after = Product.id, last_id
+        else:
+            key, after = tuple_(column, Product.id), tuple_(value, last_id)
+        query = query.where(key < after if descending else key > after)
+
+    # One extra row tells whether there is a next page
+    query = query.order_by(*product_order_by(sort_by)).limit(limit + 1)
+
+    result = await db.execute(query)
+    rows = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(sort_by, rows[-1])
+
+    return json_response(
+        product_page_adapter.dump_json({"items": rows, "next_cursor": next_cursor})
+    )
 
 
 @router.get("/{product_id}", response_model=ProductPublic)
-async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
+async def get_product(product_id: int, db: AsyncSession = Depends(get_read_db)):
     """
     Get single product by ID
 
@@ -96,75 +240,100 @@ async def get_product(product_id: int, db: AsyncSession = Depends(get_db)):
 
     Returns product details with category information
     """
-    query = (
-        select(Product)
-        .where(Product.id == product_id)
-        .options(joinedload(Product.category))
-    )
+    query = product_rows_query().where(Product.id == product_id)
     result = await db.execute(query)
-    product = result.scalar_one_or_none()
+    row = result.mappings().one_or_none()
 
-    if not product:
+    if not row:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    product_dict = {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "is_new": product.is_new,
-        "main_image_url": product.main_image_url,
-        "category_id": product.category_id,
-        "category_name": product.category.name,
-        "description": product.description,
-        "created_at": product.created_at,
-        "updated_at": product.updated_at,
-    }
+    return json_response(product_row_adapter.dump_json(dict(row)))
+
+
+async def fetch_products_json(db: AsyncSession, ids: list[int]) -> dict[int, bytes]:
+    """
+    JSON of each existing product in ids
+
+    A light query reads the current versions. Products cached with the same
+    version are served from the LRU, only new or changed ones are selected
+    and serialized.
+
+    updated_at is set by SQLAlchemy (onupdate), not by the database: it only
+    changes when this app's ORM updates a row and is NULL before that. The
+    catalog is edited elsewhere, with plain SQL, so entries also expire
+    after PRODUCT_CACHE_TTL seconds; that bounds how long a change is missed.
+    """
+    result = await db.execute(product_versions_query().where(Product.id.in_(ids)))
+    versions = {product_id: tuple(version) for product_id, *version in result}
+
+    products = {}
+    stale_ids = []
+    for product_id, version in versions.items():
+        cached = product_cache.get(product_id)
+        if cached is not None and cached[0] == version:
+            products[product_id] = cached[1]
+        else:
+            stale_ids.append(product_id)
 
-    return ProductPublic(**product_dict)
+    if stale_ids:
+        result = await db.execute(product_rows_query().where(Product.id.in_(stale_ids)))
+        for row in result.mappings():
+            content = product_row_adapter.dump_json(dict(row))
+            products[row["id"]] = content
+            # Version read before the row: a concurrent update only causes a refetch
+            product_cache.set(row["id"], (versions[row["id"]], content))
+
+    return products
+
+
+async def fetch_products_chunk(ids: list[int], semaphore: asyncio.Semaphore) -> dict[int, bytes]:
+    """One chunk of a large batch, on its own pooled connection"""
+    async with semaphore:
+        async with AsyncReadSessionLocal() as session:
+            return await fetch_products_json(session, ids)
 
 
 @router.post("/batch", response_model=list[ProductPublic])
 async def get_products_batch(
-    request: ProductBatchRequest, db: AsyncSession = Depends(get_db)
+    request: ProductBatchRequest, db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get multiple products by IDs in a single request
 
     Parameters:
-    - request: JSON body with list of product IDs {"ids": [1, 5, 23]}
+    - request: JSON body with list of product IDs {"ids": [1, 5, 23]},
+      at most PRODUCT_BATCH_MAX_IDS
 
-    Returns list of products matching the provided IDs
-    Optimized with single database query using WHERE IN clause
+    Returns products in the order of the requested IDs (duplicates and
+    unknown IDs are skipped)
+    Lists longer than PRODUCT_BATCH_CHUNK_SIZE are fetched in chunks,
+    at most PRODUCT_BATCH_CONCURRENCY at a time
     """
 
+    if len(request.ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} ids per request",
+        )
     if not request.ids:
         return []
 
-    # Single optimized query with WHERE IN clause to fetch all products
-    query = (
-        select(Product)
-        .where(Product.id.in_(request.ids))
-        .options(joinedload(Product.category))
-    )
+    ids = list(dict.fromkeys(request.ids))
+    chunk_size = settings.PRODUCT_BATCH_CHUNK_SIZE
 
-    result = await db.execute(query)
-    products = result.scalars().unique().all()
-
-    # Transform to response format with category name
-    products_response = []
-    for product in products:
-        product_dict = {
-            "id": product.id,
-            "name": product.name,
-            "price": product.price,
-            "is_new": product.is_new,
-            "main_image_url": product.main_image_url,
-            "category_id": product.category_id,
-            "category_name": product.category.name,
-            "description": product.description,
-            "created_at": product.created_at,
-            "updated_at": product.updated_at,
-        }
-        products_response.append(ProductPublic(**product_dict))
-
-    return products_response
+    if len(ids) <= chunk_size:
+        products = await fetch_products_json(db, ids)
+    else:
+        semaphore = asyncio.Semaphore(settings.PRODUCT_BATCH_CONCURRENCY)
+        chunks = await asyncio.gather(*(
+            fetch_products_chunk(ids[i:i + chunk_size], semaphore)
+            for i in range(0, len(ids), chunk_size)
+        ))
+        products = {}
+        for chunk in chunks:
+            products.update(chunk)
+
+    # Row JSON is compact, so joining the cached bytes gives the list JSON
+    return json_response(
+        b"[" + b",".join(products[i] for i in ids if i in products) + b"]"
+    )
@@ -3,6 +3,7 @@ Application Configuration
 Centralized configuration using Pydantic Settings
 """
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -13,13 +14,40 @@ class Settings(BaseSettings):
     """
 
     # Database
-    DATABASE_URL: str
+    # FASTAPI_* variables win: in the gateway process (config/gateway.py)
+    # DATABASE_URL and SECRET_KEY belong to the Django project, and the
+    # gateway requires the FASTAPI_* ones (no fallback there)
+    DATABASE_URL: str = Field(
+        validation_alias=AliasChoices("FASTAPI_DATABASE_URL", "DATABASE_URL")
+    )
+    DB_POOL_SIZE: int = 5  # persistent connections per process
+    DB_MAX_OVERFLOW: int = 10  # extra connections under load, closed when returned
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # seconds, reconnect older connections
+    DB_POOL_PRE_PING: bool = True  # check connections before use (dropped by server/proxy)
+    DB_ECHO: bool = False  # log SQL (independent of DEBUG)
+
+    # Products batch (POST /products/batch)
+    PRODUCT_BATCH_MAX_IDS: int = 500  # larger requests are rejected (422)
+    PRODUCT_BATCH_CHUNK_SIZE: int = 100  # ids per IN (...) query
+    PRODUCT_BATCH_CONCURRENCY: int = 4  # chunk queries in parallel, keep <= DB_POOL_SIZE
+    PRODUCT_CACHE_SIZE: int = 2048  # products kept per process (0 disables)
+    PRODUCT_CACHE_TTL: int = 60  # seconds a cached product is served at most (0 disables)
 
     # Security
-    SECRET_KEY: str
+    SECRET_KEY: str = Field(
+        validation_alias=AliasChoices("FASTAPI_SECRET_KEY", "SECRET_KEY")
+    )
     ALGORITHM: str = "HS256"
+    BCRYPT_ROUNDS: int = 12  # cost factor; existing hashes are upgraded on login
+    PASSWORD_HASH_WORKERS: int = 2  # threads hashing/verifying passwords per process
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Seconds a looked-up user is reused (0 disables). Deactivation and password
+    # changes made outside this process apply only after it (app/core/dependencies.py)
+    AUTH_USER_CACHE_TTL: int = 60
+    AUTH_USER_CACHE_SIZE: int = 1024  # cached (user_id, iat) entries per process
+    AUTH_TOKEN_CLAIMS: bool = False  # embed is_active in access tokens (see get_token_data)
 
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
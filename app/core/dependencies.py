@@ -1,36 +1,63 @@
 """
 FastAPI Dependencies
 Reusable dependencies for route handlers
+
+get_current_user keeps the users it loads in a per-process cache keyed by
+(user_id, token iat) for AUTH_USER_CACHE_TTL seconds, so repeated requests
+with the same token skip the user SELECT.
+
+Deactivation and password changes are not propagated: no endpoint of this
+app changes is_active or the password, and those made elsewhere (another
+worker, the Django admin, SQL) are only seen when the entry expires. A
+deactivated user keeps access for up to AUTH_USER_CACHE_TTL seconds; set it
+to 0 where that is not acceptable. The ORM listeners below only cover
+writes made through this process's sessions.
 """
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.db.database import get_db
+from sqlalchemy import event, inspect, select
+from app.core.config import settings
+from app.db.database import get_read_db
 from app.models.user import User
 from app.core.security import decode_token
 from app.schemas.user import TokenData
+from app.utils.cache import LRUCache
 
 security = HTTPBearer()
 
+# (user_id, iat) -> User, detached from its session and shared read-only
+user_cache = LRUCache(
+    settings.AUTH_USER_CACHE_SIZE if settings.AUTH_USER_CACHE_TTL > 0 else 0,
+    ttl=settings.AUTH_USER_CACHE_TTL,
+)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """
-    Dependency to get the current authenticated user from JWT token
 
-    Args:
-        credentials: HTTP Bearer token from request header
-        db: Database session
+def invalidate_user(user_id: int) -> None:
+    """Drop the cached entries of a user (all tokens)"""
+    user_cache.discard_where(lambda key: key[0] == user_id)
 
-    Returns:
-        User: Current authenticated user
 
-    Raises:
-        HTTPException: If token is invalid or user not found
+@event.listens_for(User, "after_update")
+def invalidate_changed_user(mapper, connection, target):
+    """Deactivation or a password change made in this process applies to the next request"""
+    state = inspect(target)
+    if (
+        state.attrs.is_active.history.has_changes()
+        or state.attrs.hashed_password.history.has_changes()
+    ):
+        invalidate_user(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.id)
+
+
+def decode_access_token(token: str) -> dict:
+    """
+    Decode an access token, raise 401 if it is invalid or of another type
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -38,8 +65,6 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    # Decode the token
-    token = credentials.credentials
     payload = decode_token(token)
 
     if payload is None:
@@ -53,19 +78,63 @@ async def get_current_user(
             detail="Invalid token type",
         )
 
-    # Extract user email from token
-    email: str = payload.get("sub")
-    user_id: int = payload.get("user_id")
-
-    if email is None or user_id is None:
+    if payload.get("sub") is None or payload.get("user_id") is None:
         raise credentials_exception
 
+    return payload
+
+
+async def load_token_user(payload: dict, db: AsyncSession) -> User:
+    """
+    User of a decoded access token, from user_cache or the database
+    """
+    user_id: int = payload["user_id"]
+
+    # Tokens issued before iat was added are not cached
+    cache_key = (user_id, payload["iat"]) if "iat" in payload else None
+    user = user_cache.get(cache_key) if cache_key is not None else None
+    if user is not None:
+        return user
+
     # Get user from database
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    if cache_key is not None and user.is_active:
+        user_cache.set(cache_key, user)
+
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db),
+) -> User:
+    """
+    Dependency to get the current authenticated user from JWT token
+
+    Args:
+        credentials: HTTP Bearer token from request header
+        db: Database session
+
+    Returns:
+        User: Current authenticated user
+
+    Raises:
+        HTTPException: If token is invalid or user not found
+    """
+    # Decode the token
+    token = credentials.credentials
+    payload = decode_access_token(token)
+
+    user = await load_token_user(payload, db)
 
     if not user.is_active:
         raise HTTPException(
@@ -73,3 +142,37 @@ async def get_current_user(
         )
 
     return user
+
+
+async def get_token_data(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_read_db),
+) -> TokenData:
+    """
+    Dependency for endpoints that only need the user's identity
+
+    With AUTH_TOKEN_CLAIMS the access token carries is_active and no
+    database lookup is made. Tokens without the claim (issued while it was
+    off) are checked through the user cache and the database as in
+    get_current_user.
+
+    Returns:
+        TokenData: email, user_id and is_active of the current user
+
+    Raises:
+        HTTPException: If token is invalid or the user is inactive
+    """
+    payload = decode_access_token(credentials.credentials)
+
+    is_active = payload.get("is_active")
+    if is_active is None:
+        is_active = (await load_token_user(payload, db)).is_active
+
+    token_data = TokenData(
+        email=payload["sub"], user_id=payload["user_id"], is_active=is_active
+    )
+    if not token_data.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
+        )
+    return token_data
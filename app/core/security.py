@@ -1,8 +1,15 @@
 """
 Security Utilities
 Password hashing and JWT token management
+
+bcrypt takes hundreds of milliseconds per call. Async handlers use the
+*_async functions, which run it in password_executor (PASSWORD_HASH_WORKERS
+threads; bcrypt releases the GIL) so the event loop keeps serving other
+requests.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -10,7 +17,15 @@ from passlib.context import CryptContext
 from app.core.config import settings
 
 # Password hashing context using bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with another cost than BCRYPT_ROUNDS are reported by needs_update
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+# Bounded pool: a login burst queues here instead of taking every CPU
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -40,6 +55,47 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """
+    get_password_hash in password_executor
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Verify a password in password_executor
+
+    Args:
+        plain_password: Plain text password
+        hashed_password: Stored bcrypt hash
+
+    Returns:
+        tuple: (True if password matches, new hash to store if the stored
+        one uses another cost than BCRYPT_ROUNDS, else None)
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def token_claims(user) -> dict:
+    """
+    Claims identifying a user in access and refresh tokens
+
+    With AUTH_TOKEN_CLAIMS, is_active is embedded too, so endpoints using
+    get_token_data need no database lookup.
+    """
+    claims = {"sub": user.email, "user_id": user.id}
+    if settings.AUTH_TOKEN_CLAIMS:
+        claims["is_active"] = user.is_active
+    return claims
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -52,15 +108,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: Encoded JWT token
     """
     to_encode = data.copy()
+    now = datetime.utcnow()
 
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(
-            minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        )
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire, "type": "access"})
+    # iat: part of the user cache key (app/core/dependencies.py)
+    to_encode.update({"exp": expire, "iat": now, "type": "access"})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -78,8 +134,9 @@ def create_refresh_token(data: dict) -> str:
         str: Encoded JWT refresh token
     """
     to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "type": "refresh"})
+    now = datetime.utcnow()
+    expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode.update({"exp": expire, "iat": now, "type": "refresh"})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
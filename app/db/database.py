@@ -1,14 +1,32 @@
 """
 Database Configuration
 Async SQLAlchemy setup with PostgreSQL
+
+Two session dependencies:
+- get_read_db: read-only endpoints. The transaction is started as
+  READ ONLY and is never committed (rolled back when the connection
+  returns to the pool), so a read costs no COMMIT round-trip.
+- get_db: endpoints that write. Commits on success, rolls back on error.
 """
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import settings
 
-# Create async engine
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG, future=True)
+# Create async engine (pool settings from app/core/config.py)
+engine = create_async_engine(
+    settings.DATABASE_URL,
+    echo=settings.DB_ECHO,
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+# Same pool, transactions started as BEGIN READ ONLY
+read_engine = engine.execution_options(postgresql_readonly=True)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -19,6 +37,14 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
+AsyncReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -26,7 +52,7 @@ Base = declarative_base()
 # Dependency for getting DB session
 async def get_db():
     """
-    Dependency function that yields database sessions
+    Dependency function that yields database sessions for writes
     """
     async with AsyncSessionLocal() as session:
         try:
@@ -37,3 +63,30 @@ async def get_db():
             raise
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """
+    Dependency function that yields read-only database sessions
+
+    No commit on exit: closing the session returns the connection and the
+    pool rolls the read-only transaction back.
+    """
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
+def pool_stats():
+    """Connection pool utilization for /health"""
+    pool = engine.pool
+    size = pool.size()
+    checked_out = pool.checkedout()
+    capacity = size + settings.DB_MAX_OVERFLOW
+    return {
+        "pool_size": size,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "utilization": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
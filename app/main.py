@@ -6,6 +6,7 @@ Entry point for the LAMIS Backend API
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.db.database import pool_stats
 from app.api.endpoints import auth, users, products, categories
 
 # Create FastAPI application
@@ -50,5 +51,7 @@ async def root():
 async def health_check():
     """
     Health check endpoint for monitoring
+
+    Includes connection pool utilization (checked_out / (pool_size + max_overflow))
     """
-    return {"status": "healthy"}
+    return {"status": "healthy", "database": pool_stats()}
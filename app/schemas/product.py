@@ -3,10 +3,11 @@ Product Schemas
 Pydantic models for Product API validation and serialization
 """
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from decimal import Decimal
 from datetime import datetime
 from typing import Optional
+from typing_extensions import TypedDict
 
 
 class ProductBase(BaseModel):
@@ -57,6 +58,47 @@ class ProductPublic(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductPublicRow(TypedDict):
+    """
+    ProductPublic as a plain row mapping (same fields, same JSON)
+    Rows selected from the database are trusted: serialized without validation
+    """
+
+    id: int
+    name: str
+    price: Decimal
+    is_new: bool
+    main_image_url: str
+    category_id: int
+    category_name: str
+    description: Optional[str]
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+class ProductCursorPage(BaseModel):
+    """
+    Page of the cursor-paginated product list
+    next_cursor is passed back as ?cursor= for the next page (None on the last one)
+    """
+
+    items: list[ProductPublic]
+    next_cursor: Optional[str] = None
+
+
+class ProductCursorPageRows(TypedDict):
+    """ProductCursorPage with row mappings (see ProductPublicRow)"""
+
+    items: list[ProductPublicRow]
+    next_cursor: Optional[str]
+
+
+# Precompiled serializers: row mappings -> JSON bytes in one pydantic-core call
+product_row_adapter = TypeAdapter(ProductPublicRow)
+product_rows_adapter = TypeAdapter(list[ProductPublicRow])
+product_page_adapter = TypeAdapter(ProductCursorPageRows)
+
+
 class ProductDetail(ProductPublic):
     """
     Detailed product schema with full category information
@@ -69,7 +111,8 @@ class ProductDetail(ProductPublic):
 class ProductBatchRequest(BaseModel):
     """
     Schema for batch product request
-    Used for fetching multiple products by IDs
+    Used for fetching multiple products by IDs (at most PRODUCT_BATCH_MAX_IDS,
+    checked by the endpoint: the schemas do not read settings at import)
     """
 
     ids: list[int]
@@ -44,6 +44,7 @@ class TokenData(BaseModel):
 
     email: Optional[str] = None
     user_id: Optional[int] = None
+    is_active: Optional[bool] = None
 
 
 class RefreshTokenRequest(BaseModel):
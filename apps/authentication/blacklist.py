@@ -0,0 +1,112 @@
+"""
+Refresh token blacklist: cached checks and compaction
+
+ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION add an OutstandingToken and a
+BlacklistedToken row on every refresh. Once a token has expired its rows are
+useless (the exp check rejects it first), compact_blacklist() deletes them in
+batches; run_jobs calls it every TOKEN_BLACKLIST_COMPACT_INTERVAL seconds and
+`manage.py compact_token_blacklist` runs it on demand.
+
+RefreshToken remembers the JTIs it has seen blacklisted (a blacklist entry is
+never removed before the token expires), so replays of a rotated token are
+rejected without a query. Only positive answers are cached: another process
+may blacklist a token at any time.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class BlacklistedJTICache:
+    """JTIs known to be blacklisted, each kept until its token expires (LRU bound)"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._expires = OrderedDict()  # jti -> exp (epoch seconds)
+        self._lock = threading.Lock()  # sync views run in several threads
+
+    def __contains__(self, jti):
+        with self._lock:
+            exp = self._expires.get(jti)
+            if exp is None:
+                return False
+            if exp <= time.time():
+                del self._expires[jti]
+                return False
+            self._expires.move_to_end(jti)
+            return True
+
+    def add(self, jti, exp):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._expires[jti] = exp
+            self._expires.move_to_end(jti)
+            while len(self._expires) > self.maxsize:
+                self._expires.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+
+    def __len__(self):
+        return len(self._expires)
+
+
+blacklisted_jtis = BlacklistedJTICache(settings.TOKEN_BLACKLIST_CACHE_SIZE)
+
+
+class RefreshToken(BaseRefreshToken):
+    """simplejwt RefreshToken with the blacklist check answered from blacklisted_jtis when possible"""
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if jti in blacklisted_jtis:
+            raise TokenError(_('Token is blacklisted'))
+        try:
+            super().check_blacklist()
+        except TokenError:
+            blacklisted_jtis.add(jti, self.payload['exp'])
+            raise
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklisted_jtis.add(self.payload[api_settings.JTI_CLAIM], self.payload['exp'])
+        return result
+
+
+def compact_blacklist(batch_size=None):
+    """
+    Delete expired outstanding tokens and their blacklist rows
+
+    Batches of batch_size (TOKEN_BLACKLIST_COMPACT_BATCH) rows, one short
+    transaction each, oldest first (index on expires_at, migration 0002).
+    Returns the number of deleted outstanding tokens.
+    """
+    batch_size = batch_size or settings.TOKEN_BLACKLIST_COMPACT_BATCH
+    cutoff = aware_utcnow()
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lte=cutoff)
+                .order_by('expires_at')
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            # only('id'): the token text is not loaded, BlacklistedToken rows go by FK in one DELETE
+            OutstandingToken.objects.filter(id__in=ids).only('id').delete()
+        deleted += len(ids)
+    return deleted
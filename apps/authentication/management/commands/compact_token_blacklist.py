@@ -0,0 +1,32 @@
+"""
+Management command: delete expired refresh tokens from the blacklist tables
+
+The job worker (run_jobs) runs the same compaction every
+TOKEN_BLACKLIST_COMPACT_INTERVAL seconds; use this command for a one-off
+cleanup or from cron when no worker runs. Unlike simplejwt's
+flushexpiredtokens it deletes in short batches and never loads the tokens.
+
+Usage:
+    python manage.py compact_token_blacklist
+    python manage.py compact_token_blacklist --batch-size 5000
+"""
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.authentication.blacklist import compact_blacklist
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per transaction (default: TOKEN_BLACKLIST_COMPACT_BATCH)')
+
+    def handle(self, *args, **options):
+        deleted = compact_blacklist(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Удалено истекших токенов: {deleted}'))
+        self.stdout.write(
+            f'   Осталось: outstanding {OutstandingToken.objects.count()}, '
+            f'blacklisted {BlacklistedToken.objects.count()}'
+        )
@@ -0,0 +1,22 @@
+# Generated by Django 4.2 on 2026-10-19 09:00
+
+# token_blacklist_outstandingtoken belongs to simplejwt's token_blacklist app;
+# compact_blacklist() (apps/authentication/blacklist.py) selects by expires_at
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS token_blacklist_outstandingtoken_expires_at '
+                'ON token_blacklist_outstandingtoken (expires_at)',
+            reverse_sql='DROP INDEX IF EXISTS token_blacklist_outstandingtoken_expires_at',
+        ),
+    ]
@@ -3,7 +3,9 @@ DRF Serializers for Authentication App
 """
 
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.contrib.auth import authenticate
+from apps.authentication.blacklist import RefreshToken
 from apps.authentication.models import User
 
 
@@ -67,3 +69,8 @@ class UserLoginSerializer(serializers.Serializer):
             raise serializers.ValidationError("Must include 'username' and 'password'")
 
         return data
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    """Token refresh with the cached blacklist check (apps/authentication/blacklist.py)"""
+    token_class = RefreshToken
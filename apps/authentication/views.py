@@ -7,15 +7,16 @@ from rest_framework import status, generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 
+from apps.authentication.blacklist import RefreshToken
 from apps.authentication.models import User
 from apps.authentication.serializers import (
     UserSerializer,
     UserRegisterSerializer,
-    UserLoginSerializer
+    UserLoginSerializer,
+    CachedTokenRefreshSerializer
 )
 
 
@@ -119,6 +120,8 @@ class CustomTokenRefreshView(TokenRefreshView):
     Refresh access token
     POST /api/v1/auth/refresh/
     """
+    serializer_class = CachedTokenRefreshSerializer
+
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
 
@@ -0,0 +1,85 @@
+from django.contrib import admin, messages
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue
+
+
+class JobActionMixin:
+    """
+    Для admin actions, которые выполняются в фоне (run_jobs).
+
+    Action ставит задачу в очередь и сразу возвращает ответ со ссылкой
+    на задачу, вместо того чтобы держать воркер gunicorn до таймаута.
+    """
+
+    def enqueue_job(self, request, task, description, **kwargs):
+        job = enqueue(task, user=request.user, **kwargs)
+        self.message_user(
+            request,
+            format_html(
+                '{} - задача <a href="{}">#{}</a> поставлена в очередь',
+                description, reverse('admin:jobs_job_change', args=[job.pk]), job.pk
+            ),
+            messages.INFO
+        )
+        return job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'status_display', 'progress_display', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'task', 'created_at']
+    search_fields = ['task', 'message']
+    list_select_related = ['created_by']
+    ordering = ['-created_at']
+    list_per_page = 50
+    readonly_fields = [
+        'task', 'kwargs', 'status', 'progress_display', 'message', 'result', 'error',
+        'attempts', 'max_attempts', 'run_at', 'worker', 'heartbeat_at',
+        'created_by', 'created_at', 'started_at', 'finished_at',
+    ]
+    exclude = ['state', 'progress_done', 'progress_total']
+    actions = ['retry_jobs']
+
+    STATUS_COLORS = {
+        Job.Status.QUEUED: '#6c757d',
+        Job.Status.RUNNING: '#007bff',
+        Job.Status.SUCCEEDED: '#28a745',
+        Job.Status.FAILED: '#dc3545',
+    }
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def status_display(self, obj):
+        return format_html(
+            '<span style="color: {}; font-weight: bold;">{}</span>',
+            self.STATUS_COLORS.get(obj.status, '#999'), obj.get_status_display()
+        )
+    status_display.short_description = 'Статус'
+    status_display.admin_order_field = 'status'
+
+    def progress_display(self, obj):
+        """Прогресс-бар: выполнено / всего"""
+        label = f'{obj.progress_done}/{obj.progress_total}' if obj.progress_total else f'{obj.percent}%'
+        return format_html(
+            '<div style="width: 120px; background: #eee; border-radius: 3px;">'
+            '<div style="width: {}%; background: {}; height: 8px; border-radius: 3px;"></div></div>'
+            '<small>{} {}</small>',
+            obj.percent, self.STATUS_COLORS.get(obj.status, '#999'), label, obj.message
+        )
+    progress_display.short_description = 'Прогресс'
+
+    def retry_jobs(self, request, queryset):
+        """Bulk action: перезапустить упавшие задачи"""
+        updated = queryset.filter(status=Job.Status.FAILED).update(
+            status=Job.Status.QUEUED, attempts=0, error='', run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f'Перезапущено задач: {updated}')
+    retry_jobs.short_description = "Перезапустить упавшие задачи"
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+    verbose_name = 'Фоновые задачи'
+
+    def ready(self):
+        # Регистрирует задачи из <app>/tasks.py всех приложений
+        autodiscover_modules('tasks')
@@ -0,0 +1,34 @@
+"""
+Management command: run another management command in the job worker
+
+Long commands (image preparation, imports) no longer need an open shell:
+the command is queued, run by run_jobs, and its output is stored in the
+job result (admin: Фоновые задачи → Задачи).
+
+Usage:
+    python manage.py enqueue_command prepare_images_for_r2 --workers 8
+    python manage.py enqueue_command build_responsive_images --limit 500
+"""
+
+import argparse
+
+from django.core.management import get_commands
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.jobs.queue import enqueue
+
+
+class Command(BaseCommand):
+    help = 'Queue a management command for the background job worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Management command to run')
+        parser.add_argument('command_args', nargs=argparse.REMAINDER, help='Arguments of the command')
+
+    def handle(self, *args, **options):
+        name = options['name']
+        if name not in get_commands():
+            raise CommandError(f'Unknown command: {name}')
+
+        job = enqueue('call_command', name=name, args=options['command_args'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Queued {job}: manage.py {name} {" ".join(options["command_args"])}'))
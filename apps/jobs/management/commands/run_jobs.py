@@ -0,0 +1,140 @@
+"""
+Management command: background job worker
+
+Polls the jobs table and runs queued tasks one at a time. Start as many
+workers as needed (each claims jobs with SKIP LOCKED). SIGTERM/SIGINT
+finish the current job before exiting, so deploys do not cut tasks in half.
+Between jobs the worker also requeues stale jobs and deletes expired refresh
+tokens (TOKEN_BLACKLIST_COMPACT_INTERVAL, apps/authentication/blacklist.py).
+
+Usage:
+    python manage.py run_jobs
+    python manage.py run_jobs --once        # drain the queue and exit (cron)
+"""
+
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from apps.authentication.blacklist import compact_blacklist
+from apps.jobs.models import Job
+from apps.jobs.queue import claim_next, purge_finished, requeue_stale, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=settings.JOBS_POLL_INTERVAL,
+            help=f'Seconds between polls of an empty queue (default: {settings.JOBS_POLL_INTERVAL})'
+        )
+        parser.add_argument(
+            '--max-jobs',
+            type=int,
+            default=None,
+            help='Exit after N jobs (lets a supervisor restart the process)'
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        worker = worker_name()
+        self.stdout.write(self.style.SUCCESS(f'🚀 Job worker {worker} started'))
+
+        purged = purge_finished()
+        if purged:
+            self.stdout.write(f'🗑️  Purged {purged} finished jobs')
+
+        processed = 0
+        last_stale_check = 0
+        last_compaction = None
+        while not self.stopping:
+            close_old_connections()
+
+            if time.monotonic() - last_stale_check > 60:
+                requeued, failed = requeue_stale()
+                if requeued or failed:
+                    self.stdout.write(self.style.WARNING(f'⚠️  Stale jobs: requeued {requeued}, failed {failed}'))
+                last_stale_check = time.monotonic()
+
+            interval = settings.TOKEN_BLACKLIST_COMPACT_INTERVAL
+            if interval and (last_compaction is None or time.monotonic() - last_compaction > interval):
+                compacted = compact_blacklist()
+                if compacted:
+                    self.stdout.write(f'🗑️  Compacted token blacklist: {compacted} expired tokens')
+                last_compaction = time.monotonic()
+
+            job = claim_next(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f'▶️  {job} (attempt {job.attempts}/{job.max_attempts})')
+            started = time.monotonic()
+            with self.heartbeat(job):
+                succeeded = run_job(job)
+            elapsed = time.monotonic() - started
+
+            if succeeded:
+                self.stdout.write(self.style.SUCCESS(f'✓ {job} done in {elapsed:.1f}s'))
+            elif job.status == Job.Status.QUEUED:
+                self.stdout.write(self.style.WARNING(f'↻ {job} failed, retry at {job.run_at:%H:%M:%S}'))
+            else:
+                self.stdout.write(self.style.ERROR(f'✗ {job} failed'))
+
+            processed += 1
+            if options['max_jobs'] and processed >= options['max_jobs']:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Job worker stopped, processed: {processed}'))
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        self.stdout.write(self.style.WARNING('Stopping after the current job (repeat to abort)...'))
+        self.stopping = True
+
+    def heartbeat(self, job):
+        """Keep heartbeat_at fresh while a job runs, so it is not taken for a dead worker's job"""
+        return _Heartbeat(job.pk, interval=max(1, settings.JOBS_STALE_TIMEOUT // 4))
+
+
+class _Heartbeat:
+    def __init__(self, job_id, interval):
+        self.job_id = job_id
+        self.interval = interval
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.done.set()
+        self.thread.join()
+
+    def run(self):
+        try:
+            while not self.done.wait(self.interval):
+                Job.objects.filter(pk=self.job_id, status=Job.Status.RUNNING).update(heartbeat_at=timezone.now())
+        finally:
+            # Thread-local connection of this thread
+            connection.close()
@@ -0,0 +1,98 @@
+"""
+Models for jobs app
+"""
+
+import time
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """
+    Фоновая задача в очереди на базе БД (без внешнего брокера).
+
+    Ставится в очередь через apps.jobs.queue.enqueue(), выполняется
+    командой run_jobs. Упавшая задача повторяется до max_attempts раз
+    с экспоненциальной задержкой; `state` - чекпоинт задачи, чтобы
+    повтор продолжил с места падения.
+    """
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        SUCCEEDED = 'succeeded', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    task = models.CharField(max_length=100, db_index=True, verbose_name="Задача")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Параметры")
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name="Статус"
+    )
+    progress_done = models.PositiveIntegerField(default=0, verbose_name="Выполнено")
+    progress_total = models.PositiveIntegerField(default=0, verbose_name="Всего")
+    message = models.CharField(max_length=255, blank=True, verbose_name="Сообщение")
+    state = models.JSONField(default=dict, blank=True, verbose_name="Чекпоинт")
+    result = models.JSONField(null=True, blank=True, verbose_name="Результат")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="Максимум попыток")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Запустить после")
+    worker = models.CharField(max_length=100, blank=True, verbose_name="Воркер")
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name="Автор"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начата")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершена")
+
+    class Meta:
+        db_table = 'jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            # Выборка следующей задачи воркером
+            models.Index(fields=['status', 'run_at'], name='jobs_status_run_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.task}"
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return 100 if self.status == self.Status.SUCCEEDED else 0
+        return min(100, int(self.progress_done * 100 / self.progress_total))
+
+    def set_progress(self, done, total=None, message=None, state=None):
+        """
+        Обновить прогресс из кода задачи.
+
+        Пишется в БД не чаще раза в секунду (и всегда при переданном `state`
+        или на последнем шаге), заодно обновляет heartbeat_at.
+        """
+        self.progress_done = done
+        if total is not None:
+            self.progress_total = total
+        if message is not None:
+            self.message = message[:255]
+        fields = {'progress_done': self.progress_done, 'progress_total': self.progress_total, 'message': self.message}
+        if state is not None:
+            self.state = state
+            fields['state'] = state
+
+        now = time.monotonic()
+        if state is None and done < self.progress_total and now - getattr(self, '_progress_saved_at', 0) < 1:
+            return
+        self._progress_saved_at = now
+        Job.objects.filter(pk=self.pk).update(heartbeat_at=timezone.now(), **fields)
@@ -0,0 +1,144 @@
+"""
+DB-backed job queue
+
+    from apps.jobs.queue import enqueue, task
+
+    @task('products.duplicate_types')
+    def duplicate_types(job, ids):
+        ...
+        job.set_progress(done, total)
+        return {'created': done}      # -> Job.result (JSON)
+
+    enqueue('products.duplicate_types', user=request.user, ids=[1, 2, 3])
+
+Tasks live in <app>/tasks.py (autodiscovered by JobsConfig.ready), receive
+the Job as the first argument and JSON-serializable keyword arguments.
+Workers (python manage.py run_jobs) claim jobs with SELECT ... FOR UPDATE
+SKIP LOCKED, so any number of them can poll the same table.
+"""
+
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register a function as a job task under `name`"""
+    def decorator(func):
+        if name in TASKS and TASKS[name] is not func:
+            raise ValueError(f'Task already registered: {name}')
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(task_name, /, user=None, max_attempts=None, run_at=None, **kwargs):
+    """Put a task into the queue; returns the Job"""
+    if task_name not in TASKS:
+        raise LookupError(f'Unknown task: {task_name}')
+    return Job.objects.create(
+        task=task_name,
+        kwargs=kwargs,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=run_at or timezone.now(),
+        created_by=user if user is not None and user.is_authenticated else None,
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_next(worker):
+    """Mark the next due job as running and return it (None if the queue is empty)"""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=Job.Status.QUEUED, run_at__lte=now)
+            .order_by('run_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.worker = worker
+        job.started_at = now
+        job.heartbeat_at = now
+        job.save(update_fields=['status', 'attempts', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+
+def run_job(job):
+    """Execute a claimed job and record success, retry or failure"""
+    func = TASKS.get(job.task)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task: {job.task}')
+        result = func(job, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if func is not None and job.attempts < job.max_attempts:
+            # 30s, 60s, 120s, ... (JOBS_RETRY_DELAY)
+            delay = settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            logger.warning('Job %s failed (attempt %s/%s), retry in %ss', job, job.attempts, job.max_attempts, delay)
+            _finish(job, Job.Status.QUEUED, error=error, run_at=timezone.now() + timedelta(seconds=delay))
+        else:
+            logger.error('Job %s failed:\n%s', job, error)
+            _finish(job, Job.Status.FAILED, error=error, finished_at=timezone.now())
+        return False
+
+    _finish(
+        job,
+        Job.Status.SUCCEEDED,
+        result=result,
+        error='',
+        progress_done=job.progress_total or job.progress_done,
+        finished_at=timezone.now(),
+    )
+    return True
+
+
+def _finish(job, status, **fields):
+    fields['status'] = status
+    for name, value in fields.items():
+        setattr(job, name, value)
+    Job.objects.filter(pk=job.pk).update(**fields)
+
+
+def requeue_stale():
+    """
+    Return jobs of dead workers to the queue.
+
+    A running job whose heartbeat is older than JOBS_STALE_TIMEOUT is
+    retried (or failed if it has no attempts left).
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_STALE_TIMEOUT)
+    stale = Job.objects.filter(status=Job.Status.RUNNING, heartbeat_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.Status.FAILED, error='Worker stopped responding', finished_at=timezone.now()
+    )
+    requeued = stale.update(status=Job.Status.QUEUED, run_at=timezone.now())
+    return requeued, failed
+
+
+def purge_finished(days=None):
+    """Delete succeeded jobs older than JOBS_KEEP_DAYS"""
+    cutoff = timezone.now() - timedelta(days=days if days is not None else settings.JOBS_KEEP_DAYS)
+    deleted, _ = Job.objects.filter(status=Job.Status.SUCCEEDED, finished_at__lt=cutoff).delete()
+    return deleted
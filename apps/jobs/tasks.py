@@ -0,0 +1,20 @@
+"""
+Generic job tasks
+"""
+
+import io
+
+from django.core.management import call_command
+
+from apps.jobs.queue import task
+
+OUTPUT_LIMIT = 20000  # last N characters of command output kept in Job.result
+
+
+@task('call_command')
+def run_management_command(job, name, args=None):
+    """Run a management command (e.g. prepare_images_for_r2) in the worker"""
+    job.set_progress(0, message=f'manage.py {name}')
+    output = io.StringIO()
+    call_command(name, *(args or []), stdout=output, stderr=output)
+    return {'output': output.getvalue()[-OUTPUT_LIMIT:]}
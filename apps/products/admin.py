@@ -3,9 +3,16 @@ Django Admin Configuration for Products App
 """
 
 from django.contrib import admin
-from django.db.models import Count
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import QueryDict
 from django.utils.html import format_html
 from django import forms
+from apps.jobs.admin import JobActionMixin
+from apps.products.exports import ExportMixin
+from apps.products import snapshot
 from apps.products.models import (
     Section, Brand, Category, Collection, Type, Product, Color, ProductImage,
     TutorialCategory, TutorialVideo,
@@ -57,6 +64,99 @@ class DynamicListPerPageMixin:
         return self.list_per_page
 
 
+class AutocompleteFilter(admin.RelatedFieldListFilter):
+    """
+    Фильтр по ForeignKey с автодополнением вместо списка всех значений.
+
+    Варианты подгружаются постранично через admin:autocomplete
+    (у админки связанной модели должны быть search_fields),
+    из базы загружается только выбранное значение.
+    """
+    template = 'admin/filters/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        super().__init__(field, request, params, model, model_admin, field_path)
+        # Модель, которой принадлежит поле (для field_path вида 'category__section')
+        self.app_label = field.model._meta.app_label
+        self.model_name = field.model._meta.model_name
+        self.field_name = field.name
+
+    def field_choices(self, field, request, model_admin):
+        if not self.lookup_val:
+            return []
+        try:
+            return field.get_choices(include_blank=False, limit_choices_to={'pk': self.lookup_val})
+        except (ValueError, ValidationError):
+            return []
+
+    def has_output(self):
+        return True
+
+
+class AutocompleteFilterMixin:
+    """Подключает JS для AutocompleteFilter (select2 из django.contrib.admin)"""
+
+    class Media:
+        css = {'all': ('admin/css/vendor/select2/select2.css',)}
+        js = (
+            'admin/js/vendor/jquery/jquery.js',
+            'admin/js/vendor/select2/select2.full.js',
+            'admin/js/jquery.init.js',
+            'admin/js/autocomplete_filter.js',
+        )
+
+
+class PaginatedInlineFormSet(forms.BaseInlineFormSet):
+    """
+    Inline formset, который загружает только одну страницу объектов.
+
+    Номер страницы берется из GET-параметра (см. PaginatedTabularInline),
+    POST формы изменения отправляется на тот же URL, поэтому сохраняется
+    та же страница. Ссылки пейджера строятся из текущего GET (query) с
+    замененным номером страницы: _changelist_filters и страницы других
+    inline не теряются.
+    """
+    per_page = 20
+    page_param = 'page'
+    page_number = 1
+    query = QueryDict()
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            self.paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = self.paginator.get_page(self.page_number)
+            self._queryset = self.page.object_list
+        return self._queryset
+
+    def get_query_string(self, page_number):
+        query = self.query.copy()
+        query[self.page_param] = page_number
+        return query.urlencode()
+
+    @property
+    def previous_page_query(self):
+        return self.get_query_string(self.page.previous_page_number())
+
+    @property
+    def next_page_query(self):
+        return self.get_query_string(self.page.next_page_number())
+
+
+class PaginatedTabularInline(admin.TabularInline):
+    """TabularInline с постраничной загрузкой связанных объектов"""
+    formset = PaginatedInlineFormSet
+    template = 'admin/edit_inline/paginated_tabular.html'
+    per_page = 20
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page_param = f'{formset.get_default_prefix()}_page'
+        formset.page_number = request.GET.get(formset.page_param, 1)
+        formset.query = request.GET
+        return formset
+
+
 @admin.register(Section)
 class SectionAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'slug', 'created_at']
@@ -106,7 +206,7 @@ class BrandAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmi
 
 
 @admin.register(Category)
-class CategoryAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class CategoryAdmin(ExportMixin, CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'section', 'brand', 'slug', 'created_at']
     search_fields = ['name', 'description', 'section__name', 'brand__name']
     list_filter = ['section', 'brand', 'created_at']
@@ -127,9 +227,19 @@ class CategoryAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelA
         }),
     )
 
+    actions = ['export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('name', 'Название'),
+        ('slug', 'Slug'),
+        ('section__name', 'Раздел'),
+        ('brand__name', 'Бренд'),
+        ('created_at', 'Дата создания'),
+    ]
 
-class ProductInline(admin.TabularInline):
-    """Inline редактирование продуктов для Collection и Type"""
+
+class ProductInline(PaginatedTabularInline):
+    """Inline редактирование продуктов для Collection и Type (по 20 на странице)"""
     model = Product
     extra = 0
     fields = ['name', 'price', 'is_new', 'is_on_sale', 'slug']
@@ -139,13 +249,14 @@ class ProductInline(admin.TabularInline):
 
 
 @admin.register(Collection)
-class CollectionAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class CollectionAdmin(ExportMixin, AutocompleteFilterMixin, CustomPaginationMixin, DynamicListPerPageMixin, JobActionMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'brand', 'category', 'product_count', 'created_at']
-    list_filter = ['brand', 'category', 'created_at']
+    list_filter = [('brand', AutocompleteFilter), ('category', AutocompleteFilter), 'created_at']
     search_fields = ['name', 'description', 'brand__name', 'category__name']
     readonly_fields = ['slug', 'created_at', 'product_count']
     ordering = ['brand', 'category', 'name']
     list_per_page = 20
+    autocomplete_fields = ['brand', 'category']
     inlines = [ProductInline]
 
     fieldsets = (
@@ -168,12 +279,15 @@ class CollectionAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.Mode
 
     def product_count(self, obj):
         """Показать количество продуктов в коллекции"""
-        count = obj.products.count()
+        count = getattr(obj, '_product_count', None)
+        if count is None:
+            count = obj.products.count()
         return format_html(
             '<a href="/admin/products/product/?collection__id__exact={}">{} товаров</a>',
             obj.id, count
         )
     product_count.short_description = 'Товары'
+    product_count.admin_order_field = '_product_count'
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
@@ -182,27 +296,34 @@ class CollectionAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.Mode
         )
         return queryset
 
-    actions = ['duplicate_collection']
+    actions = ['duplicate_collection', 'export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('name', 'Название'),
+        ('slug', 'Slug'),
+        ('brand__name', 'Бренд'),
+        ('category__name', 'Категория'),
+        ('image', 'Изображение'),
+        ('_product_count', 'Товаров'),
+        ('created_at', 'Дата создания'),
+    ]
 
     def duplicate_collection(self, request, queryset):
-        """Bulk action: дублировать коллекции"""
-        for collection in queryset:
-            collection.pk = None
-            collection.name = f"{collection.name} (копия)"
-            collection.slug = ""
-            collection.save()
-        self.message_user(request, f"Успешно создано {queryset.count()} копий коллекций")
+        """Bulk action: дублировать коллекции (в фоне)"""
+        ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_job(request, 'products.duplicate_collections', f"Копирование {len(ids)} коллекций", ids=ids)
     duplicate_collection.short_description = "Дублировать выбранные коллекции"
 
 
 @admin.register(Type)
-class TypeAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class TypeAdmin(ExportMixin, AutocompleteFilterMixin, CustomPaginationMixin, DynamicListPerPageMixin, JobActionMixin, admin.ModelAdmin):
     list_display = ['id', 'name', 'category', 'product_count', 'slug_display', 'created_at']
-    list_filter = ['category', 'created_at']
+    list_filter = [('category', AutocompleteFilter), 'created_at']
     search_fields = ['name', 'description', 'category__name', 'slug']
     readonly_fields = ['slug', 'created_at', 'product_count']
     ordering = ['category', 'name']
     list_per_page = 20
+    autocomplete_fields = ['category']
     inlines = [ProductInline]
 
     fieldsets = (
@@ -223,7 +344,9 @@ class TypeAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin
 
     def product_count(self, obj):
         """Показать количество продуктов этого типа с ссылкой"""
-        count = obj.products.count()
+        count = getattr(obj, '_product_count', None)
+        if count is None:
+            count = obj.products.count()
         if count > 0:
             return format_html(
                 '<a href="/admin/products/product/?type__id__exact={}" style="color: #417690; font-weight: bold;">{} товаров</a>',
@@ -231,6 +354,7 @@ class TypeAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin
             )
         return format_html('<span style="color: #999;">0 товаров</span>')
     product_count.short_description = 'Товары'
+    product_count.admin_order_field = '_product_count'
 
     def slug_display(self, obj):
         """Красиво отображать slug"""
@@ -250,48 +374,25 @@ class TypeAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin
         return queryset
 
     # Custom bulk actions
-    actions = ['duplicate_type', 'export_as_csv']
+    actions = ['duplicate_type', 'export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('name', 'Название'),
+        ('slug', 'Slug'),
+        ('category__name', 'Категория'),
+        ('_product_count', 'Товаров'),
+        ('created_at', 'Дата создания'),
+    ]
 
     def duplicate_type(self, request, queryset):
-        """Bulk action: дублировать типы"""
-        duplicated_count = 0
-        for type_obj in queryset:
-            type_obj.pk = None
-            type_obj.name = f"{type_obj.name} (копия)"
-            type_obj.slug = ""  # Will be auto-generated
-            type_obj.save()
-            duplicated_count += 1
-
-        self.message_user(request, f"Успешно создано {duplicated_count} копий типов")
+        """Bulk action: дублировать типы (в фоне)"""
+        ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_job(request, 'products.duplicate_types', f"Копирование {len(ids)} типов", ids=ids)
     duplicate_type.short_description = "Дублировать выбранные типы"
 
-    def export_as_csv(self, request, queryset):
-        """Bulk action: экспорт в CSV"""
-        import csv
-        from django.http import HttpResponse
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="types.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Название', 'Slug', 'Категория', 'Товаров', 'Дата создания'])
-
-        for type_obj in queryset:
-            writer.writerow([
-                type_obj.id,
-                type_obj.name,
-                type_obj.slug,
-                type_obj.category.name,
-                type_obj.products.count(),
-                type_obj.created_at.strftime('%Y-%m-%d')
-            ])
-
-        return response
-    export_as_csv.short_description = "Экспортировать в CSV"
-
 
 @admin.register(Color)
-class ColorAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class ColorAdmin(ExportMixin, CustomPaginationMixin, DynamicListPerPageMixin, JobActionMixin, admin.ModelAdmin):
     """
     Admin interface for Color catalog (Справочник цветов)
 
@@ -369,7 +470,9 @@ class ColorAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmi
 
     def product_count(self, obj):
         """Количество продуктов с этим цветом"""
-        count = obj.products.count()
+        count = getattr(obj, '_product_count', None)
+        if count is None:
+            count = obj.products.count()
         if count > 0:
             return format_html(
                 '<a href="/admin/products/product/?color__id__exact={}" '
@@ -378,6 +481,7 @@ class ColorAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmi
             )
         return format_html('<span style="color: #999;">0 товаров</span>')
     product_count.short_description = 'Товары'
+    product_count.admin_order_field = '_product_count'
 
     def get_queryset(self, request):
         """Оптимизированный queryset с аннотациями"""
@@ -387,18 +491,21 @@ class ColorAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmi
         )
         return queryset
 
-    actions = ['duplicate_colors']
+    actions = ['duplicate_colors', 'export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('name', 'Название'),
+        ('slug', 'Slug'),
+        ('hex_code', 'HEX'),
+        ('texture_image', 'Текстура'),
+        ('_product_count', 'Товаров'),
+        ('created_at', 'Дата создания'),
+    ]
 
     def duplicate_colors(self, request, queryset):
-        """Bulk action: дублировать цвета"""
-        duplicated_count = 0
-        for color in queryset:
-            color.pk = None
-            color.name = f"{color.name} (копия)"
-            color.slug = ""  # Will be auto-generated
-            color.save()
-            duplicated_count += 1
-        self.message_user(request, f'Создано копий цветов: {duplicated_count}')
+        """Bulk action: дублировать цвета (в фоне)"""
+        ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_job(request, 'products.duplicate_colors', f"Копирование {len(ids)} цветов", ids=ids)
     duplicate_colors.short_description = "Дублировать выбранные цвета"
 
 
@@ -441,7 +548,7 @@ class ProductAdminForm(forms.ModelForm):
 
 
 @admin.register(Product)
-class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class ProductAdmin(ExportMixin, AutocompleteFilterMixin, CustomPaginationMixin, DynamicListPerPageMixin, JobActionMixin, admin.ModelAdmin):
     """
     Admin interface for Products with color variations support
     """
@@ -453,15 +560,17 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
         'image_count', 'is_new', 'is_on_sale', 'created_at'
     ]
     list_filter = [
-        'section', 'brand', 'category', 'collection', 'type',
-        'color', 'is_new', 'is_on_sale', 'created_at'
+        ('section', AutocompleteFilter), ('brand', AutocompleteFilter),
+        ('category', AutocompleteFilter), ('collection', AutocompleteFilter),
+        ('type', AutocompleteFilter), ('color', AutocompleteFilter),
+        'is_new', 'is_on_sale', 'created_at'
     ]
     search_fields = ['name', 'description', 'slug', 'brand__name', 'color_group']
     readonly_fields = ['slug', 'created_at', 'updated_at', 'variation_count', 'variations_list', 'image_count']
     list_editable = ['is_new', 'is_on_sale']
     ordering = ['-created_at']
     list_per_page = 20
-    autocomplete_fields = ['color']
+    autocomplete_fields = ['section', 'brand', 'category', 'collection', 'type', 'color']
     inlines = [ProductImageInline]
 
     fieldsets = (
@@ -490,8 +599,10 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
     )
 
     def image_count(self, obj):
-        """Количество изображений в галерее"""
-        count = obj.gallery_images.count()
+        """Количество изображений в галерее (аннотация из get_queryset)"""
+        count = getattr(obj, '_image_count', None)
+        if count is None:
+            count = obj.gallery_images.count()
         if count > 0:
             return format_html(
                 '<span style="color: #417690; font-weight: bold;">{} изобр.</span>',
@@ -499,6 +610,7 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
             )
         return format_html('<span style="color: #999;">0</span>')
     image_count.short_description = 'Галерея'
+    image_count.admin_order_field = '_image_count'
 
     def color_display(self, obj):
         """Отображение цвета с превью"""
@@ -520,7 +632,9 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
         if not obj.color_group:
             return format_html('<span style="color: #999;">—</span>')
 
-        count = Product.objects.filter(color_group=obj.color_group).count()
+        count = getattr(obj, '_variation_count', None)
+        if count is None:
+            count = Product.objects.filter(color_group=obj.color_group).count()
         if count > 1:
             return format_html(
                 '<a href="/admin/products/product/?color_group={}" '
@@ -529,6 +643,7 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
             )
         return format_html('<span style="color: #999;">1 (только этот)</span>')
     variation_count.short_description = 'Вариации'
+    variation_count.admin_order_field = '_variation_count'
 
     def variations_list(self, obj):
         """Список всех вариаций продукта"""
@@ -559,9 +674,36 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
     variations_list.short_description = 'Связанные вариации'
 
     def get_queryset(self, request):
-        """Оптимизированный queryset"""
+        """
+        Оптимизированный queryset.
+
+        Количество изображений и вариаций считается в том же запросе
+        (вместо двух COUNT-запросов на каждую строку changelist).
+        """
+        images = (
+            ProductImage.objects.filter(product=OuterRef('pk'))
+            .order_by()
+            .values('product')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        variations = (
+            Product.objects.filter(color_group=OuterRef('color_group'))
+            .order_by()
+            .values('color_group')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
         return super().get_queryset(request).select_related(
-            'section', 'brand', 'category', 'collection', 'type', 'color'
+            'section', 'brand', 'color',
+            # __str__ категории/коллекции/типа обращается к связанным моделям
+            'category__section', 'category__brand',
+            'collection__category', 'collection__brand',
+            'type__category',
+        ).annotate(
+            # Подзапросы, а не JOIN + GROUP BY: COUNT(*) пагинации остается простым
+            _image_count=Coalesce(Subquery(images, output_field=IntegerField()), 0),
+            _variation_count=Subquery(variations, output_field=IntegerField()),
         )
 
     def get_fieldsets(self, request, obj=None):
@@ -622,23 +764,47 @@ class ProductAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAd
 
     # Note: variation actions are also shown as separate buttons in the template
     # (templates/admin/products/product/change_list.html)
-    actions = ['set_same_color_group', 'clear_color_group']
+    actions = ['set_same_color_group', 'clear_color_group', 'export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('name', 'Название'),
+        ('slug', 'Slug'),
+        ('price', 'Цена'),
+        ('section__name', 'Раздел'),
+        ('brand__name', 'Бренд'),
+        ('category__name', 'Категория'),
+        ('collection__name', 'Коллекция'),
+        ('type__name', 'Тип'),
+        ('color__name', 'Цвет'),
+        ('color_group', 'Группа вариаций'),
+        ('is_new', 'Новинка'),
+        ('is_on_sale', 'Акция'),
+        ('is_featured', 'Рекомендуемый'),
+        ('main_image_url', 'Основное изображение'),
+        ('hover_image_url', 'Изображение при наведении'),
+        ('_image_count', 'Изображений'),
+        ('created_at', 'Дата создания'),
+        ('updated_at', 'Дата обновления'),
+    ]
 
     def set_same_color_group(self, request, queryset):
-        """Установить одинаковый color_group для выбранных продуктов"""
+        """Установить одинаковый color_group для выбранных продуктов (в фоне)"""
         import uuid
         new_group_id = uuid.uuid4()
-        updated = queryset.update(color_group=new_group_id)
-        self.message_user(
+        ids = list(queryset.values_list('pk', flat=True))
+        self.enqueue_job(
             request,
-            f'Установлен color_group {new_group_id} для {updated} товаров. '
-            f'Теперь они являются цветовыми вариациями друг друга.'
+            'products.set_color_group',
+            f'Установка color_group {new_group_id} для {len(ids)} товаров',
+            ids=ids,
+            color_group=str(new_group_id)
         )
     set_same_color_group.short_description = "Объединить в группу вариаций"
 
     def clear_color_group(self, request, queryset):
         """Очистить color_group для выбранных продуктов"""
         updated = queryset.update(color_group=None)
+        snapshot.bulk_changed()
         self.message_user(
             request,
             f'Очищен color_group для {updated} товаров.'
@@ -707,7 +873,7 @@ class TutorialVideoAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.M
 # ========================
 
 @admin.register(Material)
-class MaterialAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
+class MaterialAdmin(ExportMixin, CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelAdmin):
     """Admin interface for Materials (Downloadable Files)"""
 
     list_display = [
@@ -760,7 +926,17 @@ class MaterialAdmin(CustomPaginationMixin, DynamicListPerPageMixin, admin.ModelA
         return format_html('<span style="color: #999;">—</span>')
     file_link_display.short_description = 'Файл'
 
-    actions = ['activate_materials', 'deactivate_materials', 'duplicate_materials']
+    actions = ['activate_materials', 'deactivate_materials', 'duplicate_materials', 'export_as_csv', 'export_as_xlsx']
+    export_fields = [
+        ('id', 'ID'),
+        ('title', 'Название'),
+        ('description', 'Описание'),
+        ('file_url', 'Ссылка на файл'),
+        ('image_url', 'Ссылка на картинку'),
+        ('order', 'Порядок'),
+        ('is_active', 'Активен'),
+        ('created_at', 'Дата создания'),
+    ]
 
     def activate_materials(self, request, queryset):
         """Bulk action: Activate selected materials"""
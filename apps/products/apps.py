@@ -12,6 +12,12 @@ class ProductsConfig(AppConfig):
         # Ошибка: 'str' object has no attribute 'COOKIES'
         self._patch_jazzmin_sidebar_status()
 
+        # Пересборка снимка каталога (snapshot.py) после изменений
+        from django.conf import settings
+        if settings.CATALOG_SNAPSHOT:
+            from apps.products.snapshot import connect_signals
+            connect_signals()
+
     def _patch_jazzmin_sidebar_status(self):
         """
         Исправляет баг в django-jazzmin, когда sidebar_status получает
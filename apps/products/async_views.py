@@ -0,0 +1,309 @@
+"""
+Async views for public catalog reads (ASGI mode, see ASGI_DEPLOYMENT.md)
+
+Same URLs, query parameters and JSON as the DRF views they replace when
+settings.ASGI_MODE is on:
+
+- GET /api/v1/search/            → AsyncSearchView        (SearchViewSet.list)
+- GET /api/v1/plumbing-section/  → AsyncPlumbingSectionView (PlumbingSectionViewSet.list)
+- GET /api/v1/products/          → AsyncProductListView   (ProductViewSet.list)
+- GET /api/v1/catalog/...        → AsyncCatalog*View      (catalog_views.py)
+
+Queries go through the async ORM (aget, acount, async for), so a worker
+keeps serving other requests while one waits on the database. Serializers
+are sync code (lazy FK access, SerializerMethodField) and run in
+sync_to_async. Responses are always JSON (no browsable API).
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from apps.products.models import Section, Brand, Category, Collection, Type, Product
+from apps.products.search_views import SearchMixin
+from apps.products.snapshot import get_snapshot, section_json, browse_json, plumbing_json, snapshot_response
+from apps.products.serializers import (
+    SectionSerializer,
+    CategorySerializer,
+    CollectionSerializer,
+    TypeSerializer,
+    ProductListSerializer,
+    PlumbingProductSerializer,
+)
+from apps.products.views import ProductViewSet, PlumbingSectionViewSet
+from config.metrics import TimedJSONRenderer
+
+
+class AsyncAPIView(View):
+    """Base for async read-only endpoints: JSON rendered the same way as DRF's Response"""
+    http_method_names = ['get', 'head', 'options']
+    renderer = TimedJSONRenderer()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # JWT auth, no session CSRF: as DRF's APIView.as_view()
+        view.csrf_exempt = True
+        return view
+
+    def render(self, data, status=200):
+        return HttpResponse(
+            self.renderer.render(data),
+            content_type=self.renderer.media_type,
+            status=status,
+        )
+
+    def not_found(self, data=None):
+        return self.render(data or {'detail': NotFound.default_detail}, status=404)
+
+
+async def serialize(serializer_class, instance, **kwargs):
+    """serializer.data in a thread: serializers may touch the database"""
+    return await sync_to_async(lambda: serializer_class(instance, **kwargs).data)()
+
+
+async def fetch(queryset):
+    return [obj async for obj in queryset]
+
+
+class AsyncSearchView(SearchMixin, AsyncAPIView):
+    """GET /api/v1/search/?q=query&limit=5 (see SearchViewSet)"""
+    use_read_replica = True
+
+    async def get(self, request):
+        query, limit, empty_response = self.parse_search_params(request.GET)
+        if empty_response is not None:
+            return self.render(empty_response)
+
+        results = []
+        for queryset, to_result in self.search_sources(query):
+            results.extend(to_result(obj) for obj in await fetch(queryset))
+
+        data = await sync_to_async(self.search_response)(results, limit)
+        return self.render(data)
+
+
+class AsyncPlumbingSectionView(AsyncAPIView):
+    """GET /api/v1/plumbing-section/ (see PlumbingSectionViewSet)"""
+    viewset_class = PlumbingSectionViewSet
+
+    async def get(self, request):
+        viewset = self.viewset_class()
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot_response(plumbing_json(snapshot, viewset.CATEGORY_NAME_MAPPING))
+
+        try:
+            caizer_brand = await Brand.objects.aget(name__iexact='Caizer')
+        except Brand.DoesNotExist:
+            return self.render({key: [] for key in viewset.CATEGORY_NAME_MAPPING})
+
+        result = {}
+        for key, products in viewset.featured_products(caizer_brand):
+            result[key] = await serialize(PlumbingProductSerializer, await fetch(products), many=True)
+        return self.render(result)
+
+
+class AsyncProductListView(AsyncAPIView):
+    """
+    GET /api/v1/products/ (see ProductViewSet.list)
+
+    Filtering, search, ordering and pagination are ProductViewSet's own
+    (filter backends, CustomPageNumberPagination); COUNT and the page are
+    fetched with the async ORM. Other methods (POST create) are handled
+    by the sync ProductViewSet.
+    """
+    http_method_names = ['get', 'head', 'options', 'post']
+    use_read_replica = True
+    viewset_class = ProductViewSet
+    fallback_view = staticmethod(ProductViewSet.as_view({'get': 'list', 'post': 'create'}))
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.fallback_view)(request, *args, **kwargs)
+
+    async def get(self, request):
+        viewset = self.viewset_class(action='list', args=(), kwargs={}, format_kwarg=None)
+        viewset.request = Request(request)
+
+        # Filter backends may query the database (ModelChoiceFilter validation)
+        queryset = await sync_to_async(viewset.filter_queryset)(viewset.get_queryset())
+
+        paginator = viewset.paginator
+        page_size = paginator.get_page_size(viewset.request)
+        if not page_size:
+            products = await fetch(queryset)
+            return self.render(await self.serialize(viewset, products))
+
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        # cached_property: the sync COUNT in Paginator is never run
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(viewset.request, django_paginator)
+        try:
+            page = django_paginator.page(page_number)
+        except InvalidPage:
+            return self.not_found({'detail': paginator.invalid_page_message})
+        page.object_list = await fetch(page.object_list)
+
+        paginator.page = page
+        paginator.request = viewset.request
+        data = await self.serialize(viewset, page.object_list)
+        return self.render(paginator.get_paginated_response(data).data)
+
+    async def serialize(self, viewset, products):
+        def to_data():
+            serializer = viewset.get_serializer(
+                products,
+                many=True,
+                context={'color_groups_map': viewset.get_color_groups_map(products)}
+            )
+            return serializer.data
+        return await sync_to_async(to_data)()
+
+
+# ========================
+# Catalog (see catalog_views.py)
+# ========================
+
+class AsyncCatalogSectionView(AsyncAPIView):
+    """GET /catalog/{section_slug}/"""
+    use_read_replica = True
+
+    async def get(self, request, section_slug):
+        snapshot = get_snapshot()
+        content = section_json(snapshot, section_slug) if snapshot is not None else None
+        if content is not None:
+            return snapshot_response(content)
+
+        try:
+            section = await Section.objects.aget(slug=section_slug)
+        except Section.DoesNotExist:
+            return self.not_found()
+        categories = await fetch(section.categories.all())
+
+        return self.render({
+            'section': await serialize(SectionSerializer, section),
+            'categories': await serialize(CategorySerializer, categories, many=True)
+        })
+
+
+class AsyncCatalogCategoryView(AsyncAPIView):
+    """GET /catalog/{section_slug}/{category_slug}/"""
+    use_read_replica = True
+
+    async def get(self, request, section_slug, category_slug):
+        try:
+            section = await Section.objects.aget(slug=section_slug)
+            category = await Category.objects.aget(slug=category_slug)
+        except (Section.DoesNotExist, Category.DoesNotExist):
+            return self.not_found()
+
+        collections = await fetch(Collection.objects.filter(category__section=section, category=category))
+        types = await fetch(Type.objects.filter(category__section=section, category=category))
+
+        if not collections and not types:
+            return self.not_found({'error': 'No collections or types found for this section and category'})
+
+        return self.render({
+            'section': await serialize(SectionSerializer, section),
+            'category': await serialize(CategorySerializer, category),
+            'collections': await serialize(CollectionSerializer, collections, many=True),
+            'types': await serialize(TypeSerializer, types, many=True)
+        })
+
+
+class AsyncCatalogProductsView(AsyncAPIView):
+    """GET /catalog/{section_slug}/{category_slug}/{collection_or_type_slug}/"""
+    use_read_replica = True
+
+    async def get(self, request, section_slug, category_slug, item_slug):
+        try:
+            section = await Section.objects.aget(slug=section_slug)
+            category = await Category.objects.aget(slug=category_slug)
+        except (Section.DoesNotExist, Category.DoesNotExist):
+            return self.not_found()
+
+        products = Product.objects.filter(
+            section=section,
+            category=category
+        ).select_related('section', 'category', 'collection', 'type')
+
+        # Collection first, then Type
+        try:
+            collection = await Collection.objects.aget(
+                category__section=section, category=category, slug=item_slug
+            )
+        except Collection.DoesNotExist:
+            collection = None
+        if collection is not None:
+            return self.render({
+                'section': await serialize(SectionSerializer, section),
+                'category': await serialize(CategorySerializer, category),
+                'collection': await serialize(CollectionSerializer, collection),
+                'type': None,
+                'products': await serialize(
+                    ProductListSerializer, await fetch(products.filter(collection=collection)), many=True
+                )
+            })
+
+        try:
+            product_type = await Type.objects.aget(
+                category__section=section, category=category, slug=item_slug
+            )
+        except Type.DoesNotExist:
+            product_type = None
+        if product_type is not None:
+            return self.render({
+                'section': await serialize(SectionSerializer, section),
+                'category': await serialize(CategorySerializer, category),
+                'collection': None,
+                'type': await serialize(TypeSerializer, product_type),
+                'products': await serialize(
+                    ProductListSerializer, await fetch(products.filter(type=product_type)), many=True
+                )
+            })
+
+        return self.not_found({'error': 'Collection or Type not found'})
+
+
+class AsyncCatalogBrowseView(AsyncAPIView):
+    """GET /catalog/browse/"""
+    use_read_replica = True
+
+    async def get(self, request):
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot_response(browse_json(snapshot))
+
+        sections = await fetch(Section.objects.all())
+        collections = await fetch(Collection.objects.filter(category__section__in=sections))
+        types = await fetch(Type.objects.filter(category__section__in=sections))
+        categories = await fetch(Category.objects.filter(
+            Q(id__in=[c.category_id for c in collections]) | Q(id__in=[t.category_id for t in types])
+        ))
+
+        def build():
+            catalog_structure = []
+            for section in sections:
+                section_categories = [c for c in categories if c.section_id == section.id]
+                catalog_structure.append({
+                    'section': SectionSerializer(section).data,
+                    'categories': [
+                        {
+                            'category': CategorySerializer(category).data,
+                            'collections': CollectionSerializer(
+                                [c for c in collections if c.category_id == category.id], many=True
+                            ).data,
+                            'types': TypeSerializer(
+                                [t for t in types if t.category_id == category.id], many=True
+                            ).data
+                        }
+                        for category in section_categories
+                    ]
+                })
+            return {'catalog': catalog_structure}
+
+        return self.render(await sync_to_async(build)())
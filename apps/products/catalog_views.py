@@ -15,6 +15,7 @@ from django.shortcuts import get_object_or_404
 from django.db.models import Q
 
 from apps.products.models import Section, Category, Collection, Type, Product
+from apps.products.snapshot import get_snapshot, section_json, browse_json, snapshot_response
 from apps.products.serializers import (
     SectionSerializer,
     CategorySerializer,
@@ -33,8 +34,15 @@ class CatalogSectionView(APIView):
     - List of categories available in this section
     """
     permission_classes = [AllowAny]
+    use_read_replica = True
 
     def get(self, request, section_slug):
+        # Shared catalog snapshot; unknown slugs fall through to the database
+        snapshot = get_snapshot()
+        content = section_json(snapshot, section_slug) if snapshot is not None else None
+        if content is not None:
+            return snapshot_response(content)
+
         section = get_object_or_404(Section, slug=section_slug)
         categories = section.categories.all()
 
@@ -55,6 +63,7 @@ class CatalogCategoryView(APIView):
     - List of types for this section+category
     """
     permission_classes = [AllowAny]
+    use_read_replica = True
 
     def get(self, request, section_slug, category_slug):
         section = get_object_or_404(Section, slug=section_slug)
@@ -62,11 +71,11 @@ class CatalogCategoryView(APIView):
 
         # Get collections and types for this section+category
         collections = Collection.objects.filter(
-            section=section,
+            category__section=section,
             category=category
         )
         types = Type.objects.filter(
-            section=section,
+            category__section=section,
             category=category
         )
 
@@ -102,6 +111,7 @@ class CatalogProductsView(APIView):
     3. If neither found, return 404
     """
     permission_classes = [AllowAny]
+    use_read_replica = True
 
     def get(self, request, section_slug, category_slug, item_slug):
         section = get_object_or_404(Section, slug=section_slug)
@@ -110,7 +120,7 @@ class CatalogProductsView(APIView):
         # Try to find Collection first
         try:
             collection = Collection.objects.get(
-                section=section,
+                category__section=section,
                 category=category,
                 slug=item_slug
             )
@@ -133,7 +143,7 @@ class CatalogProductsView(APIView):
         # Try to find Type
         try:
             product_type = Type.objects.get(
-                section=section,
+                category__section=section,
                 category=category,
                 slug=item_slug
             )
@@ -170,8 +180,13 @@ class CatalogBrowseView(APIView):
     This endpoint is useful for building navigation menus and sitemaps
     """
     permission_classes = [AllowAny]
+    use_read_replica = True
 
     def get(self, request):
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot_response(browse_json(snapshot))
+
         sections = Section.objects.all()
         catalog_structure = []
 
@@ -182,8 +197,9 @@ class CatalogBrowseView(APIView):
             }
 
             # Get all unique categories for this section by checking collections and types
-            collection_categories = Collection.objects.filter(section=section).values_list('category', flat=True).distinct()
-            type_categories = Type.objects.filter(section=section).values_list('category', flat=True).distinct()
+            # (Collection/Type belong to a section through their category)
+            collection_categories = Collection.objects.filter(category__section=section).values_list('category', flat=True).distinct()
+            type_categories = Type.objects.filter(category__section=section).values_list('category', flat=True).distinct()
 
             # Combine and get unique category IDs
             category_ids = set(list(collection_categories) + list(type_categories))
@@ -195,11 +211,11 @@ class CatalogBrowseView(APIView):
                 category_data = {
                     'category': CategorySerializer(category).data,
                     'collections': CollectionSerializer(
-                        Collection.objects.filter(section=section, category=category),
+                        Collection.objects.filter(category__section=section, category=category),
                         many=True
                     ).data,
                     'types': TypeSerializer(
-                        Type.objects.filter(section=section, category=category),
+                        Type.objects.filter(category__section=section, category=category),
                         many=True
                     ).data
                 }
@@ -0,0 +1,38 @@
+"""
+Management command: write the shared catalog snapshot (apps/products/snapshot.py)
+
+Workers rebuild it themselves after catalog changes (bulk writes in the
+project call snapshot.bulk_changed()); run this after imports or SQL made
+outside Django so every worker of the host switches to the new data at once.
+
+Usage:
+    python manage.py build_catalog_snapshot
+    python manage.py build_catalog_snapshot --info
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.products.snapshot import CatalogSnapshot, build_snapshot, snapshot_path
+
+
+class Command(BaseCommand):
+    help = 'Build the shared-memory catalog snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=None, help='Snapshot file (default: CATALOG_SNAPSHOT_PATH or snapshot_path())')
+        parser.add_argument('--info', action='store_true', help='Show the current snapshot instead of building')
+
+    def handle(self, *args, **options):
+        path = options['path'] or snapshot_path()
+
+        if not options['info']:
+            build_snapshot(path)
+            self.stdout.write(self.style.SUCCESS(f'✅ Снимок каталога записан: {path}'))
+
+        try:
+            snapshot = CatalogSnapshot(path)
+        except FileNotFoundError:
+            raise CommandError(f'Снимок не найден: {path}')
+        self.stdout.write(f'📦 Версия {snapshot.version}, возраст {snapshot.age:.0f} c')
+        for name, table in snapshot.tables.items():
+            self.stdout.write(f'   {name}: {len(table)}')
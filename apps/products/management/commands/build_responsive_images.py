@@ -0,0 +1,119 @@
+"""
+Management command to build responsive variants for images already in the catalog
+
+Collects image URLs from ProductImage, Product.main_image_url/hover_image_url
+and Collection.image, skips the ones already in the ResponsiveImage registry,
+then downloads (or reads from media storage) and re-encodes the rest with
+the upload pipeline (apps/uploads/images.py).
+
+Variants are written to responsive/ in the media storage backend.
+
+Usage:
+    python manage.py build_responsive_images
+    python manage.py build_responsive_images --force --limit 100
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import urllib.request
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from PIL import Image, UnidentifiedImageError
+
+from apps.products.models import Collection, Product, ProductImage, ResponsiveImage
+from apps.uploads.images import get_executor, process_image, register_variants
+from apps.uploads.storage import get_storage, name_from_url, put_files
+
+
+class Command(BaseCommand):
+    help = 'Build responsive image variants (srcset, size, placeholder) for catalog images'
+
+    DOWNLOAD_TIMEOUT = 30
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild images that are already in the registry'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Process at most N images'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('🖼️  Building responsive images...'))
+
+        urls = self.collect_urls()
+        if not options['force']:
+            registered = set(
+                ResponsiveImage.objects.filter(source_url__in=urls).values_list('source_url', flat=True)
+            )
+            urls = [url for url in urls if url not in registered]
+        if options['limit'] is not None:
+            urls = urls[:options['limit']]
+
+        self.stdout.write(f'Images to process: {len(urls)}')
+
+        self.storage = get_storage()
+        base_url = self.storage.url('responsive/')
+
+        # Pillow work goes through the shared bounded pool, results are saved from this thread
+        futures = {
+            get_executor().submit(self.build, url, options['force']): url
+            for url in urls
+        }
+
+        built_count = 0
+        error_count = 0
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                result = future.result()
+            except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+                self.stdout.write(self.style.ERROR(f'✗ {url}: {e}'))
+                error_count += 1
+                continue
+
+            register_variants(url, result, base_url)
+            built_count += 1
+            self.stdout.write(f"✓ {url} ({result['width']}x{result['height']})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Built: {built_count}, errors: {error_count}'
+        ))
+
+    def collect_urls(self):
+        """Все уникальные URL изображений каталога"""
+        urls = set(ProductImage.objects.values_list('image_url', flat=True))
+        for main_url, hover_url in Product.objects.values_list('main_image_url', 'hover_image_url'):
+            urls.update((main_url, hover_url))
+        urls.update(Collection.objects.values_list('image', flat=True))
+        return sorted(url for url in urls if url)
+
+    def build(self, url, overwrite=False):
+        """Download the source image, write its variants and upload them to storage"""
+        basename = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        with tempfile.TemporaryDirectory(prefix='responsive-') as directory:
+            result = process_image(self.open_source(url), directory, basename)
+            put_files(self.storage, [
+                (f"responsive/{variant['filename']}", os.path.join(directory, variant['filename']))
+                for items in result['variants'].values()
+                for variant in items
+            ], overwrite=overwrite)
+        return result
+
+    def open_source(self, url):
+        """File object for `url`: media storage object or HTTP download"""
+        name = name_from_url(url, self.storage)
+        if name is not None:
+            return self.storage.open(name)
+
+        request = urllib.request.Request(url, headers={'User-Agent': 'lamis-backend'})
+        with urllib.request.urlopen(request, timeout=self.DOWNLOAD_TIMEOUT) as response:
+            return io.BytesIO(response.read())
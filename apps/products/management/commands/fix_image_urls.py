@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """
 Management command to add /catalog/ to image URLs
+
+URLs that point to the media storage backend are only rewritten
+if the fixed file exists there.
 """
 
 from django.core.management.base import BaseCommand
 from apps.products.models import Product
+from apps.uploads.storage import get_storage, name_from_url
 
 
 class Command(BaseCommand):
@@ -13,6 +17,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('🔧 Fixing image URLs...'))
 
+        storage = get_storage()
         products = Product.objects.all()
         updated_count = 0
 
@@ -20,13 +25,15 @@ class Command(BaseCommand):
             updated = False
 
             # Fix main_image_url
-            if product.main_image_url and '/catalog/' not in product.main_image_url:
-                product.main_image_url = product.main_image_url.replace('/images/', '/images/catalog/')
+            fixed_url = self.fix_url(storage, product.main_image_url)
+            if fixed_url:
+                product.main_image_url = fixed_url
                 updated = True
 
             # Fix hover_image_url
-            if product.hover_image_url and '/catalog/' not in product.hover_image_url:
-                product.hover_image_url = product.hover_image_url.replace('/images/', '/images/catalog/')
+            fixed_url = self.fix_url(storage, product.hover_image_url)
+            if fixed_url:
+                product.hover_image_url = fixed_url
                 updated = True
 
             if updated:
@@ -47,3 +54,14 @@ class Command(BaseCommand):
                 f"   Updated: {updated_count} products\n"
             )
         )
+
+    def fix_url(self, storage, url):
+        """URL with /catalog/ added, or None if it does not need (or cannot get) the fix"""
+        if not url or '/catalog/' in url:
+            return None
+        fixed_url = url.replace('/images/', '/images/catalog/')
+        name = name_from_url(fixed_url, storage)
+        if name is not None and not storage.exists(name):
+            self.stdout.write(self.style.WARNING(f"⚠️  Skipped, not in storage: {name}"))
+            return None
+        return fixed_url
@@ -1,6 +1,6 @@
 """
 Management command to load comprehensive test data for LAMIS
-Usage: python manage.py load_test_data [--flush]
+Usage: python manage.py load_test_data [--flush | --sync]
 
 Loads in order:
 1. Brands (Lamis, Blesk, Caizer)
@@ -9,12 +9,27 @@ Loads in order:
 4. Collections (10 for Мебель для ванной)
 4.5. Types (Напольный, Подвесной и т.д. для Санфарфор)
 5. Products (25-30 with real image URLs)
+
+--sync (используется при деплое):
+Вместо удаления и повторного создания всех данных сравнивает желаемый набор
+данных с БД по хэшу содержимого каждой строки и применяет только вставки,
+обновления и удаления. Повторный деплой без изменений делает только SELECT-ы.
 """
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from slugify import slugify
+from apps.products import snapshot
 from apps.products.models import Brand, Section, Category, Collection, Type, Product, TutorialCategory, TutorialVideo
 from decimal import Decimal
+import hashlib
+import json
 import random
+import time
+
+# Seed for the deterministic random choices (images, colors, flags) in --sync mode
+SYNC_SEED = 'lamis-test-data'
 
 
 class Command(BaseCommand):
@@ -26,8 +41,19 @@ class Command(BaseCommand):
             action='store_true',
             help='Delete all existing data before loading test data'
         )
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help='Incrementally sync the DB with the test dataset (only inserts, updates and deletes the differences)'
+        )
 
     def handle(self, *args, **kwargs):
+        if kwargs['sync']:
+            if kwargs['flush']:
+                self.stdout.write(self.style.WARNING('--flush игнорируется в режиме --sync'))
+            self.sync()
+            return
+
         self.stdout.write(self.style.HTTP_INFO('\n' + '='*60))
         self.stdout.write(self.style.HTTP_INFO('  ЗАГРУЗКА ТЕСТОВЫХ ДАННЫХ В БД'))
         self.stdout.write(self.style.HTTP_INFO('='*60 + '\n'))
@@ -87,9 +113,9 @@ class Command(BaseCommand):
         self.stdout.write(self.style.SUCCESS(f'Видео: {len(tutorial_videos)}'))
         self.stdout.write(self.style.SUCCESS('='*60 + '\n'))
 
-    def create_brands(self):
-        """Create 3 brands: Lamis, Blesk, Caizer"""
-        brands_data = [
+    def get_brands_data(self):
+        """Desired brands: Lamis, Blesk, Caizer"""
+        return [
             {
                 'name': 'Lamis',
                 'description': 'Мебель для ванных комнат, зеркала и водонагреватели премиум класса'
@@ -104,8 +130,10 @@ class Command(BaseCommand):
             },
         ]
 
+    def create_brands(self):
+        """Create 3 brands: Lamis, Blesk, Caizer"""
         brands = {}
-        for brand_data in brands_data:
+        for brand_data in self.get_brands_data():
             brand, created = Brand.objects.update_or_create(
                 name=brand_data['name'],
                 defaults={'description': brand_data['description']}
@@ -116,9 +144,9 @@ class Command(BaseCommand):
 
         return brands
 
-    def create_sections(self):
-        """Create 6 sections with detailed descriptions"""
-        sections_data = [
+    def get_sections_data(self):
+        """Desired sections with detailed descriptions"""
+        return [
             {
                 'name': 'Мебель для ванной',
                 'title': 'Мебель для ванной комнаты - функциональность и стиль',
@@ -163,8 +191,10 @@ class Command(BaseCommand):
             },
         ]
 
+    def create_sections(self):
+        """Create 6 sections with detailed descriptions"""
         sections = {}
-        for section_data in sections_data:
+        for section_data in self.get_sections_data():
             section, created = Section.objects.update_or_create(
                 name=section_data['name'],
                 defaults={
@@ -178,14 +208,14 @@ class Command(BaseCommand):
 
         return sections
 
-    def create_categories(self, sections, brands):
-        """Create categories for each section + brand combination
+    def get_categories_data(self):
+        """Desired category names for each (section, brand) pair
 
         ВАЖНО: Категории создаются ТОЛЬКО для тех брендов, у которых будут товары!
         Это предотвращает ситуацию где категория существует но без товаров.
         """
         # Определяем какие категории создавать для каждого section+brand
-        categories_data = {
+        return {
             # Мебель для ванной - ВСЕ бренды (у всех будут товары)
             ('Мебель для ванной', 'Lamis'): ['Мебель', 'Тумбы', 'Пеналы', 'Шкафы'],
             ('Мебель для ванной', 'Caizer'): ['Мебель', 'Тумбы', 'Пеналы', 'Шкафы'],
@@ -207,8 +237,10 @@ class Command(BaseCommand):
             ('Зеркала', 'Lamis'): ['Зеркала с подсветкой', 'Зеркала без подсветки', 'Зеркальные шкафы', 'Зеркала с полкой'],
         }
 
+    def create_categories(self, sections, brands):
+        """Create categories for each section + brand combination"""
         categories = []
-        for (section_name, brand_name), category_names in categories_data.items():
+        for (section_name, brand_name), category_names in self.get_categories_data().items():
             section = sections[section_name]
             brand = brands[brand_name]
 
@@ -227,9 +259,9 @@ class Command(BaseCommand):
 
         return categories
 
-    def create_collections(self, sections, brands, categories):
-        """Create 10 collections for 'Мебель для ванной' section across ALL categories"""
-        collections_data = [
+    def get_collection_names(self):
+        """Collection names created for every 'Мебель для ванной' category"""
+        return [
             'Akcent',
             'Omega',
             'Sanremo',
@@ -242,6 +274,9 @@ class Command(BaseCommand):
             'Lux',
         ]
 
+    def create_collections(self, sections, brands, categories):
+        """Create 10 collections for 'Мебель для ванной' section across ALL categories"""
+        collections_data = self.get_collection_names()
         section_furniture = sections['Мебель для ванной']
         collections = []
 
@@ -270,14 +305,14 @@ class Command(BaseCommand):
 
         return collections
 
-    def create_types(self, sections, brands, categories):
-        """Create types for ALL categories
+    def get_types_data(self):
+        """Desired type names per category name
 
         Типы - это способ монтажа/размера/установки для разных категорий товаров
         """
         # Определяем типы для каждой категории
         # Формат: 'Название категории': ['Тип1', 'Тип2', ...]
-        types_data = {
+        return {
             # САНФАРФОР
             'Унитазы': ['Напольный', 'Подвесной', 'Приставной', 'Унитаз-компакт'],
             'Раковины': ['Накладная', 'Встраиваемая', 'Подвесная', 'На пьедестале'],
@@ -307,10 +342,12 @@ class Command(BaseCommand):
             'Проточные': ['3-5 кВт', '5-7 кВт', '7+ кВт'],
         }
 
+    def create_types(self, sections, brands, categories):
+        """Create types for ALL categories"""
         types = []
 
         # Iterate through ALL categories in database
-        for category_name, type_names in types_data.items():
+        for category_name, type_names in self.get_types_data().items():
             # Find ALL categories with this name (may be multiple for different brands)
             matching_categories = Category.objects.filter(name=category_name)
 
@@ -334,17 +371,21 @@ class Command(BaseCommand):
 
         return types
 
-    def get_type_for_product(self, product_name, category):
+    def get_type_for_product(self, product_name, category, available_types=None):
         """
         Определить type по названию товара и категории
         Smart mapping: анализирует название товара для определения типа
         Возвращает Type object или None
+
+        available_types можно передать заранее (режим --sync), чтобы не
+        делать запрос к БД для каждого товара.
         """
         name_lower = product_name.lower()
         category_name = category.name
 
         # Получить все типы для этой категории
-        available_types = list(category.types.all())
+        if available_types is None:
+            available_types = list(category.types.all())
         if not available_types:
             return None
 
@@ -571,10 +612,9 @@ class Command(BaseCommand):
 
         return main_image, hover_image, additional
 
-    def create_products(self, sections, brands, categories, collections):
-        """Create 25-30 products with real image URLs from Cloudflare R2"""
-
-        products_data = [
+    def get_products_data(self):
+        """Desired products (25-30) with section/brand/category/collection names"""
+        return [
             # Мебель для ванной - Lamis
             {'name': 'Тумба Solo 60 подвесная с раковиной', 'section': 'Мебель для ванной', 'brand': 'Lamis', 'category': 'Тумбы', 'collection': 'Solo', 'price': 25990},
             {'name': 'Тумба Harmony 80 напольная белый глянец', 'section': 'Мебель для ванной', 'brand': 'Lamis', 'category': 'Тумбы', 'collection': 'Harmony', 'price': 32500},
@@ -618,15 +658,21 @@ class Command(BaseCommand):
             {'name': 'Тумба Palermo 70 напольная с ящиками', 'section': 'Мебель для ванной', 'brand': 'Lamis', 'category': 'Тумбы', 'collection': 'Palermo', 'price': 28900},
         ]
 
-        products = []
-        colors_options = [
+    def get_colors_options(self):
+        """Legacy `colors` JSON values picked at random for products"""
+        return [
             [{'name': 'Белый', 'hex': '#FFFFFF'}],
             [{'name': 'Хром', 'hex': '#C0C0C0'}],
             [{'name': 'Венге', 'hex': '#4A4A4A'}],
             [{'name': 'Белый глянец', 'hex': '#FAFAFA'}],
         ]
 
-        for idx, product_data in enumerate(products_data):
+    def create_products(self, sections, brands, categories, collections):
+        """Create 25-30 products with real image URLs from Cloudflare R2"""
+        products = []
+        colors_options = self.get_colors_options()
+
+        for idx, product_data in enumerate(self.get_products_data()):
             section = sections[product_data['section']]
             brand = brands[product_data['brand']]
 
@@ -707,17 +753,14 @@ class Command(BaseCommand):
 
         return products
 
-    def create_tutorials(self):
+    def get_tutorials_data(self):
         """
-        Create Tutorial Categories and Videos
+        Tutorial categories with nested videos
         Based on MOCK_TUTORIALS_DATA from frontend
         5 categories, 50 videos total
         """
-        tutorial_categories = []
-        tutorial_videos = []
-
         # Tutorial categories data (from MOCK_TUTORIALS_DATA)
-        categories_data = [
+        return [
             {
                 'title': 'Установка мебели',
                 'slug': 'furniture-installation',
@@ -810,8 +853,13 @@ class Command(BaseCommand):
             },
         ]
 
+    def create_tutorials(self):
+        """Create Tutorial Categories and Videos"""
+        tutorial_categories = []
+        tutorial_videos = []
+
         # Create categories and videos
-        for cat_data in categories_data:
+        for cat_data in self.get_tutorials_data():
             # Create category
             category, created = TutorialCategory.objects.update_or_create(
                 slug=cat_data['slug'],
@@ -839,3 +887,303 @@ class Command(BaseCommand):
                 tutorial_videos.append(video)
 
         return tutorial_categories, tutorial_videos
+
+    # ========================
+    # Incremental sync (--sync)
+    # ========================
+
+    def sync(self):
+        """
+        Привести БД к тестовому набору данных без --flush.
+
+        Для каждой модели желаемые строки сравниваются с существующими по
+        натуральному ключу и хэшу содержимого; затем выполняются только
+        bulk_create / bulk_update / delete для отличающихся строк.
+        Родительские таблицы синхронизируются раньше дочерних, а удаление
+        идёт в обратном порядке, чтобы каскады не задевали нужные строки.
+        """
+        started = time.monotonic()
+        stats = {}
+
+        with transaction.atomic():
+            brand_ids, stale = self._sync_rows(
+                Brand, ('name',),
+                {(b['name'],): {'description': b['description']} for b in self.get_brands_data()},
+                stats,
+                slug=lambda key: slugify(key[0]),
+            )
+            deletions = [stale]
+
+            section_ids, stale = self._sync_rows(
+                Section, ('name',),
+                {
+                    (s['name'],): {'title': s['title'], 'description': s['description']}
+                    for s in self.get_sections_data()
+                },
+                stats,
+                slug=lambda key: slugify(key[0]),
+            )
+            deletions.append(stale)
+
+            desired_categories = {}
+            for (section_name, brand_name), category_names in self.get_categories_data().items():
+                for category_name in category_names:
+                    key = (section_ids[(section_name,)], brand_ids[(brand_name,)], category_name)
+                    desired_categories[key] = {
+                        'description': f'{category_name} от производителя {brand_name}'
+                    }
+            category_ids, stale = self._sync_rows(
+                Category, ('section_id', 'brand_id', 'name'), desired_categories, stats,
+                slug=lambda key: slugify(key[2]),
+            )
+            deletions.append(stale)
+
+            # In-memory view of the synced categories, used instead of per-row queries
+            brand_names = {pk: name for (name,), pk in brand_ids.items()}
+            section_names = {pk: name for (name,), pk in section_ids.items()}
+            categories = {
+                pk: Category(id=pk, section_id=section_id, brand_id=brand_id, name=name)
+                for (section_id, brand_id, name), pk in category_ids.items()
+            }
+
+            furniture_id = section_ids[('Мебель для ванной',)]
+            desired_collections = {}
+            for category in categories.values():
+                if category.section_id != furniture_id:
+                    continue
+                brand_name = brand_names[category.brand_id]
+                for collection_name in self.get_collection_names():
+                    desired_collections[(category.brand_id, category.id, collection_name)] = {
+                        'description': f'Коллекция {collection_name} от {brand_name} для {category.name}'
+                    }
+            collection_ids, stale = self._sync_rows(
+                Collection, ('brand_id', 'category_id', 'name'), desired_collections, stats,
+                slug=lambda key: slugify(f"{brand_names[key[0]]}-{categories[key[1]].name}-{key[2]}"),
+            )
+            deletions.append(stale)
+
+            desired_types = {}
+            for category_name, type_names in self.get_types_data().items():
+                for category in categories.values():
+                    if category.name != category_name:
+                        continue
+                    for type_name in type_names:
+                        desired_types[(category.id, type_name)] = {
+                            'description': f'{type_name} {category_name.lower()}'
+                        }
+            type_ids, stale = self._sync_rows(
+                Type, ('category_id', 'name'), desired_types, stats,
+                slug=lambda key: slugify(f"{categories[key[0]].name}-{key[1]}"),
+            )
+            deletions.append(stale)
+
+            types_by_category = {}
+            for (category_id, name), pk in sorted(type_ids.items(), key=lambda item: item[0][1]):
+                types_by_category.setdefault(category_id, []).append(
+                    Type(id=pk, category_id=category_id, name=name)
+                )
+
+            desired_products = self._build_desired_products(
+                section_ids, brand_ids, category_ids, collection_ids, categories, types_by_category
+            )
+            taken_slugs = set(Product.objects.values_list('slug', flat=True))
+            _, stale = self._sync_rows(
+                Product, ('name', 'section_id', 'brand_id'), desired_products, stats,
+                slug=lambda key: self._unique_slug(key[0], taken_slugs),
+                touch_updated_at=True,
+            )
+            deletions.append(stale)
+
+            tutorials_data = self.get_tutorials_data()
+            tutorial_category_ids, stale = self._sync_rows(
+                TutorialCategory, ('slug',),
+                {
+                    (c['slug'],): {
+                        'title': c['title'],
+                        'banner_image_url': c['banner_image_url'],
+                        'order': c['order'],
+                        'is_active': True,
+                    }
+                    for c in tutorials_data
+                },
+                stats,
+                touch_updated_at=True,
+            )
+            deletions.append(stale)
+
+            desired_videos = {}
+            for c in tutorials_data:
+                category_id = tutorial_category_ids[(c['slug'],)]
+                for video in c['videos']:
+                    desired_videos[(category_id, video['title'])] = {
+                        'youtube_video_id': video['youtube_video_id'],
+                        'order': video['order'],
+                    }
+            _, stale = self._sync_rows(
+                TutorialVideo, ('category_id', 'title'), desired_videos, stats,
+                touch_updated_at=True,
+            )
+            deletions.append(stale)
+
+            # Children first, so CASCADE never reaches rows we want to keep
+            for queryset in reversed(deletions):
+                if queryset is not None:
+                    queryset.delete()
+
+            # bulk_create / bulk_update send no post_save
+            snapshot.bulk_changed()
+
+        elapsed = time.monotonic() - started
+        for model_name, (created, updated, deleted, unchanged) in stats.items():
+            line = f'  {model_name}: +{created} ~{updated} -{deleted} ={unchanged}'
+            if created or updated or deleted:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(f'✅ Синхронизация завершена за {elapsed:.3f} с'))
+
+    def _build_desired_products(self, section_ids, brand_ids, category_ids, collection_ids,
+                                categories, types_by_category):
+        """Resolve get_products_data() into DB-ready rows keyed by (name, section_id, brand_id)"""
+        colors_options = self.get_colors_options()
+        brand_names = {pk: name for (name,), pk in brand_ids.items()}
+        desired = {}
+
+        for product_data in self.get_products_data():
+            section_id = section_ids[(product_data['section'],)]
+            brand_id = brand_ids[(product_data['brand'],)]
+            category_id = category_ids.get((section_id, brand_id, product_data['category']))
+
+            if category_id is None:
+                self.stdout.write(self.style.WARNING(
+                    f'  ⚠ Category not found: {product_data["category"]} for {product_data["brand"]}'
+                ))
+                continue
+
+            # Коллекция той же категории, иначе любая коллекция бренда с этим именем в разделе
+            collection_id = None
+            collection_name = None
+            if product_data.get('collection'):
+                collection_id = collection_ids.get((brand_id, category_id, product_data['collection']))
+                if collection_id is None:
+                    candidates = sorted(
+                        pk for (c_brand_id, c_category_id, name), pk in collection_ids.items()
+                        if c_brand_id == brand_id and name == product_data['collection']
+                        and categories[c_category_id].section_id == section_id
+                    )
+                    collection_id = candidates[0] if candidates else None
+                collection_name = product_data['collection'] if collection_id else None
+
+            # Один и тот же товар всегда получает одни и те же "случайные" значения
+            random.seed(f'{SYNC_SEED}:{product_data["name"]}')
+
+            main_image, hover_image, additional_images = self.get_images_for_product(
+                product_data['name'],
+                collection_name,
+                product_data['brand']
+            )
+            colors = random.choice(colors_options)
+            is_new = random.random() < 0.3
+            is_on_sale = random.random() < 0.2
+            type_obj = self.get_type_for_product(
+                product_data['name'],
+                categories[category_id],
+                available_types=types_by_category.get(category_id, []),
+            )
+
+            desired[(product_data['name'], section_id, brand_id)] = {
+                'category_id': category_id,
+                'collection_id': collection_id,
+                'type_id': type_obj.id if type_obj else None,
+                'price': Decimal(str(product_data['price'])).quantize(Decimal('0.01')),
+                'main_image_url': main_image,
+                'hover_image_url': hover_image,
+                'images': additional_images,
+                'colors': colors,
+                'is_new': is_new,
+                'is_on_sale': is_on_sale,
+                'is_featured': brand_names[brand_id] == 'Caizer',
+                'description': f'{product_data["name"]} от производителя {brand_names[brand_id]}. Высокое качество и надежность.',
+            }
+
+        random.seed()
+        return desired
+
+    def _sync_rows(self, model, key_fields, desired, stats, slug=None, touch_updated_at=False):
+        """
+        Diff `desired` ({natural key: {field: value}}) against the table.
+
+        Returns ({natural key: pk} for all desired rows, queryset of rows to delete or None).
+        Deletion is left to the caller so that it can run children-first.
+        """
+        fields = sorted({field for values in desired.values() for field in values})
+        existing = {}
+        for row in model.objects.values('pk', *key_fields, *fields):
+            key = tuple(row[field] for field in key_fields)
+            existing[key] = (row['pk'], self._row_hash(row, fields))
+
+        to_create = []
+        to_update = []
+        unchanged = 0
+        now = timezone.now()
+
+        for key, values in desired.items():
+            if key not in existing:
+                obj = model(**dict(zip(key_fields, key)), **values)
+                if slug is not None:
+                    obj.slug = slug(key)
+                to_create.append(obj)
+                continue
+
+            pk, current_hash = existing[key]
+            if current_hash == self._row_hash(values, fields):
+                unchanged += 1
+                continue
+
+            obj = model(pk=pk, **values)
+            if touch_updated_at:
+                obj.updated_at = now
+            to_update.append(obj)
+
+        if to_create:
+            model.objects.bulk_create(to_create)
+        if to_update:
+            update_fields = fields + ['updated_at'] if touch_updated_at else fields
+            model.objects.bulk_update(to_update, update_fields)
+
+        stale_pks = [pk for key, (pk, _) in existing.items() if key not in desired]
+        stats[model._meta.verbose_name_plural] = (len(to_create), len(to_update), len(stale_pks), unchanged)
+
+        ids = {key: pk for key, (pk, _) in existing.items() if key in desired}
+        if to_create:
+            # bulk_create does not return pks on every backend, so re-read the keys
+            for row in model.objects.values('pk', *key_fields):
+                key = tuple(row[field] for field in key_fields)
+                if key in desired:
+                    ids[key] = row['pk']
+
+        stale = model.objects.filter(pk__in=stale_pks) if stale_pks else None
+        return ids, stale
+
+    @staticmethod
+    def _row_hash(values, fields):
+        """Stable content hash of the synced fields of a row"""
+        payload = json.dumps(
+            [values.get(field) for field in fields],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _unique_slug(name, taken_slugs):
+        """Same scheme as Product.save(), but checked against an in-memory set"""
+        base_slug = slugify(name)
+        slug = base_slug
+        counter = 1
+        while slug in taken_slugs:
+            slug = f"{base_slug}-{counter}"
+            counter += 1
+        taken_slugs.add(slug)
+        return slug
@@ -2,21 +2,48 @@
 """
 Management command to populate main_image_url and hover_image_url for all products
 Based on the naming scheme: {brand}-{collection}-{n}-main.webp / render.webp
+
+URLs are built by the media storage backend (MEDIA_STORAGE_BACKEND, see apps/uploads/storage.py),
+files are expected under images/catalog/ (upload them with `migrate_media --source-dir`).
+The catalog images live on R2, so the filesystem backend (the default) is refused:
+it would point every product at /media/. Pass --allow-filesystem to do that on purpose.
 """
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from apps.products.models import Product
+from apps.uploads.storage import get_storage
 from slugify import slugify
 
+CATALOG_PREFIX = 'images/catalog/'
+
 
 class Command(BaseCommand):
     help = 'Populate image URLs for all products based on R2 naming scheme'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Warn about images that are missing in storage'
+        )
+        parser.add_argument(
+            '--allow-filesystem',
+            action='store_true',
+            help='Write /media/ URLs with MEDIA_STORAGE_BACKEND=filesystem'
+        )
+
     def handle(self, *args, **options):
-        BASE_URL = "https://pub-abbe62b0e52d438ea38505b6a2c733d7.r2.dev/images/catalog/"
+        if settings.MEDIA_STORAGE_BACKEND == 'filesystem' and not options['allow_filesystem']:
+            raise CommandError(
+                'MEDIA_STORAGE_BACKEND is filesystem: every product would get a /media/ URL '
+                'instead of its R2 URL. Set MEDIA_STORAGE_BACKEND=s3 and S3_* '
+                '(see .env.example) or pass --allow-filesystem.'
+            )
+        storage = get_storage()
 
         self.stdout.write(self.style.SUCCESS('🖼️  Populating image URLs...'))
-        self.stdout.write(f'Base URL: {BASE_URL}\n')
+        self.stdout.write(f'Base URL: {storage.url(CATALOG_PREFIX)}\n')
 
         # Get all products ordered by brand, collection, and id
         products = Product.objects.select_related('brand', 'collection').all().order_by('brand', 'collection', 'id')
@@ -41,8 +68,15 @@ class Command(BaseCommand):
             n = collection_counters[key]
 
             # Construct image URLs
-            main_image_url = f"{BASE_URL}{brand_slug}-{collection_slug}-{n}-main.webp"
-            hover_image_url = f"{BASE_URL}{brand_slug}-{collection_slug}-{n}-render.webp"
+            main_name = f"{CATALOG_PREFIX}{brand_slug}-{collection_slug}-{n}-main.webp"
+            hover_name = f"{CATALOG_PREFIX}{brand_slug}-{collection_slug}-{n}-render.webp"
+            main_image_url = storage.url(main_name)
+            hover_image_url = storage.url(hover_name)
+
+            if options['check']:
+                for name in (main_name, hover_name):
+                    if not storage.exists(name):
+                        self.stdout.write(self.style.WARNING(f"⚠️  Missing in storage: {name}"))
 
             try:
                 product.main_image_url = main_image_url
@@ -75,8 +109,7 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.WARNING(
-                "\n⚠️  IMPORTANT: Make sure to upload the images to R2!\n"
-                f"   Images location: /Users/daniel/Desktop/Daniel_Projects/LAMIS/catalog-for-r2/\n"
-                f"   R2 destination: images/\n"
+                "\n⚠️  IMPORTANT: Make sure the images are uploaded to storage!\n"
+                f"   python manage.py migrate_media --source-dir <catalog-for-r2> --prefix {CATALOG_PREFIX}\n"
             )
         )
@@ -3,15 +3,40 @@
 Management command to prepare images for R2 upload
 Maps available images from r2-ready-images/ to products in database
 Copies and renames images following the naming scheme: {brand}-{collection}-{n}-main/render.webp
+
+Incremental:
+- source tree is scanned once into an index (brand/collection → images)
+- every output file is recorded in {output-dir}/.r2-manifest.json together with
+  the sha256 of its source; re-runs skip outputs whose source content is unchanged
+- source hashes are cached by (size, mtime), so unchanged files are not re-read
+- copying / WebP conversion runs in a thread pool (--workers)
 """
 
 from django.core.management.base import BaseCommand
 from apps.products.models import Product
 from slugify import slugify
+from PIL import Image
+import hashlib
+import json
 import os
 import shutil
 from pathlib import Path
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+IMAGE_EXTENSIONS = {'.webp', '.jpg', '.jpeg', '.png'}
+SKIP_MARKERS = ('readme', 'example', 'копия')
+KNOWN_BRANDS = ('Lamis', 'Caizer', 'Blesk')
+MANIFEST_NAME = '.r2-manifest.json'
+WEBP_QUALITY = 85
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 class Command(BaseCommand):
@@ -35,11 +60,18 @@ class Command(BaseCommand):
             action='store_true',
             help='Preview operations without copying files',
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(8, (os.cpu_count() or 1) + 4),
+            help='Number of threads for hashing and copying/converting images',
+        )
 
     def handle(self, *args, **options):
         source_dir = options['source_dir']
         output_dir = options['output_dir']
         dry_run = options['dry_run']
+        workers = max(1, options['workers'])
 
         self.stdout.write(self.style.SUCCESS('🖼️  Preparing images for R2 upload...\n'))
 
@@ -59,84 +91,44 @@ class Command(BaseCommand):
             self.stdout.write('   Please create this directory and add images to it.')
             return
 
-        # Build a mapping of images organized by brand/collection
-        # Key: (brand_name, collection_name), Value: list of image paths
-        images_by_brand_collection = defaultdict(list)
-
-        for ext in ['*.webp', '*.jpg', '*.jpeg', '*.png']:
-            for img_path in source_path.rglob(ext):
-                # Skip README, example, and backup files
-                if any(skip in img_path.stem.lower() for skip in ['readme', 'example', 'копия']):
-                    continue
-
-                # Try to determine brand and collection from path
-                parts = img_path.parts
-                brand_name = None
-                collection_name = None
-
-                # Look for brand in path (Lamis, Caizer, Blesk)
-                for part in parts:
-                    if part in ['Lamis', 'Caizer', 'Blesk']:
-                        brand_name = part
-                        break
-
-                # Collection is usually the subdirectory after brand
-                if brand_name:
-                    try:
-                        brand_idx = parts.index(brand_name)
-                        if brand_idx + 1 < len(parts) - 1:  # -1 because last is filename
-                            collection_name = parts[brand_idx + 1]
-                    except (ValueError, IndexError):
-                        pass
-
-                # If no collection from path, try from filename
-                if not collection_name:
-                    # Try to extract from filename (e.g., "DELUXE-Grey-800...")
-                    filename_lower = img_path.stem.lower()
-                    for word in img_path.stem.split('-'):
-                        if len(word) > 2:  # Avoid short words
-                            collection_name = word
-                            break
-
-                if brand_name:
-                    key = (brand_name.lower(), collection_name.lower() if collection_name else 'unknown')
-                    images_by_brand_collection[key].append(img_path)
-
-        # Also build a flat list for fallback matching
-        all_images = []
-        for ext in ['*.webp', '*.jpg', '*.jpeg', '*.png']:
-            for img_path in source_path.rglob(ext):
-                if any(skip in img_path.stem.lower() for skip in ['readme', 'example', 'копия']):
-                    continue
-                all_images.append(img_path)
+        all_images, images_by_brand_collection = self._scan_source(source_path)
 
         self.stdout.write(f'📁 Found {len(all_images)} images in {source_dir} (recursive)')
         self.stdout.write(f'📦 Organized into {len(images_by_brand_collection)} brand/collection groups\n')
 
+        # Collections of each brand, for the fuzzy fallback match
+        collections_by_brand = defaultdict(list)
+        for brand_key, coll_key in images_by_brand_collection:
+            collections_by_brand[brand_key].append(coll_key)
+
+        # One shared pool of unused images per group: popping from it replaces
+        # re-filtering the whole list against a `used` set for every product
+        unused_pools = {
+            key: deque(images) for key, images in images_by_brand_collection.items()
+        }
+
         # Statistics
         stats = {
             'products_processed': 0,
             'images_copied': 0,
+            'images_converted': 0,
             'images_missing': 0,
             'images_skipped': 0,
         }
 
-        # Track which images have been used
-        used_images = set()
-
         # Group products by brand and collection
-        products_by_brand_collection = {}
-        for product in Product.objects.select_related('brand', 'collection').all():
-            key = (product.brand.id, product.collection.id)
-            if key not in products_by_brand_collection:
-                products_by_brand_collection[key] = []
-            products_by_brand_collection[key].append(product)
+        products_by_brand_collection = defaultdict(list)
+        products = Product.objects.select_related('brand', 'collection').filter(
+            collection__isnull=False
+        ).order_by('brand_id', 'collection_id', 'id')
+        for product in products:
+            products_by_brand_collection[(product.brand_id, product.collection_id)].append(product)
 
-        # Process each brand+collection group
-        for (brand_id, collection_id), products in products_by_brand_collection.items():
-            if not products:
-                continue
+        # Planned outputs: destination filename → source path
+        jobs = {}
 
+        # Process each brand+collection group
+        for products in products_by_brand_collection.values():
             brand = products[0].brand
             collection = products[0].collection
             brand_slug = slugify(brand.name)
@@ -145,89 +137,51 @@ class Command(BaseCommand):
             self.stdout.write(f'\n📦 {brand.name} - {collection.name}')
             self.stdout.write(f'   Products: {len(products)}')
 
-            # Find available images for this brand/collection
-            lookup_key = (brand.name.lower(), collection.name.lower())
-            available_images = images_by_brand_collection.get(lookup_key, [])
-
-            # Fallback: try different collection name variations
-            if not available_images:
-                for key, imgs in images_by_brand_collection.items():
-                    brand_key, coll_key = key
-                    # Match if brand matches and collection name is similar
-                    if brand_key == brand.name.lower():
-                        if (collection.name.lower() in coll_key or
-                            coll_key in collection.name.lower() or
-                            collection_slug in coll_key or
-                            coll_key in collection_slug):
-                            available_images = imgs
-                            break
-
-            self.stdout.write(f'   Available images: {len(available_images)}')
+            pool = self._find_pool(
+                unused_pools, collections_by_brand, brand.name.lower(), collection.name.lower(), collection_slug
+            )
+            self.stdout.write(f'   Available images: {len(pool)}')
 
             # Process each product in this group
             for idx, product in enumerate(products, 1):
                 stats['products_processed'] += 1
 
-                # Expected filenames (as will be stored)
-                main_filename = f"{brand_slug}-{collection_slug}-{idx}-main"
-                render_filename = f"{brand_slug}-{collection_slug}-{idx}-render"
-
-                # Determine which source images to use
                 main_source = None
                 render_source = None
 
-                if available_images:
-                    # Use images sequentially from available pool
-                    unused_images = [img for img in available_images if img not in used_images]
-
-                    if unused_images:
-                        # Use first unused image as main
-                        main_source = unused_images[0]
-                        used_images.add(main_source)
-
-                        # Try to find a second image for render/hover
-                        if len(unused_images) > 1:
-                            # Look for images with similar names (might be different views)
-                            main_stem = main_source.stem.lower()
-                            for img in unused_images[1:]:
-                                # Simple heuristic: if names are very similar, likely same product
-                                if self._similarity_score(main_stem, img.stem.lower()) > 0.5:
-                                    render_source = img
-                                    used_images.add(render_source)
-                                    break
-
+                if pool:
+                    # Use first unused image as main
+                    main_source = pool.popleft()
+
+                    # Try to find a second image for render/hover
+                    if pool:
+                        # Look for images with similar names (might be different views)
+                        main_stem = main_source.stem.lower()
+                        for img in pool:
+                            # Simple heuristic: if names are very similar, likely same product
+                            if self._similarity_score(main_stem, img.stem.lower()) > 0.5:
+                                render_source = img
+                                break
+                        if render_source:
+                            pool.remove(render_source)
+                        else:
                             # If no similar image found, use the same image for both
-                            if not render_source:
-                                render_source = main_source
+                            render_source = main_source
 
-                # Copy images
-                dest_main = output_path / f"{main_filename}.webp"
-                dest_render = output_path / f"{render_filename}.webp"
+                main_filename = f"{brand_slug}-{collection_slug}-{idx}-main.webp"
+                render_filename = f"{brand_slug}-{collection_slug}-{idx}-render.webp"
 
                 if main_source:
-                    if dest_main.exists():
-                        self.stdout.write(f'   ⏩ Skipped: {dest_main.name} (already exists)')
-                        stats['images_skipped'] += 1
-                    else:
-                        if not dry_run:
-                            shutil.copy2(main_source, dest_main)
-                        self.stdout.write(f'   ✓ Main: {main_source.name} → {dest_main.name}')
-                        stats['images_copied'] += 1
+                    jobs[main_filename] = main_source
                 else:
                     self.stdout.write(f'   ⚠️  Missing main image for: {product.name}')
                     stats['images_missing'] += 1
 
                 if render_source and main_source:
-                    if dest_render.exists():
-                        stats['images_skipped'] += 1
-                    else:
-                        if not dry_run:
-                            shutil.copy2(render_source, dest_render)
-                        if render_source != main_source:
-                            self.stdout.write(f'   ✓ Hover: {render_source.name} → {dest_render.name}')
-                        else:
-                            self.stdout.write(f'   ℹ️  Hover: Using same as main')
-                        stats['images_copied'] += 1
+                    jobs[render_filename] = render_source
+
+        self.stdout.write(f'\n⚙️  Processing {len(jobs)} output files with {workers} workers...')
+        self._run_jobs(jobs, output_path, dry_run, workers, stats)
 
         # Print summary
         self.stdout.write('\n' + '=' * 80)
@@ -235,7 +189,8 @@ class Command(BaseCommand):
         self.stdout.write(f'\n📊 Statistics:')
         self.stdout.write(f'   Products processed: {stats["products_processed"]}')
         self.stdout.write(f'   Images copied: {stats["images_copied"]}')
-        self.stdout.write(f'   Images skipped (already exist): {stats["images_skipped"]}')
+        self.stdout.write(f'   Images converted to WebP: {stats["images_converted"]}')
+        self.stdout.write(f'   Images skipped (unchanged): {stats["images_skipped"]}')
         self.stdout.write(f'   Images missing: {stats["images_missing"]}')
 
         if not dry_run:
@@ -247,6 +202,171 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING('\n💡 This was a dry run. Run without --dry-run to copy files.\n'))
 
+    def _scan_source(self, source_path):
+        """
+        Walk the source tree once.
+
+        Returns (all images sorted by path, {(brand, collection): [images]}).
+        """
+        all_images = []
+        images_by_brand_collection = defaultdict(list)
+
+        for root, _dirs, files in os.walk(source_path):
+            for filename in files:
+                img_path = Path(root) / filename
+                if img_path.suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                # Skip README, example, and backup files
+                if any(skip in img_path.stem.lower() for skip in SKIP_MARKERS):
+                    continue
+                all_images.append(img_path)
+
+        all_images.sort()
+
+        for img_path in all_images:
+            # Try to determine brand and collection from path
+            parts = img_path.parts
+            brand_name = None
+            collection_name = None
+
+            # Look for brand in path (Lamis, Caizer, Blesk)
+            for brand_idx, part in enumerate(parts):
+                if part in KNOWN_BRANDS:
+                    brand_name = part
+                    # Collection is usually the subdirectory after brand
+                    if brand_idx + 1 < len(parts) - 1:  # -1 because last is filename
+                        collection_name = parts[brand_idx + 1]
+                    break
+
+            # If no collection from path, try from filename (e.g., "DELUXE-Grey-800...")
+            if not collection_name:
+                for word in img_path.stem.split('-'):
+                    if len(word) > 2:  # Avoid short words
+                        collection_name = word
+                        break
+
+            if brand_name:
+                key = (brand_name.lower(), collection_name.lower() if collection_name else 'unknown')
+                images_by_brand_collection[key].append(img_path)
+
+        return all_images, images_by_brand_collection
+
+    def _find_pool(self, unused_pools, collections_by_brand, brand_key, collection_key, collection_slug):
+        """Exact (brand, collection) pool, else the first similarly named collection of the brand"""
+        pool = unused_pools.get((brand_key, collection_key))
+        if pool is not None:
+            return pool
+
+        # Fallback: try different collection name variations
+        for coll_key in collections_by_brand.get(brand_key, ()):
+            if (collection_key in coll_key or
+                    coll_key in collection_key or
+                    collection_slug in coll_key or
+                    coll_key in collection_slug):
+                return unused_pools[(brand_key, coll_key)]
+
+        return deque()
+
+    def _run_jobs(self, jobs, output_path, dry_run, workers, stats):
+        """Hash sources, then copy/convert only outputs whose source content changed"""
+        manifest_path = output_path / MANIFEST_NAME
+        manifest = {'sources': {}, 'outputs': {}}
+        if manifest_path.exists():
+            try:
+                manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self.stdout.write(self.style.WARNING(f'   ⚠️  Unreadable {MANIFEST_NAME}, rebuilding it'))
+
+        source_cache = manifest.setdefault('sources', {})
+        outputs = manifest.setdefault('outputs', {})
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # 1. Content hashes of all distinct sources (cached by size + mtime)
+            source_hashes = {}
+            to_hash = []
+            for source in set(jobs.values()):
+                stat = source.stat()
+                cached = source_cache.get(str(source))
+                if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+                    source_hashes[source] = cached['sha256']
+                else:
+                    to_hash.append((source, stat))
+
+            futures = {executor.submit(_sha256, source): (source, stat) for source, stat in to_hash}
+            for future in as_completed(futures):
+                source, stat = futures[future]
+                source_hashes[source] = future.result()
+                source_cache[str(source)] = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'sha256': source_hashes[source],
+                }
+
+            # 2. Copy / convert outputs whose source changed
+            futures = {}
+            for dest_name, source in sorted(jobs.items()):
+                dest = output_path / dest_name
+                source_hash = source_hashes[source]
+                recorded = outputs.get(dest_name)
+                if dest.exists() and recorded and recorded['source_sha256'] == source_hash:
+                    stats['images_skipped'] += 1
+                    continue
+
+                if dry_run:
+                    convert = source.suffix.lower() != '.webp'
+                    stats['images_converted' if convert else 'images_copied'] += 1
+                    self.stdout.write(f'   ✓ {source.name} → {dest_name}{" (WebP)" if convert else ""}')
+                    continue
+
+                futures[executor.submit(self._write_output, source, dest, source_hash)] = (dest_name, source)
+
+            for future in as_completed(futures):
+                dest_name, source = futures[future]
+                try:
+                    result = future.result()
+                except (OSError, Image.UnidentifiedImageError) as e:
+                    self.stdout.write(self.style.ERROR(f'   ❌ {source.name} → {dest_name}: {e}'))
+                    stats['images_missing'] += 1
+                    continue
+
+                if result == 'skipped':
+                    stats['images_skipped'] += 1
+                elif result == 'converted':
+                    stats['images_converted'] += 1
+                    self.stdout.write(f'   ✓ {source.name} → {dest_name} (WebP)')
+                else:
+                    stats['images_copied'] += 1
+                    self.stdout.write(f'   ✓ {source.name} → {dest_name}')
+                outputs[dest_name] = {'source': str(source), 'source_sha256': source_hashes[source]}
+
+        if not dry_run:
+            tmp_path = manifest_path.with_suffix('.tmp')
+            tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding='utf-8')
+            os.replace(tmp_path, manifest_path)
+
+    @staticmethod
+    def _write_output(source, dest, source_hash):
+        """
+        Runs in a worker thread. WebP sources are copied as is, other formats are
+        re-encoded to WebP. Writes go to a temp file and are renamed into place.
+        """
+        is_webp = source.suffix.lower() == '.webp'
+
+        # Output from an older run without a manifest: keep it if it is byte-identical
+        if is_webp and dest.exists() and _sha256(dest) == source_hash:
+            return 'skipped'
+
+        tmp_dest = dest.with_name(f'.{dest.name}.tmp')
+        if is_webp:
+            shutil.copy2(source, tmp_dest)
+        else:
+            with Image.open(source) as img:
+                if img.mode not in ('RGB', 'RGBA'):
+                    img = img.convert('RGBA' if 'transparency' in img.info else 'RGB')
+                img.save(tmp_dest, 'WEBP', quality=WEBP_QUALITY, method=4)
+        os.replace(tmp_dest, dest)
+        return 'copied' if is_webp else 'converted'
+
     def _similarity_score(self, str1, str2):
         """Calculate simple similarity score between two strings"""
         # Remove common parts
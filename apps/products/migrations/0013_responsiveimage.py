@@ -0,0 +1,31 @@
+# Generated by Django 4.2 on 2026-10-19 00:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0012_alter_product_options_alter_material_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponsiveImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_url', models.CharField(max_length=500, unique=True, verbose_name='Исходный URL')),
+                ('width', models.PositiveIntegerField(verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(verbose_name='Высота')),
+                ('placeholder', models.TextField(blank=True, default='', help_text='data: URI размытой миниатюры (LQIP)', verbose_name='Плейсхолдер')),
+                ('variants', models.JSONField(blank=True, default=list, verbose_name='Варианты')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Адаптивное изображение',
+                'verbose_name_plural': 'Адаптивные изображения',
+                'db_table': 'responsive_images',
+            },
+        ),
+    ]
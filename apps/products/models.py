@@ -348,14 +348,21 @@ class Product(models.Model):
     def generate_color_group_id(cls):
         return uuid.uuid4()
 
+    def _get_gallery_image(self, image_type):
+        # Use prefetch_related('gallery_images') when available instead of a query per product
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('gallery_images')
+        if prefetched is not None:
+            return next((image for image in prefetched if image.image_type == image_type), None)
+        return self.gallery_images.filter(image_type=image_type).first()
+
     def get_main_image(self):
-        image = self.gallery_images.filter(image_type='main').first()
+        image = self._get_gallery_image('main')
         if image:
             return image.image_url
         return self.main_image_url
 
     def get_hover_image(self):
-        image = self.gallery_images.filter(image_type='hover').first()
+        image = self._get_gallery_image('hover')
         if image:
             return image.image_url
         return self.hover_image_url
@@ -433,6 +440,48 @@ class ProductImage(models.Model):
         return self.image_type == 'hover'
 
 
+class ResponsiveImage(models.Model):
+    """
+    Реестр адаптивных вариантов изображения.
+
+    Ключ - исходный URL (ProductImage.image_url, Product.main_image_url,
+    Collection.image). Хранит размеры оригинала, маленький плейсхолдер (LQIP)
+    и список производных файлов по ширинам:
+    [{"width": 320, "height": 213, "format": "webp", "url": "..."}, ...]
+    """
+    source_url = models.CharField(
+        max_length=500,
+        unique=True,
+        verbose_name="Исходный URL"
+    )
+    width = models.PositiveIntegerField(verbose_name="Ширина")
+    height = models.PositiveIntegerField(verbose_name="Высота")
+    placeholder = models.TextField(
+        blank=True,
+        default='',
+        verbose_name="Плейсхолдер",
+        help_text="data: URI размытой миниатюры (LQIP)"
+    )
+    variants = models.JSONField(default=list, blank=True, verbose_name="Варианты")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'responsive_images'
+        verbose_name = 'Адаптивное изображение'
+        verbose_name_plural = 'Адаптивные изображения'
+
+    def __str__(self):
+        return self.source_url
+
+    def get_srcset(self, image_format='webp'):
+        return ', '.join(
+            f"{variant['url']} {variant['width']}w"
+            for variant in sorted(self.variants, key=lambda v: v['width'])
+            if variant['format'] == image_format
+        )
+
+
 class TutorialCategory(models.Model):
     title = models.CharField(
         max_length=200,
@@ -12,45 +12,33 @@ from django.db.models import Q, Case, When, IntegerField
 from apps.products.models import Section, Brand, Category, Collection, Type, Product
 from apps.products.serializers import SearchResultSerializer
 
+SEARCH_MIN_LENGTH = 2
 
-class SearchViewSet(viewsets.ViewSet):
-    """
-    ViewSet for unified search across all product-related models
-
-    Endpoint:
-    GET /api/v1/search/?q=omega
 
-    Returns unified search results from:
-    - Products
-    - Collections
-    - Categories
-    - Brands
+class SearchMixin:
+    """
+    Search queries and result formatting shared by SearchViewSet
+    and the async AsyncSearchView (apps/products/async_views.py)
     """
-    permission_classes = [AllowAny]
 
-    def list(self, request):
-        """
-        GET /api/v1/search/?q=query&limit=5
-
-        Search across all models and return unified results
-        Optional limit parameter to restrict number of results
-        """
-        query = request.query_params.get('q', '').strip()
-        limit = request.query_params.get('limit', None)
+    def parse_search_params(self, params):
+        """(query, limit, empty_response): empty_response is set when there is nothing to search"""
+        query = params.get('q', '').strip()
+        limit = params.get('limit', None)
 
         if not query:
-            return Response({
+            return query, None, {
                 'results': [],
                 'total': 0,
                 'message': 'Please provide a search query using ?q=your_query'
-            })
+            }
 
-        if len(query) < 2:
-            return Response({
+        if len(query) < SEARCH_MIN_LENGTH:
+            return query, None, {
                 'results': [],
                 'total': 0,
                 'message': 'Search query must be at least 2 characters'
-            })
+            }
 
         # Parse limit parameter
         try:
@@ -58,25 +46,18 @@ class SearchViewSet(viewsets.ViewSet):
         except ValueError:
             limit = None
 
-        # Collect all results
-        results = []
-
-        # 1. Search Collections
-        collections = self._search_collections(query)
-        results.extend(collections)
-
-        # 2. Search Products
-        products = self._search_products(query)
-        results.extend(products)
+        return query, limit, None
 
-        # 3. Search Categories
-        categories = self._search_categories(query)
-        results.extend(categories)
-
-        # 4. Search Brands
-        brands = self._search_brands(query)
-        results.extend(brands)
+    def search_sources(self, query):
+        """[(queryset, to_result)] in the order of the results: collections, products, categories, brands"""
+        return [
+            (self._collections_queryset(query), self._collection_result),
+            (self._products_queryset(query), self._product_result),
+            (self._categories_queryset(query), self._category_result),
+            (self._brands_queryset(query), self._brand_result),
+        ]
 
+    def search_response(self, results, limit):
         # Apply limit if specified
         if limit and limit > 0:
             results = results[:limit]
@@ -84,15 +65,15 @@ class SearchViewSet(viewsets.ViewSet):
         # Serialize results
         serializer = SearchResultSerializer(results, many=True)
 
-        return Response({
+        return {
             'results': serializer.data,
             'total': len(serializer.data)
-        })
+        }
 
-    def _search_collections(self, query):
-        """Search in Collections with priority ordering"""
+    def _prioritized(self, queryset, query):
+        """Priority ordering: exact match, starts with, contains"""
         # Use iregex for case-insensitive search with Cyrillic support
-        collections = Collection.objects.select_related('brand', 'category', 'category__section').annotate(
+        return queryset.annotate(
             priority=Case(
                 When(name__iexact=query, then=1),  # Exact match
                 When(name__istartswith=query, then=2),  # Starts with
@@ -104,137 +85,133 @@ class SearchViewSet(viewsets.ViewSet):
             Q(name__iregex=r'.*' + query + r'.*') | Q(description__iregex=r'.*' + query + r'.*')
         ).order_by('priority', 'name')[:10]
 
-        results = []
-        for collection in collections:
-            # Breadcrumb: "Section > Brand > Collection"
-            breadcrumb = f"{collection.category.section.name} > {collection.brand.name} > {collection.name}"
-
-            results.append({
-                'id': collection.id,
-                'name': collection.name,
-                'type': 'collection',
-                'breadcrumb': breadcrumb,
-                'section_id': collection.category.section.id,
-                'brand_id': collection.brand.id,
-                'category_id': collection.category.id,
-                'collection_id': collection.id,
-                'type_id': None,
-                'slug': collection.slug,
-                'image': collection.image if collection.image else None
-            })
-
-        return results
-
-    def _search_products(self, query):
+    def _collections_queryset(self, query):
+        """Search in Collections with priority ordering"""
+        return self._prioritized(
+            Collection.objects.select_related('brand', 'category', 'category__section'), query
+        )
+
+    def _collection_result(self, collection):
+        # Breadcrumb: "Section > Brand > Collection"
+        breadcrumb = f"{collection.category.section.name} > {collection.brand.name} > {collection.name}"
+
+        return {
+            'id': collection.id,
+            'name': collection.name,
+            'type': 'collection',
+            'breadcrumb': breadcrumb,
+            'section_id': collection.category.section.id,
+            'brand_id': collection.brand.id,
+            'category_id': collection.category.id,
+            'collection_id': collection.id,
+            'type_id': None,
+            'slug': collection.slug,
+            'image': collection.image if collection.image else None
+        }
+
+    def _products_queryset(self, query):
         """Search in Products with priority ordering"""
-        # Use iregex for case-insensitive search with Cyrillic support
-        products = Product.objects.select_related(
-            'section', 'brand', 'category', 'collection', 'type'
-        ).annotate(
-            priority=Case(
-                When(name__iexact=query, then=1),  # Exact match
-                When(name__istartswith=query, then=2),  # Starts with
-                When(name__iregex=r'.*' + query + r'.*', then=3),  # Contains (regex)
-                default=4,
-                output_field=IntegerField()
-            )
-        ).filter(
-            Q(name__iregex=r'.*' + query + r'.*') | Q(description__iregex=r'.*' + query + r'.*')
-        ).order_by('priority', 'name')[:10]
-
-        results = []
-        for product in products:
-            # Breadcrumb: "Section > Category > Product"
-            # or "Section > Category > Collection > Product" if collection exists
-            if product.collection:
-                breadcrumb = f"{product.section.name} > {product.category.name} > {product.collection.name} > {product.name}"
-            else:
-                breadcrumb = f"{product.section.name} > {product.category.name} > {product.name}"
-
-            results.append({
-                'id': product.id,
-                'name': product.name,
-                'type': 'product',
-                'breadcrumb': breadcrumb,
-                'section_id': product.section.id,
-                'brand_id': product.brand.id,
-                'category_id': product.category.id,
-                'collection_id': product.collection.id if product.collection else None,
-                'type_id': product.type.id if product.type else None,
-                'slug': product.slug,
-                'image': product.main_image_url
-            })
-
-        return results
-
-    def _search_categories(self, query):
+        return self._prioritized(
+            Product.objects.select_related('section', 'brand', 'category', 'collection', 'type'), query
+        )
+
+    def _product_result(self, product):
+        # Breadcrumb: "Section > Category > Product"
+        # or "Section > Category > Collection > Product" if collection exists
+        if product.collection:
+            breadcrumb = f"{product.section.name} > {product.category.name} > {product.collection.name} > {product.name}"
+        else:
+            breadcrumb = f"{product.section.name} > {product.category.name} > {product.name}"
+
+        return {
+            'id': product.id,
+            'name': product.name,
+            'type': 'product',
+            'breadcrumb': breadcrumb,
+            'section_id': product.section.id,
+            'brand_id': product.brand.id,
+            'category_id': product.category.id,
+            'collection_id': product.collection.id if product.collection else None,
+            'type_id': product.type.id if product.type else None,
+            'slug': product.slug,
+            'image': product.main_image_url
+        }
+
+    def _categories_queryset(self, query):
         """Search in Categories with priority ordering"""
-        # Use iregex for case-insensitive search with Cyrillic support
-        categories = Category.objects.select_related('section', 'brand').annotate(
-            priority=Case(
-                When(name__iexact=query, then=1),  # Exact match
-                When(name__istartswith=query, then=2),  # Starts with
-                When(name__iregex=r'.*' + query + r'.*', then=3),  # Contains (regex)
-                default=4,
-                output_field=IntegerField()
-            )
-        ).filter(
-            Q(name__iregex=r'.*' + query + r'.*') | Q(description__iregex=r'.*' + query + r'.*')
-        ).order_by('priority', 'name')[:10]
-
-        results = []
-        for category in categories:
-            # Breadcrumb: "Section > Brand > Category"
-            breadcrumb = f"{category.section.name} > {category.brand.name} > {category.name}"
-
-            results.append({
-                'id': category.id,
-                'name': category.name,
-                'type': 'category',
-                'breadcrumb': breadcrumb,
-                'section_id': category.section.id,
-                'brand_id': category.brand.id,
-                'category_id': category.id,
-                'collection_id': None,
-                'type_id': None,
-                'slug': category.slug,
-                'image': None
-            })
-
-        return results
-
-    def _search_brands(self, query):
+        return self._prioritized(Category.objects.select_related('section', 'brand'), query)
+
+    def _category_result(self, category):
+        # Breadcrumb: "Section > Brand > Category"
+        breadcrumb = f"{category.section.name} > {category.brand.name} > {category.name}"
+
+        return {
+            'id': category.id,
+            'name': category.name,
+            'type': 'category',
+            'breadcrumb': breadcrumb,
+            'section_id': category.section.id,
+            'brand_id': category.brand.id,
+            'category_id': category.id,
+            'collection_id': None,
+            'type_id': None,
+            'slug': category.slug,
+            'image': None
+        }
+
+    def _brands_queryset(self, query):
         """Search in Brands with priority ordering"""
-        # Use iregex for case-insensitive search with Cyrillic support
-        brands = Brand.objects.annotate(
-            priority=Case(
-                When(name__iexact=query, then=1),  # Exact match
-                When(name__istartswith=query, then=2),  # Starts with
-                When(name__iregex=r'.*' + query + r'.*', then=3),  # Contains (regex)
-                default=4,
-                output_field=IntegerField()
-            )
-        ).filter(
-            Q(name__iregex=r'.*' + query + r'.*') | Q(description__iregex=r'.*' + query + r'.*')
-        ).order_by('priority', 'name')[:10]
+        return self._prioritized(Brand.objects.all(), query)
+
+    def _brand_result(self, brand):
+        # Breadcrumb: "Бренды > Brand Name"
+        breadcrumb = f"Бренды > {brand.name}"
+
+        return {
+            'id': brand.id,
+            'name': brand.name,
+            'type': 'brand',
+            'breadcrumb': breadcrumb,
+            'section_id': None,
+            'brand_id': brand.id,
+            'category_id': None,
+            'collection_id': None,
+            'type_id': None,
+            'slug': brand.slug,
+            'image': brand.image if brand.image else None
+        }
+
+
+class SearchViewSet(SearchMixin, viewsets.ViewSet):
+    """
+    ViewSet for unified search across all product-related models
+
+    Endpoint:
+    GET /api/v1/search/?q=omega
 
+    Returns unified search results from:
+    - Products
+    - Collections
+    - Categories
+    - Brands
+    """
+    permission_classes = [AllowAny]
+    use_read_replica = True
+
+    def list(self, request):
+        """
+        GET /api/v1/search/?q=query&limit=5
+
+        Search across all models and return unified results
+        Optional limit parameter to restrict number of results
+        """
+        query, limit, empty_response = self.parse_search_params(request.query_params)
+        if empty_response is not None:
+            return Response(empty_response)
+
+        # Collect all results: collections, products, categories, brands
         results = []
-        for brand in brands:
-            # Breadcrumb: "Бренды > Brand Name"
-            breadcrumb = f"Бренды > {brand.name}"
-
-            results.append({
-                'id': brand.id,
-                'name': brand.name,
-                'type': 'brand',
-                'breadcrumb': breadcrumb,
-                'section_id': None,
-                'brand_id': brand.id,
-                'category_id': None,
-                'collection_id': None,
-                'type_id': None,
-                'slug': brand.slug,
-                'image': brand.image if brand.image else None
-            })
-
-        return results
+        for queryset, to_result in self.search_sources(query):
+            results.extend(to_result(obj) for obj in queryset)
+
+        return Response(self.search_response(results, limit))
@@ -4,7 +4,70 @@ DRF Serializers for Products App
 
 from rest_framework import serializers
 from apps.products import models
-from apps.products.models import Section, Brand, Category, Collection, Type, Product, TutorialCategory, TutorialVideo, Color, ProductImage
+from apps.products.models import Section, Brand, Category, Collection, Type, Product, TutorialCategory, TutorialVideo, Color, ProductImage, ResponsiveImage
+
+
+def load_responsive_images(context, urls):
+    """
+    Загружает записи ResponsiveImage для `urls` одним запросом и кэширует их
+    в context['responsive_images'] ({url: ResponsiveImage | None}).
+    """
+    cache = context.setdefault('responsive_images', {})
+    missing = {url for url in urls if url and url not in cache}
+    if missing:
+        found = {
+            image.source_url: image
+            for image in ResponsiveImage.objects.filter(source_url__in=missing)
+        }
+        for url in missing:
+            cache[url] = found.get(url)
+    return cache
+
+
+class ResponsiveImageListSerializer(serializers.ListSerializer):
+    """Предзагружает адаптивные изображения сразу для всей страницы (без N+1)"""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        load_responsive_images(
+            self.context,
+            [url for item in items for url in self.child.get_image_urls(item)]
+        )
+        return super().to_representation(items)
+
+
+class ResponsiveImageMixin:
+    """
+    Данные для <img srcset> из реестра ResponsiveImage:
+    {
+        "url": "https://...",
+        "srcset": "https://...-320w.webp 320w, https://...-640w.webp 640w",
+        "width": 1920,
+        "height": 1280,
+        "placeholder": "data:image/webp;base64,..."
+    }
+    Для изображений без записи в реестре srcset/width/height/placeholder = null.
+    """
+
+    def get_image_urls(self, obj):
+        """URL изображений объекта, которые нужно предзагрузить"""
+        return []
+
+    def to_representation(self, instance):
+        load_responsive_images(self.context, self.get_image_urls(instance))
+        return super().to_representation(instance)
+
+    def get_responsive_image(self, url):
+        if not url:
+            return None
+        image = load_responsive_images(self.context, [url]).get(url)
+        return {
+            'url': url,
+            'srcset': image.get_srcset() if image else None,
+            'width': image.width if image else None,
+            'height': image.height if image else None,
+            'placeholder': (image.placeholder or None) if image else None,
+        }
 
 
 class SectionSerializer(serializers.ModelSerializer):
@@ -83,7 +146,7 @@ class ColorVariationSerializer(serializers.ModelSerializer):
         return obj.get_main_image()
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductImageSerializer(ResponsiveImageMixin, serializers.ModelSerializer):
     """
     Serializer for ProductImage model (галерея изображений продукта)
 
@@ -96,21 +159,46 @@ class ProductImageSerializer(serializers.ModelSerializer):
         "is_main": true,
         "is_hover": false,
         "sort_order": 0,
-        "alt_text": "Унитаз Model X вид спереди"
+        "alt_text": "Унитаз Model X вид спереди",
+        "srcset": "https://...-320w.webp 320w, ...",
+        "width": 1920,
+        "height": 1280,
+        "placeholder": "data:image/webp;base64,..."
     }
     """
     image_type_display = serializers.CharField(source='get_image_type_display', read_only=True)
     is_main = serializers.BooleanField(read_only=True)
     is_hover = serializers.BooleanField(read_only=True)
+    srcset = serializers.SerializerMethodField()
+    width = serializers.SerializerMethodField()
+    height = serializers.SerializerMethodField()
+    placeholder = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
+        list_serializer_class = ResponsiveImageListSerializer
         fields = [
             'id', 'image_url', 'image_type', 'image_type_display',
-            'is_main', 'is_hover', 'sort_order', 'alt_text'
+            'is_main', 'is_hover', 'sort_order', 'alt_text',
+            'srcset', 'width', 'height', 'placeholder'
         ]
         read_only_fields = ['id', 'image_type_display', 'is_main', 'is_hover']
 
+    def get_image_urls(self, obj):
+        return [obj.image_url]
+
+    def get_srcset(self, obj):
+        return self.get_responsive_image(obj.image_url)['srcset']
+
+    def get_width(self, obj):
+        return self.get_responsive_image(obj.image_url)['width']
+
+    def get_height(self, obj):
+        return self.get_responsive_image(obj.image_url)['height']
+
+    def get_placeholder(self, obj):
+        return self.get_responsive_image(obj.image_url)['placeholder']
+
 
 class ProductImageCreateSerializer(serializers.ModelSerializer):
     """
@@ -139,7 +227,7 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at']
 
 
-class CollectionSerializer(serializers.ModelSerializer):
+class CollectionSerializer(ResponsiveImageMixin, serializers.ModelSerializer):
     """
     Serializer for Collection model
     НОВАЯ АРХИТЕКТУРА: Collection привязана к Brand + Category
@@ -148,16 +236,25 @@ class CollectionSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     section = serializers.IntegerField(source='category.section.id', read_only=True)
     section_name = serializers.CharField(source='category.section.name', read_only=True)
+    image_details = serializers.SerializerMethodField()
 
     class Meta:
         model = Collection
+        list_serializer_class = ResponsiveImageListSerializer
         fields = [
             'id', 'name', 'slug', 'brand', 'brand_name',
             'category', 'category_name', 'section', 'section_name',
-            'image', 'description', 'created_at'
+            'image', 'image_details', 'description', 'created_at'
         ]
         read_only_fields = ['id', 'slug', 'created_at']
 
+    def get_image_urls(self, obj):
+        return [obj.image]
+
+    def get_image_details(self, obj):
+        """srcset/width/height/placeholder для изображения коллекции"""
+        return self.get_responsive_image(obj.image)
+
 
 class TypeSerializer(serializers.ModelSerializer):
     """
@@ -175,7 +272,7 @@ class TypeSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'slug', 'created_at']
 
 
-class ProductListSerializer(serializers.ModelSerializer):
+class ProductListSerializer(ResponsiveImageMixin, serializers.ModelSerializer):
     """
     Lightweight serializer for Product list views
     Used in catalog listings with pagination
@@ -195,9 +292,12 @@ class ProductListSerializer(serializers.ModelSerializer):
     # Изображения из новой галереи
     main_image_url = serializers.SerializerMethodField()
     hover_image_url = serializers.SerializerMethodField()
+    main_image = serializers.SerializerMethodField()
+    hover_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
+        list_serializer_class = ResponsiveImageListSerializer
         fields = [
             'id', 'name', 'slug', 'price',
             'section', 'section_name',
@@ -206,6 +306,7 @@ class ProductListSerializer(serializers.ModelSerializer):
             'collection', 'collection_name',
             'type', 'type_name',
             'main_image_url', 'hover_image_url',
+            'main_image', 'hover_image',
             'color', 'color_group', 'has_variations', 'available_colors',
             'colors',  # deprecated, kept for backward compatibility
             'is_new', 'is_on_sale',
@@ -221,6 +322,17 @@ class ProductListSerializer(serializers.ModelSerializer):
         """Получить hover изображение из галереи или fallback на старое поле"""
         return obj.get_hover_image()
 
+    def get_image_urls(self, obj):
+        return [obj.get_main_image(), obj.get_hover_image()]
+
+    def get_main_image(self, obj):
+        """Главное изображение с srcset/width/height/placeholder"""
+        return self.get_responsive_image(obj.get_main_image())
+
+    def get_hover_image(self, obj):
+        """Hover изображение с srcset/width/height/placeholder"""
+        return self.get_responsive_image(obj.get_hover_image())
+
     def get_has_variations(self, obj):
         """Проверяет, есть ли у продукта цветовые вариации"""
         if not obj.color_group:
@@ -259,7 +371,7 @@ class ProductListSerializer(serializers.ModelSerializer):
         return ColorSerializer(colors, many=True).data
 
 
-class ProductDetailSerializer(serializers.ModelSerializer):
+class ProductDetailSerializer(ResponsiveImageMixin, serializers.ModelSerializer):
     """
     Full serializer for Product detail views
     Includes all product information, gallery and color variations
@@ -279,6 +391,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     main_image_url = serializers.SerializerMethodField()
     hover_image_url = serializers.SerializerMethodField()
     gallery = serializers.SerializerMethodField()
+    main_image = serializers.SerializerMethodField()
+    hover_image = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -290,6 +404,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'collection', 'collection_name',
             'type', 'type_name',
             'main_image_url', 'hover_image_url', 'gallery',
+            'main_image', 'hover_image',
             'images',  # deprecated, kept for backward compatibility
             'color', 'color_group', 'color_variations',
             'colors',  # deprecated, kept for backward compatibility
@@ -308,6 +423,18 @@ class ProductDetailSerializer(serializers.ModelSerializer):
         """Получить hover изображение из галереи или fallback на старое поле"""
         return obj.get_hover_image()
 
+    def get_image_urls(self, obj):
+        # Галерея загружает свои изображения сама (ProductImageSerializer, many=True)
+        return [obj.get_main_image(), obj.get_hover_image()]
+
+    def get_main_image(self, obj):
+        """Главное изображение с srcset/width/height/placeholder"""
+        return self.get_responsive_image(obj.get_main_image())
+
+    def get_hover_image(self, obj):
+        """Hover изображение с srcset/width/height/placeholder"""
+        return self.get_responsive_image(obj.get_hover_image())
+
     def get_gallery(self, obj):
         """
         Возвращает полный отсортированный список всех изображений продукта.
@@ -316,7 +443,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             list: Список изображений с указанием типа (main/hover/gallery)
         """
         images = obj.get_gallery_images()
-        return ProductImageSerializer(images, many=True).data
+        return ProductImageSerializer(images, many=True, context=self.context).data
 
     def get_color_variations(self, obj):
         """
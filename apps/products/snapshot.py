@@ -0,0 +1,517 @@
+"""
+Shared-memory catalog snapshot
+
+Taxonomy (sections, brands, categories, collections, types) and a product
+listing projection are written to one binary file. Every worker maps it
+read-only (mmap), so all workers of a host share the same page-cache pages:
+memory does not grow with the number of workers and nothing is warmed
+per process.
+
+Layout (little-endian):
+
+    header     magic, format, table count, version, built_at, heap offset
+    directory  per table: name, key columns, rows, records offset, id index offset
+    records    per row: int64 keys (id, parent ids, flags) + (offset, length)
+               refs into the heap for the row JSON, slug and name
+    id index   (id, row) pairs sorted by id, for binary search
+    heap       UTF-8 strings and rendered JSON
+
+Rows are stored in the model's default ordering and the JSON is the DRF
+serializer output rendered by JSONRenderer, so responses are assembled from
+slices of the mapping and are byte-identical to the DRF views.
+
+A new version is written to a temporary file and renamed over the old one
+(os.replace). get_snapshot() stats the path on every call: all workers
+switch to the new version on their next request. Saves/deletes of catalog
+models rebuild it after commit in a background thread; code doing bulk
+writes (QuerySet.update(), bulk_create(), bulk_update()) calls
+bulk_changed(). Writes from other hosts are picked up only after
+CATALOG_SNAPSHOT_MAX_AGE, which is why CATALOG_SNAPSHOT is off by default.
+Without a snapshot the views query the database as usual.
+"""
+
+import hashlib
+import logging
+import mmap
+import re
+import os
+import struct
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process build lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'LCAT'
+FORMAT = 1
+HEADER = struct.Struct('<4sHHQdQ')  # magic, format, tables, version, built_at, heap offset
+TABLE = struct.Struct('<16sHIQQ')  # name, key columns, rows, records offset, index offset
+INDEX = struct.Struct('<qI')  # id, row
+REFS = 'QIQIQI'  # json, slug, name: (offset, length) in the heap
+
+# Product.flags bits
+FEATURED, NEW, ON_SALE = 1, 2, 4
+
+STALE_RETRY_SECONDS = 10
+
+
+def _attr(path):
+    def get(obj):
+        for name in path.split('.'):
+            obj = getattr(obj, name)
+            if obj is None:
+                return 0
+        return obj
+    return get
+
+
+def _product_flags(product):
+    return (
+        (FEATURED if product.is_featured else 0)
+        | (NEW if product.is_new else 0)
+        | (ON_SALE if product.is_on_sale else 0)
+    )
+
+
+def snapshot_tables():
+    """name -> (queryset, [(key, getter)], serializer class)"""
+    from apps.products.models import Section, Brand, Category, Collection, Type, Product
+    from apps.products.serializers import (
+        SectionSerializer,
+        BrandSerializer,
+        CategorySerializer,
+        CollectionSerializer,
+        TypeSerializer,
+        PlumbingProductSerializer,
+    )
+
+    keys = lambda *paths: [(path.replace('.', '_'), _attr(path)) for path in paths]  # noqa: E731
+    return {
+        'sections': (Section.objects.all(), keys('id'), SectionSerializer),
+        'brands': (Brand.objects.all(), keys('id'), BrandSerializer),
+        'categories': (
+            Category.objects.select_related('section', 'brand'),
+            keys('id', 'section_id', 'brand_id'),
+            CategorySerializer,
+        ),
+        'collections': (
+            Collection.objects.select_related('brand', 'category', 'category__section'),
+            keys('id', 'brand_id', 'category_id', 'category.section_id'),
+            CollectionSerializer,
+        ),
+        'types': (
+            Type.objects.select_related('category'),
+            keys('id', 'category_id', 'category.section_id'),
+            TypeSerializer,
+        ),
+        # Listing projection: the compact card of PlumbingProductSerializer
+        'products': (
+            Product.objects.select_related('section', 'brand', 'category'),
+            keys('id', 'section_id', 'brand_id', 'category_id', 'collection_id', 'type_id')
+            + [('flags', _product_flags)],
+            PlumbingProductSerializer,
+        ),
+    }
+
+
+# ========================
+# Reading
+# ========================
+
+class Table:
+    """Rows of one table; JSON is returned as memoryview slices of the mapping"""
+
+    def __init__(self, buffer, columns, count, records_offset, index_offset):
+        self.columns = {name: i for i, name in enumerate(columns)}
+        self.count = count
+        self._buffer = buffer
+        self._record = struct.Struct('<' + 'q' * len(columns) + REFS)
+        self._records = buffer[records_offset:records_offset + count * self._record.size]
+        self._index = buffer[index_offset:index_offset + count * INDEX.size]
+        self._ids = None
+
+    def __len__(self):
+        return self.count
+
+    def _values(self, row):
+        return self._record.unpack_from(self._records, row * self._record.size)
+
+    def key(self, row, name):
+        return self._values(row)[self.columns[name]]
+
+    def rows(self, **keys):
+        """Row numbers (in default ordering) whose key columns equal the given values"""
+        wanted = [(self.columns[name], value) for name, value in keys.items()]
+        return [
+            row for row, values in enumerate(self._record.iter_unpack(self._records))
+            if all(values[column] == value for column, value in wanted)
+        ]
+
+    def find(self, id):
+        """Row number of the id or None (binary search in the id index)"""
+        if self._ids is None:
+            self._ids = [id for id, _ in INDEX.iter_unpack(self._index)]
+        position = bisect_left(self._ids, id)
+        if position < self.count and self._ids[position] == id:
+            return INDEX.unpack_from(self._index, position * INDEX.size)[1]
+        return None
+
+    def _ref(self, row, n):
+        values = self._values(row)
+        offset, length = values[len(self.columns) + 2 * n:len(self.columns) + 2 * n + 2]
+        return self._buffer[offset:offset + length]
+
+    def json(self, row):
+        return self._ref(row, 0)
+
+    def slug(self, row):
+        return str(self._ref(row, 1), 'utf-8')
+
+    def name(self, row):
+        return str(self._ref(row, 2), 'utf-8')
+
+    def find_slug(self, slug):
+        encoded = slug.encode()
+        for row in range(self.count):
+            if self._ref(row, 1) == encoded:
+                return row
+        return None
+
+
+class CatalogSnapshot:
+    """One mapped snapshot version"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+        magic, fmt, table_count, self.version, self.built_at, _ = HEADER.unpack_from(buffer)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f'{path}: not a catalog snapshot (format {FORMAT})')
+
+        directory = [
+            TABLE.unpack_from(buffer, HEADER.size + i * TABLE.size) for i in range(table_count)
+        ]
+        # Column names follow the directory: "table:id,section_id,...\n..."
+        offset = HEADER.size + table_count * TABLE.size
+        length, = struct.unpack_from('<I', buffer, offset)
+        column_names = dict(
+            line.split(':') for line in str(buffer[offset + 4:offset + 4 + length], 'utf-8').splitlines()
+        )
+
+        self.tables = {}
+        for name, _, count, records_offset, index_offset in directory:
+            name = name.rstrip(b'\0').decode()
+            self.tables[name] = Table(
+                buffer, column_names[name].split(','), count, records_offset, index_offset
+            )
+
+    def __getitem__(self, name):
+        return self.tables[name]
+
+    @property
+    def age(self):
+        return time.time() - self.built_at
+
+
+def snapshot_path():
+    """
+    CATALOG_SNAPSHOT_PATH, or by default a file in the temp directory named
+    after the default database and BASE_DIR: another checkout, a test
+    database or another project on the host never maps this one's file
+    """
+    if settings.CATALOG_SNAPSHOT_PATH:
+        return settings.CATALOG_SNAPSHOT_PATH
+    database = connections['default'].settings_dict
+    key = '|'.join(str(database.get(name) or '') for name in ('HOST', 'PORT', 'NAME'))
+    digest = hashlib.sha256(f'{settings.BASE_DIR}|{key}'.encode()).hexdigest()[:12]
+    name = re.sub(r'[^\w.-]', '_', os.path.basename(str(database.get('NAME') or '')))
+    return os.path.join(tempfile.gettempdir(), f'lamis-catalog-{name}-{digest}.snapshot')
+
+
+_current = (None, None)  # (stat key, CatalogSnapshot)
+_last_stale_request = 0.0
+
+
+def get_snapshot():
+    """
+    The current snapshot or None (disabled / not built yet).
+
+    One stat() per call: a renamed-in file is mapped on the next request.
+    A missing or stale snapshot is rebuilt in the background.
+    """
+    global _current
+    if not settings.CATALOG_SNAPSHOT:
+        return None
+    path = snapshot_path()
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        _request_stale_rebuild()
+        return None
+
+    key, snapshot = _current
+    stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    if key != stat_key:
+        try:
+            snapshot = CatalogSnapshot(path)
+        except (OSError, ValueError, struct.error):
+            logger.exception('Could not map catalog snapshot %s', path)
+            return None
+        _current = (stat_key, snapshot)
+
+    if snapshot.age > settings.CATALOG_SNAPSHOT_MAX_AGE:
+        _request_stale_rebuild()
+    return snapshot
+
+
+def _request_stale_rebuild():
+    global _last_stale_request
+    now = time.monotonic()
+    if now - _last_stale_request >= STALE_RETRY_SECONDS:
+        _last_stale_request = now
+        request_rebuild(wait=False)
+
+
+# ========================
+# Writing
+# ========================
+
+def render_rows(queryset, key_getters, serializer_class):
+    renderer = JSONRenderer()
+    objects = list(queryset)
+    data = serializer_class(objects, many=True).data
+    for obj, item in zip(objects, data):
+        yield (
+            [getter(obj) for _, getter in key_getters],
+            renderer.render(item),
+            (getattr(obj, 'slug', '') or '').encode(),
+            (getattr(obj, 'name', '') or '').encode(),
+        )
+
+
+def build_snapshot(path=None, wait=True):
+    """
+    Write a new snapshot version and rename it over `path`.
+
+    With wait=False returns None if another process is building right now.
+    """
+    path = path or snapshot_path()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    with open(path + '.lock', 'a') as lock:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | (0 if wait else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return None
+
+        started = time.monotonic()
+        tables = {
+            name: (key_getters, list(render_rows(queryset, key_getters, serializer_class)))
+            for name, (queryset, key_getters, serializer_class) in snapshot_tables().items()
+        }
+        content = _pack(tables)
+
+        fd, tmp_path = tempfile.mkstemp(prefix='.catalog-', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    logger.info(
+        'Catalog snapshot written: %s, %d bytes, %s rows, %.2fs', path, len(content),
+        {name: len(rows) for name, (_, rows) in tables.items()}, time.monotonic() - started,
+    )
+    return path
+
+
+def _pack(tables):
+    columns = '\n'.join(
+        f"{name}:{','.join(key for key, _ in key_getters)}" for name, (key_getters, _) in tables.items()
+    ).encode()
+
+    # Sizes are known up front, so heap refs are written as absolute offsets
+    records = {
+        name: struct.Struct('<' + 'q' * len(key_getters) + REFS) for name, (key_getters, _) in tables.items()
+    }
+    offset = HEADER.size + len(tables) * TABLE.size + 4 + len(columns)
+    directory = []
+    for name, (key_getters, rows) in tables.items():
+        records_size = len(rows) * records[name].size
+        directory.append(TABLE.pack(name.encode(), len(key_getters), len(rows), offset, offset + records_size))
+        offset += records_size + len(rows) * INDEX.size
+    heap_offset = offset
+
+    body, heap = bytearray(), bytearray()
+    for name, (_, rows) in tables.items():
+        for keys, *strings in rows:
+            refs = []
+            for value in strings:
+                refs += [heap_offset + len(heap), len(value)]
+                heap += value
+            body += records[name].pack(*keys, *refs)
+        for row, (keys, *_) in sorted(enumerate(rows), key=lambda item: item[1][0][0]):
+            body += INDEX.pack(keys[0], row)
+
+    header = HEADER.pack(MAGIC, FORMAT, len(tables), time.time_ns(), time.time(), heap_offset)
+    return b''.join([header, *directory, struct.pack('<I', len(columns)), columns, body, heap])
+
+
+# Background rebuild: one builder thread per process, requests coalesce
+_rebuild_lock = threading.Lock()
+_rebuild_thread = None
+_rebuild_pending = None  # None / 'wait' / 'try'
+
+
+def request_rebuild(wait=True):
+    """Rebuild in a background thread; wait=False skips if another process is building"""
+    global _rebuild_thread, _rebuild_pending
+    with _rebuild_lock:
+        if wait or _rebuild_pending is None:
+            _rebuild_pending = 'wait' if wait else 'try'
+        if _rebuild_thread is None:
+            # Not a daemon: an interrupted build would leave a partial temp file
+            _rebuild_thread = threading.Thread(target=_rebuild_loop, name='catalog-snapshot')
+            _rebuild_thread.start()
+
+
+def _rebuild_loop():
+    global _rebuild_thread, _rebuild_pending
+    try:
+        while True:
+            with _rebuild_lock:
+                pending, _rebuild_pending = _rebuild_pending, None
+                if pending is None:
+                    _rebuild_thread = None
+                    return
+            try:
+                build_snapshot(wait=pending == 'wait')
+            except Exception:
+                logger.exception('Catalog snapshot rebuild failed')
+    finally:
+        connections.close_all()
+
+
+# ========================
+# Invalidation
+# ========================
+
+def catalog_changed(sender, instance=None, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(request_rebuild)
+
+
+def bulk_changed(using=None):
+    """
+    Rebuild after commit, for writes that send no post_save/post_delete
+    (QuerySet.update(), bulk_create(), bulk_update()): call it next to them
+    """
+    if settings.CATALOG_SNAPSHOT:
+        transaction.on_commit(request_rebuild, using=using)
+
+
+def connect_signals():
+    from apps.products.models import Section, Brand, Category, Collection, Type, Product, ResponsiveImage
+
+    for model in (Section, Brand, Category, Collection, Type, Product, ResponsiveImage):
+        post_save.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_snapshot_save_{model.__name__}')
+        post_delete.connect(catalog_changed, sender=model, dispatch_uid=f'catalog_snapshot_delete_{model.__name__}')
+
+
+# ========================
+# Responses
+# ========================
+
+def json_array(table, rows):
+    return b'[' + b','.join(table.json(row) for row in rows) + b']'
+
+
+def snapshot_response(content, status=200):
+    return HttpResponse(content, content_type=JSONRenderer.media_type, status=status)
+
+
+def browse_json(snapshot):
+    """GET /catalog/browse/ (CatalogBrowseView)"""
+    categories, collections, types = snapshot['categories'], snapshot['collections'], snapshot['types']
+    parts = []
+    for section_row in range(len(snapshot['sections'])):
+        section_id = snapshot['sections'].key(section_row, 'id')
+        section_collections = collections.rows(category_section_id=section_id)
+        section_types = types.rows(category_section_id=section_id)
+        used = {collections.key(row, 'category_id') for row in section_collections}
+        used |= {types.key(row, 'category_id') for row in section_types}
+
+        category_parts = []
+        for row in range(len(categories)):
+            category_id = categories.key(row, 'id')
+            if category_id not in used:
+                continue
+            category_parts.append(
+                b'{"category":' + categories.json(row)
+                + b',"collections":' + json_array(collections, [
+                    r for r in section_collections if collections.key(r, 'category_id') == category_id
+                ])
+                + b',"types":' + json_array(types, [
+                    r for r in section_types if types.key(r, 'category_id') == category_id
+                ])
+                + b'}'
+            )
+        parts.append(
+            b'{"section":' + snapshot['sections'].json(section_row)
+            + b',"categories":[' + b','.join(category_parts) + b']}'
+        )
+    return b'{"catalog":[' + b','.join(parts) + b']}'
+
+
+def section_json(snapshot, section_slug):
+    """GET /catalog/{section_slug}/ (CatalogSectionView) or None if there is no such section"""
+    sections = snapshot['sections']
+    row = sections.find_slug(section_slug)
+    if row is None:
+        return None
+    categories = snapshot['categories']
+    return (
+        b'{"section":' + sections.json(row)
+        + b',"categories":' + json_array(categories, categories.rows(section_id=sections.key(row, 'id')))
+        + b'}'
+    )
+
+
+def plumbing_json(snapshot, category_name_mapping, brand_name='Caizer'):
+    """GET /api/v1/plumbing-section/ (PlumbingSectionViewSet): featured products of the brand"""
+    brands, categories, products = snapshot['brands'], snapshot['categories'], snapshot['products']
+    brand_rows = [row for row in range(len(brands)) if brands.name(row).lower() == brand_name.lower()]
+    # Brand.name is unique: one row or none (then every group is empty)
+    brand_id = brands.key(brand_rows[0], 'id') if brand_rows else None
+
+    category_names = {
+        categories.key(row, 'id'): categories.name(row).lower() for row in range(len(categories))
+    }
+    featured = [
+        row for row in products.rows(brand_id=brand_id)
+        if products.key(row, 'flags') & FEATURED
+    ]
+    parts = []
+    for key, names in category_name_mapping.items():
+        names = {name.lower() for name in names}
+        rows = [row for row in featured if category_names.get(products.key(row, 'category_id')) in names]
+        parts.append(b'"' + key.encode() + b'":' + json_array(products, rows))
+    return b'{' + b','.join(parts) + b'}'
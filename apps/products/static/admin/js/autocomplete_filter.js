@@ -0,0 +1,43 @@
+/**
+ * Фильтры changelist с автодополнением (AutocompleteFilter в apps/products/admin.py)
+ *
+ * Вместо списка всех значений таблицы select2 подгружает варианты
+ * постранично из стандартного admin:autocomplete view по мере ввода.
+ */
+
+django.jQuery(function($) {
+    'use strict';
+
+    $('.admin-autocomplete-filter').each(function() {
+        const $select = $(this);
+
+        $select.select2({
+            width: '100%',
+            allowClear: true,
+            placeholder: $select.data('placeholder'),
+            ajax: {
+                url: $select.data('url'),
+                dataType: 'json',
+                delay: 250,
+                data: function(params) {
+                    return {
+                        term: params.term,
+                        page: params.page,
+                        app_label: $select.data('appLabel'),
+                        model_name: $select.data('modelName'),
+                        field_name: $select.data('fieldName')
+                    };
+                }
+            }
+        });
+
+        // Параметр попадает в форму фильтров только если значение выбрано
+        $select.on('change', function() {
+            if ($select.val()) {
+                $select.attr('name', $select.data('name'));
+            } else {
+                $select.removeAttr('name');
+            }
+        });
+    });
+});
@@ -0,0 +1,60 @@
+"""
+Background tasks for catalog admin actions (run by python manage.py run_jobs)
+"""
+
+from django.db import transaction
+
+from apps.jobs.queue import task
+from apps.products import snapshot
+from apps.products.models import Collection, Color, Product, Type
+
+
+def duplicate_objects(job, model, ids, prepare):
+    """
+    Copy objects one by one with a checkpoint after each copy.
+
+    Ids already copied are kept in job.state, so a retry after a failure
+    does not create the same copy twice.
+    """
+    done = set(job.state.get('done', []))
+    total = len(ids)
+    job.set_progress(len(done), total)
+
+    for obj in model.objects.filter(pk__in=ids).exclude(pk__in=done).order_by('pk'):
+        source_pk = obj.pk
+        with transaction.atomic():
+            prepare(obj)
+            obj.pk = None
+            obj.save()
+            done.add(source_pk)
+            job.set_progress(len(done), total, state={'done': sorted(done)})
+
+    return {'created': len(done)}
+
+
+def _copy_name(obj):
+    obj.name = f"{obj.name} (копия)"
+    obj.slug = ""  # Will be auto-generated
+
+
+@task('products.duplicate_collections')
+def duplicate_collections(job, ids):
+    return duplicate_objects(job, Collection, ids, _copy_name)
+
+
+@task('products.duplicate_types')
+def duplicate_types(job, ids):
+    return duplicate_objects(job, Type, ids, _copy_name)
+
+
+@task('products.duplicate_colors')
+def duplicate_colors(job, ids):
+    return duplicate_objects(job, Color, ids, _copy_name)
+
+
+@task('products.set_color_group')
+def set_color_group(job, ids, color_group):
+    """One color_group for the selected products (color_group is chosen when queued, so retries are safe)"""
+    updated = Product.objects.filter(pk__in=ids).update(color_group=color_group)
+    snapshot.bulk_changed()
+    return {'updated': updated, 'color_group': color_group}
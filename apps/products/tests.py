@@ -0,0 +1,104 @@
+"""
+Tests for products app
+"""
+
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.products.models import (
+    Brand, Category, Collection, Color, Product, ProductImage, Section, Type,
+)
+
+
+# Manifest-хранилище требует collectstatic
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+class ProductAdminChangelistQueriesTest(TestCase):
+    """Changelist товаров: число запросов не зависит от числа строк на странице"""
+
+    @classmethod
+    def setUpTestData(cls):
+        section = Section.objects.create(name='Мебель для ванной')
+        brand = Brand.objects.create(name='Caizer')
+        category = Category.objects.create(name='Тумбы', section=section, brand=brand)
+        cls.collection = collection = Collection.objects.create(name='Solo', category=category, brand=brand)
+        product_type = Type.objects.create(name='Подвесная', category=category)
+        colors = [Color.objects.create(name=name, hex_code='#FFFFFF') for name in ('Белый', 'Дуб')]
+
+        for group in range(25):
+            color_group = uuid.uuid4()
+            for variant, color in enumerate(colors):
+                product = Product.objects.create(
+                    name=f'Тумба {group}-{variant}',
+                    price=Decimal('100.00'),
+                    section=section,
+                    brand=brand,
+                    category=category,
+                    collection=collection,
+                    type=product_type,
+                    color=color,
+                    color_group=color_group,
+                    main_image_url=f'https://example.com/{group}-{variant}.webp',
+                )
+                ProductImage.objects.create(product=product, image_url=f'https://example.com/{group}-{variant}-1.webp')
+                ProductImage.objects.create(product=product, image_url=f'https://example.com/{group}-{variant}-2.webp')
+
+        cls.admin_user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.url = reverse('admin:products_product_changelist')
+        self.model_admin = admin.site._registry[Product]
+
+    def changelist(self, per_page):
+        # С параметром p CustomPaginationMixin не перенаправляет
+        with mock.patch.object(self.model_admin, 'list_per_page', per_page):
+            response = self.client.get(self.url, {'p': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), per_page)
+        return response
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.changelist(10)  # session, content types, etc. are cached after the first request
+
+        with CaptureQueriesContext(connection) as small_page:
+            self.changelist(10)
+
+        with self.assertNumQueries(len(small_page.captured_queries)):
+            self.changelist(50)
+
+    def test_counts_are_annotated(self):
+        response = self.changelist(10)
+        for product in response.context['cl'].result_list:
+            self.assertEqual(product._image_count, 2)
+            self.assertEqual(product._variation_count, 2)
+
+    def test_inline_pager_keeps_query_string(self):
+        """Ссылки пейджера ProductInline сохраняют _changelist_filters и другие параметры"""
+        url = reverse('admin:products_collection_change', args=[self.collection.pk])
+        query = {'_changelist_filters': 'brand__id__exact=1', 'other_page': '3'}
+        response = self.client.get(url, query)
+        self.assertEqual(response.status_code, 200)
+
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.page.number, 1)
+        self.assertEqual(
+            formset.next_page_query,
+            f'_changelist_filters=brand__id__exact%3D1&other_page=3&{formset.page_param}=2',
+        )
+        self.assertContains(response, f'href="?{formset.next_page_query.replace("&", "&amp;")}"')
+
+        response = self.client.get(url, {**query, formset.page_param: 2})
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(formset.page.number, 2)
+        self.assertEqual(
+            formset.previous_page_query,
+            f'_changelist_filters=brand__id__exact%3D1&other_page=3&{formset.page_param}=1',
+        )
@@ -3,6 +3,7 @@ URL Configuration for Products App
 НОВАЯ АРХИТЕКТУРА: Section → Brand → Category → Collection/Type → Product
 """
 
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from apps.products.views import (
@@ -52,3 +53,28 @@ urlpatterns = [
     # Standard REST API endpoints
     path('', include(router.urls)),
 ]
+
+if settings.ASGI_MODE:
+    # Async versions of the public read endpoints (same URLs, matched before the sync ones)
+    from apps.products.async_views import (
+        AsyncSearchView,
+        AsyncPlumbingSectionView,
+        AsyncProductListView,
+        AsyncCatalogBrowseView,
+        AsyncCatalogSectionView,
+        AsyncCatalogCategoryView,
+        AsyncCatalogProductsView
+    )
+
+    urlpatterns = [
+        path('catalog/browse/', AsyncCatalogBrowseView.as_view(), name='catalog-browse'),
+        path('catalog/<slug:section_slug>/<slug:category_slug>/<slug:item_slug>/',
+             AsyncCatalogProductsView.as_view(), name='catalog-products'),
+        path('catalog/<slug:section_slug>/<slug:category_slug>/',
+             AsyncCatalogCategoryView.as_view(), name='catalog-category'),
+        path('catalog/<slug:section_slug>/',
+             AsyncCatalogSectionView.as_view(), name='catalog-section'),
+        path('search/', AsyncSearchView.as_view(), name='search-list'),
+        path('plumbing-section/', AsyncPlumbingSectionView.as_view(), name='plumbing-section-list'),
+        path('products/', AsyncProductListView.as_view(), name='product-list'),
+    ] + urlpatterns
@@ -31,6 +31,7 @@ from apps.products.serializers import (
 )
 from apps.products.filters import ProductFilter, BrandFilter, CategoryFilter, CollectionFilter, TypeFilter
 from apps.products.permissions import IsAdminOrReadOnly, IsAdmin
+from apps.products.snapshot import get_snapshot, plumbing_json, snapshot_response
 
 
 class SectionViewSet(viewsets.ModelViewSet):
@@ -447,8 +448,11 @@ class ProductViewSet(viewsets.ModelViewSet):
     - partial_update: PATCH /api/v1/admin/products/{id}/
     - destroy: DELETE /api/v1/admin/products/{id}/
     """
-    queryset = Product.objects.select_related('section', 'brand', 'category', 'collection', 'type', 'color').all()
+    queryset = Product.objects.select_related(
+        'section', 'brand', 'category', 'collection', 'type', 'color'
+    ).prefetch_related('gallery_images')
     permission_classes = [IsAdminOrReadOnly]
+    use_read_replica = True  # safe requests read from a replica (config/db_router.py)
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_class = ProductFilter
     search_fields = ['name', 'description']
@@ -464,55 +468,16 @@ class ProductViewSet(viewsets.ModelViewSet):
             return ProductCreateUpdateSerializer
         return ProductListSerializer
 
-    def list(self, request, *args, **kwargs):
+    def get_color_groups_map(self, products):
         """
-        Переопределенный метод list для оптимизации запросов цветовых вариаций.
-
-        Предзагружает все цвета для color_groups одним запросом,
+        Предзагружает все цвета для color_groups товаров одним запросом,
         чтобы избежать N+1 проблемы при сериализации available_colors.
-        """
-        queryset = self.filter_queryset(self.get_queryset())
-
-        # Пагинация
-        page = self.paginate_queryset(queryset)
-        if page is not None:
-            # Оптимизация: собираем все уникальные color_groups из текущей страницы
-            color_groups = set(
-                p.color_group for p in page if p.color_group
-            )
-
-            # Предзагружаем все цвета для этих групп одним запросом
-            color_groups_map = {}
-            if color_groups:
-                from apps.products.models import Color
-                colors_qs = Color.objects.filter(
-                    products__color_group__in=color_groups
-                ).distinct().prefetch_related('products')
-
-                # Группируем цвета по color_group
-                for color in colors_qs:
-                    # Получаем все color_groups для которых этот цвет доступен
-                    groups = color.products.filter(
-                        color_group__in=color_groups
-                    ).values_list('color_group', flat=True).distinct()
-
-                    for group in groups:
-                        if group not in color_groups_map:
-                            color_groups_map[group] = []
-                        if color not in color_groups_map[group]:
-                            color_groups_map[group].append(color)
-
-            # Передаем предзагруженные данные через context
-            serializer = self.get_serializer(
-                page,
-                many=True,
-                context={'color_groups_map': color_groups_map}
-            )
-            return self.get_paginated_response(serializer.data)
 
-        # Если пагинация отключена, делаем то же самое для всего queryset
+        Возвращает {color_group: [Color, ...]} для context сериализатора.
+        """
+        # Собираем все уникальные color_groups
         color_groups = set(
-            p.color_group for p in queryset if p.color_group
+            p.color_group for p in products if p.color_group
         )
 
         color_groups_map = {}
@@ -522,7 +487,9 @@ class ProductViewSet(viewsets.ModelViewSet):
                 products__color_group__in=color_groups
             ).distinct().prefetch_related('products')
 
+            # Группируем цвета по color_group
             for color in colors_qs:
+                # Получаем все color_groups для которых этот цвет доступен
                 groups = color.products.filter(
                     color_group__in=color_groups
                 ).values_list('color_group', flat=True).distinct()
@@ -533,10 +500,34 @@ class ProductViewSet(viewsets.ModelViewSet):
                     if color not in color_groups_map[group]:
                         color_groups_map[group].append(color)
 
+        return color_groups_map
+
+    def list(self, request, *args, **kwargs):
+        """
+        Переопределенный метод list для оптимизации запросов цветовых вариаций.
+
+        Предзагружает все цвета для color_groups одним запросом,
+        чтобы избежать N+1 проблемы при сериализации available_colors.
+        Async-версия для ASGI: AsyncProductListView (async_views.py).
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # Пагинация
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            # Передаем предзагруженные данные через context
+            serializer = self.get_serializer(
+                page,
+                many=True,
+                context={'color_groups_map': self.get_color_groups_map(page)}
+            )
+            return self.get_paginated_response(serializer.data)
+
+        # Если пагинация отключена, делаем то же самое для всего queryset
         serializer = self.get_serializer(
             queryset,
             many=True,
-            context={'color_groups_map': color_groups_map}
+            context={'color_groups_map': self.get_color_groups_map(queryset)}
         )
         return Response(serializer.data)
 
@@ -706,6 +697,36 @@ class PlumbingSectionViewSet(viewsets.ViewSet):
     """
     permission_classes = [AllowAny]
 
+    # Category name mapping (works across different databases)
+    CATEGORY_NAME_MAPPING = {
+        'rakoviny': ['Раковины'],
+        'unitazy': ['Унитазы'],
+        'bidet': ['Биде'],
+        'pissuari': ['Писсуары'],
+        'smesiteli': ['Смесители для раковины', 'Смесители для ванны', 'Смесители для душа', 'Смесители для кухни'],
+        'dushevye': ['Душевые кабины', 'Душевые уголки', 'Душевые двери', 'Поддоны'],
+        'vanny': ['Ванны'],
+    }
+
+    def featured_products(self, brand):
+        """FEATURED products of the brand by result key: [(key, queryset)]"""
+        from django.db.models import Q
+
+        # Fetch all FEATURED CAIZER products (only products marked for homepage)
+        caizer_products = Product.objects.filter(
+            brand=brand,
+            is_featured=True  # Only show featured products on homepage
+        ).select_related('section', 'brand', 'category')
+
+        grouped = []
+        for key, category_names in self.CATEGORY_NAME_MAPPING.items():
+            # Build Q filter for category names
+            category_filter = Q()
+            for cat_name in category_names:
+                category_filter |= Q(category__name__iexact=cat_name)
+            grouped.append((key, caizer_products.filter(category_filter)))
+        return grouped
+
     def list(self, request):
         """
         GET /api/v1/plumbing-section/
@@ -714,48 +735,20 @@ class PlumbingSectionViewSet(viewsets.ViewSet):
         Only products with is_featured=True are returned (selected in Django admin).
         Uses category names instead of IDs to work across different databases.
         """
-        from django.db.models import Q
+        # Shared catalog snapshot (featured flags and categories of all products)
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            return snapshot_response(plumbing_json(snapshot, self.CATEGORY_NAME_MAPPING))
 
         # Find CAIZER brand dynamically
         try:
             caizer_brand = Brand.objects.get(name__iexact='Caizer')
         except Brand.DoesNotExist:
-            return Response({
-                'rakoviny': [],
-                'unitazy': [],
-                'bidet': [],
-                'pissuari': [],
-                'smesiteli': [],
-                'dushevye': [],
-                'vanny': [],
-            })
-
-        # Category name mapping (works across different databases)
-        CATEGORY_NAME_MAPPING = {
-            'rakoviny': ['Раковины'],
-            'unitazy': ['Унитазы'],
-            'bidet': ['Биде'],
-            'pissuari': ['Писсуары'],
-            'smesiteli': ['Смесители для раковины', 'Смесители для ванны', 'Смесители для душа', 'Смесители для кухни'],
-            'dushevye': ['Душевые кабины', 'Душевые уголки', 'Душевые двери', 'Поддоны'],
-            'vanny': ['Ванны'],
-        }
-
-        # Fetch all FEATURED CAIZER products (only products marked for homepage)
-        caizer_products = Product.objects.filter(
-            brand=caizer_brand,
-            is_featured=True  # Only show featured products on homepage
-        ).select_related('section', 'brand', 'category')
+            return Response({key: [] for key in self.CATEGORY_NAME_MAPPING})
 
         # Group products by category
         result = {}
-        for key, category_names in CATEGORY_NAME_MAPPING.items():
-            # Build Q filter for category names
-            category_filter = Q()
-            for cat_name in category_names:
-                category_filter |= Q(category__name__iexact=cat_name)
-
-            products = caizer_products.filter(category_filter)
+        for key, products in self.featured_products(caizer_brand):
             serializer = PlumbingProductSerializer(products, many=True)
             result[key] = serializer.data
 
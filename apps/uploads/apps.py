@@ -5,3 +5,7 @@ class UploadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.uploads'
     verbose_name = 'Загрузки'
+
+    def ready(self):
+        # Счетчики ссылок на MediaFile при изменении товаров/коллекций
+        from apps.uploads import signals  # noqa: F401
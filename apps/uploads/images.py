@@ -0,0 +1,181 @@
+"""
+Image processing pipeline for uploads
+
+Uploaded images are decoded with Pillow, rotated according to EXIF and
+re-encoded without metadata into a fixed set of widths:
+- WebP (primary format)
+- AVIF (only if Pillow has an AVIF encoder, e.g. pillow-avif-plugin)
+- JPEG (fallback for old browsers)
+
+Work runs in a small bounded thread pool so that concurrent uploads cannot
+use more than IMAGE_PROCESSING_WORKERS cores (Pillow releases the GIL while
+resizing and encoding).
+"""
+
+import base64
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+try:  # Optional AVIF encoder
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+Image.init()
+AVIF_SUPPORTED = 'AVIF' in Image.SAVE
+
+# Largest accepted image. Pillow raises DecompressionBombError at open only
+# above twice MAX_IMAGE_PIXELS and merely warns between 1x and 2x, so
+# process_image checks width * height against the limit itself before load()
+MAX_IMAGE_PIXELS = 60_000_000
+Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+FORMATS = {
+    # name: (Pillow format, file extension, save options)
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Width of the blurred LQIP placeholder embedded into API responses
+PLACEHOLDER_WIDTH = 16
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process-wide pool for image work (created lazily, after fork)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                    thread_name_prefix='image-upload',
+                )
+    return _executor
+
+
+def output_formats():
+    """Formats written for every width, primary format first"""
+    if AVIF_SUPPORTED:
+        return ['webp', 'avif', 'jpeg']
+    return ['webp', 'jpeg']
+
+
+def target_widths(original_width):
+    """Configured widths that do not upscale; small images keep their own width"""
+    widths = sorted(w for w in settings.IMAGE_VARIANT_WIDTHS if w <= original_width)
+    return widths or [original_width]
+
+
+def _flatten(image):
+    """RGB copy for formats without alpha (JPEG), on a white background"""
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A') if image.mode == 'RGBA' else None)
+    return background
+
+
+def make_placeholder(image):
+    """Tiny blurred WebP as a data: URI (a few hundred bytes)"""
+    width = min(PLACEHOLDER_WIDTH, image.width)
+    height = max(1, round(image.height * width / image.width))
+    thumbnail = image.resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, 'WEBP', quality=30)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def process_image(file, directory, basename):
+    """
+    Decode `file`, strip metadata and write all variants to `directory`.
+
+    Files are named {basename}-{width}w.{ext}. Returns
+    {'width', 'height', 'placeholder', 'variants': {format: [{'width', 'height', 'filename', 'size'}]}}.
+    Raises PIL.UnidentifiedImageError / Image.DecompressionBombError for bad input.
+    """
+    with Image.open(file) as source:
+        if source.width * source.height > MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(
+                f'Image size ({source.width * source.height} pixels) exceeds limit of {MAX_IMAGE_PIXELS} pixels'
+            )
+        source.load()
+        image = ImageOps.exif_transpose(source)
+
+    # Re-encoding from pixel data drops EXIF/XMP/ICC metadata
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    os.makedirs(directory, exist_ok=True)
+    original_width, original_height = image.size
+    formats = output_formats()
+    variants = {name: [] for name in formats}
+
+    for width in target_widths(original_width):
+        height = max(1, round(original_height * width / original_width))
+        resized = image if width == original_width else image.resize((width, height), Image.LANCZOS)
+
+        for name in formats:
+            pillow_format, extension, options = FORMATS[name]
+            filename = f'{basename}-{width}w.{extension}'
+            path = os.path.join(directory, filename)
+            frame = _flatten(resized) if name == 'jpeg' else resized
+            frame.save(path, pillow_format, **options)
+            variants[name].append({
+                'width': width,
+                'height': height,
+                'filename': filename,
+                'size': os.path.getsize(path),
+            })
+
+    return {
+        'width': original_width,
+        'height': original_height,
+        'placeholder': make_placeholder(image),
+        'variants': variants,
+    }
+
+
+def process_upload(file, directory, basename):
+    """Run process_image in the worker pool and wait for it (bounded by IMAGE_PROCESSING_TIMEOUT)"""
+    future = get_executor().submit(process_image, file, directory, basename)
+    return future.result(timeout=settings.IMAGE_PROCESSING_TIMEOUT)
+
+
+def register_variants(source_url, result, base_url):
+    """
+    Store processing result in the ResponsiveImage registry under `source_url`.
+    `base_url` is the public URL prefix of the directory the variants were written to.
+    """
+    from apps.products.models import ResponsiveImage
+
+    variants = [
+        {
+            'width': variant['width'],
+            'height': variant['height'],
+            'format': name,
+            'url': f"{base_url}{variant['filename']}",
+            'size': variant['size'],
+        }
+        for name, items in result['variants'].items()
+        for variant in items
+    ]
+    registry, _ = ResponsiveImage.objects.update_or_create(
+        source_url=source_url,
+        defaults={
+            'width': result['width'],
+            'height': result['height'],
+            'placeholder': result['placeholder'],
+            'variants': variants,
+        },
+    )
+    return registry
@@ -0,0 +1,100 @@
+"""
+Management command to delete unreferenced uploads from the media store
+
+1. Recounts references to every MediaFile (media_store.MEDIA_URL_FIELDS
+   and the URL lists in MEDIA_JSON_FIELDS, matched by the file hash).
+2. Deletes files of MediaFile records with ref_count=0 that are older than
+   the grace period, together with their ResponsiveImage registry rows.
+   A file whose hash still appears in any media field is kept.
+3. Deletes unfinished chunked upload sessions older than the grace period.
+
+Usage:
+    python manage.py cleanup_media --dry-run
+    python manage.py cleanup_media --grace-hours 48
+"""
+
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.products.models import ResponsiveImage
+from apps.uploads.media_store import is_referenced, update_ref_counts
+from apps.uploads.models import MediaFile, UploadSession
+from apps.uploads.storage import get_storage
+
+
+class Command(BaseCommand):
+    help = 'Delete uploaded media files that are not referenced by the catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep unreferenced uploads younger than this (default: 24)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only show what would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+
+        self.stdout.write(self.style.SUCCESS('🧹 Cleaning up media store...'))
+
+        # Signals miss bulk operations, so recount before deleting anything
+        changed = update_ref_counts()
+        self.stdout.write(f'Reference counts updated: {changed}')
+
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        orphans = MediaFile.objects.filter(ref_count=0, created_at__lt=cutoff)
+
+        storage = get_storage()
+        deleted_count = 0
+        freed_bytes = 0
+        kept_count = 0
+        for media_file in orphans.iterator():
+            # A reference added after the recount, or one media_key cannot parse
+            if is_referenced(media_file):
+                self.stdout.write(self.style.WARNING(f'⚠ Still referenced, kept: {media_file.url}'))
+                kept_count += 1
+                continue
+
+            for name in media_file.files:
+                if not storage.exists(name):
+                    continue
+                freed_bytes += storage.size(name)
+                if not dry_run:
+                    storage.delete(name)
+
+            self.stdout.write(f'{"[DRY RUN] " if dry_run else ""}✗ {media_file.url}')
+            if not dry_run:
+                ResponsiveImage.objects.filter(source_url=media_file.url).delete()
+                media_file.delete()
+            deleted_count += 1
+
+        # Abandoned resumable uploads
+        stale_sessions = UploadSession.objects.exclude(
+            status=UploadSession.Status.COMPLETE
+        ).filter(updated_at__lt=cutoff)
+        session_count = 0
+        for session in stale_sessions.iterator():
+            try:
+                freed_bytes += os.path.getsize(session.path)
+                if not dry_run:
+                    os.remove(session.path)
+            except FileNotFoundError:
+                pass
+            if not dry_run:
+                session.delete()
+            session_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {"Would delete" if dry_run else "Deleted"}: {deleted_count} uploads, '
+            f'{session_count} unfinished sessions, {freed_bytes / 1024 / 1024:.1f} MB'
+            + (f' ({kept_count} kept: still referenced)' if kept_count else '')
+        ))
@@ -0,0 +1,225 @@
+"""
+Management command to copy media between storage backends in bulk
+
+Copies every file under --prefix from one backend (or a local directory)
+to another, MEDIA_UPLOAD_WORKERS files at a time; large files additionally
+use parallel multipart uploads on S3. Files that already exist in the
+target with the same size are skipped, so an interrupted run can simply be
+restarted.
+
+Usage:
+    # local catalog (e.g. output of prepare_images_for_r2) -> configured backend
+    python manage.py migrate_media --source-dir ../catalog-for-r2 --prefix images/catalog/
+
+    # filesystem -> S3/R2 and point catalog URLs at the new location
+    python manage.py migrate_media --from filesystem --to s3 --rewrite-urls
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Replace
+
+from apps.products import snapshot
+from apps.products.models import ResponsiveImage
+from apps.uploads.media_store import MEDIA_JSON_FIELDS, MEDIA_URL_FIELDS
+from apps.uploads.models import MediaFile
+from apps.uploads.storage import BACKENDS, get_storage, put_file
+
+
+class Command(BaseCommand):
+    help = 'Copy media files between storage backends (parallel, resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--from',
+            dest='source',
+            choices=BACKENDS,
+            help='Source storage backend'
+        )
+        parser.add_argument(
+            '--source-dir',
+            help='Copy from a local directory instead of a storage backend'
+        )
+        parser.add_argument(
+            '--to',
+            dest='target',
+            choices=BACKENDS,
+            default=None,
+            help='Target storage backend (default: MEDIA_STORAGE_BACKEND)'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='',
+            help='Only copy names under this prefix (e.g. images/catalog/)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=settings.MEDIA_UPLOAD_WORKERS,
+            help=f'Files copied in parallel (default: {settings.MEDIA_UPLOAD_WORKERS})'
+        )
+        parser.add_argument(
+            '--rewrite-urls',
+            action='store_true',
+            help='Replace source URLs with target URLs in the catalog (backend to backend only)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only list files that would be copied'
+        )
+
+    def handle(self, *args, **options):
+        if bool(options['source']) == bool(options['source_dir']):
+            raise CommandError('Use exactly one of --from or --source-dir')
+        if options['rewrite_urls'] and options['source_dir']:
+            raise CommandError('--rewrite-urls needs --from')
+
+        target = get_storage(options['target'])
+        source = get_storage(options['source']) if options['source'] else None
+        if source is target:
+            raise CommandError('Source and target are the same backend')
+
+        prefix = options['prefix']
+        if source:
+            files = list(self.walk_storage(source, prefix.rstrip('/')))
+        else:
+            files = list(self.walk_directory(options['source_dir'], prefix))
+
+        self.stdout.write(self.style.SUCCESS(f'📦 Migrating media: {len(files)} files'))
+        if options['dry_run']:
+            for name, _ in files:
+                self.stdout.write(f'[DRY RUN] {name}')
+            return
+
+        started = time.monotonic()
+        copied_count = 0
+        skipped_count = 0
+        error_count = 0
+        copied_bytes = 0
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(self.copy, source, target, name, location): name
+                for name, location in files
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    size = future.result()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f'✗ {name}: {e}'))
+                    error_count += 1
+                    continue
+                if size is None:
+                    skipped_count += 1
+                else:
+                    copied_count += 1
+                    copied_bytes += size
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Copied: {copied_count}, skipped: {skipped_count}, errors: {error_count}\n'
+            f'   {copied_bytes / 1024 / 1024:.1f} MB in {elapsed:.1f}s '
+            f'({copied_bytes / 1024 / 1024 / max(elapsed, 0.001):.1f} MB/s)'
+        ))
+
+        if options['rewrite_urls']:
+            if error_count:
+                raise CommandError('Not rewriting URLs: some files failed to copy')
+            self.rewrite_urls(source.url(''), target.url(''))
+
+    def walk_storage(self, storage, path):
+        """(name, name) for every file under `path` (Storage.listdir is not recursive)"""
+        directories, files = storage.listdir(path)
+        for filename in files:
+            name = f'{path}/{filename}' if path else filename
+            yield name, name
+        for directory in directories:
+            yield from self.walk_storage(storage, f'{path}/{directory}' if path else directory)
+
+    def walk_directory(self, root, prefix):
+        """(storage name, local path) for every file under a local directory"""
+        if not os.path.isdir(root):
+            raise CommandError(f'Directory not found: {root}')
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue  # e.g. .r2-manifest.json of prepare_images_for_r2
+                path = os.path.join(dirpath, filename)
+                relative_path = os.path.relpath(path, root).replace(os.sep, '/')
+                yield f'{prefix}{relative_path}', path
+
+    def copy(self, source, target, name, location):
+        """Copy one file; returns its size, or None if the target already has it"""
+        size = source.size(location) if source else os.path.getsize(location)
+        if target.exists(name) and target.size(name) == size:
+            return None
+
+        if source is None:
+            put_file(target, name, location, overwrite=True)
+            return size
+
+        if target.exists(name):
+            target.delete(name)
+        with source.open(location) as f:
+            target.save(name, f)
+        return size
+
+    @transaction.atomic
+    def rewrite_urls(self, old_base, new_base):
+        """Point catalog fields, MediaFile and ResponsiveImage at the target backend"""
+        self.stdout.write(f'🔗 Rewriting URLs: {old_base} -> {new_base}')
+
+        targets = dict(MEDIA_URL_FIELDS)
+        targets[MediaFile] = ('url',)
+        targets[ResponsiveImage] = ('source_url',)
+
+        for model, fields in targets.items():
+            for field in fields:
+                updated = model.objects.filter(**{f'{field}__startswith': old_base}).update(
+                    **{field: Replace(field, Value(old_base), Value(new_base))}
+                )
+                if updated:
+                    self.stdout.write(f'   {model.__name__}.{field}: {updated}')
+
+        # Variant URLs live inside JSON
+        changed = []
+        for registry in ResponsiveImage.objects.only('id', 'variants').iterator():
+            variants = [
+                {**variant, 'url': new_base + variant['url'][len(old_base):]}
+                if variant['url'].startswith(old_base) else variant
+                for variant in registry.variants
+            ]
+            if variants != registry.variants:
+                registry.variants = variants
+                changed.append(registry)
+        ResponsiveImage.objects.bulk_update(changed, ['variants'], batch_size=500)
+        self.stdout.write(f'   ResponsiveImage.variants: {len(changed)}')
+
+        # URL lists (Product.images)
+        for model, fields in MEDIA_JSON_FIELDS.items():
+            for field in fields:
+                changed = []
+                for obj in model.objects.only('pk', field).iterator():
+                    urls = getattr(obj, field)
+                    if not isinstance(urls, list):
+                        continue
+                    rewritten = [
+                        new_base + url[len(old_base):] if isinstance(url, str) and url.startswith(old_base) else url
+                        for url in urls
+                    ]
+                    if rewritten != urls:
+                        setattr(obj, field, rewritten)
+                        changed.append(obj)
+                model.objects.bulk_update(changed, [field], batch_size=500)
+                if changed:
+                    self.stdout.write(f'   {model.__name__}.{field}: {len(changed)}')
+
+        snapshot.bulk_changed()
@@ -0,0 +1,240 @@
+"""
+Content-addressed media store
+
+Uploads are hashed (SHA-256) while streaming their chunks and stored under
+the hash, so identical files are kept once: every stored name starts with
+the hash (products/<sha256>-640w.webp, files/<sha256>.pdf).
+MediaFile.ref_count tracks how many catalog URLs point at any of its files.
+A reference is matched by the hash in the URL's file name, so absolute URLs,
+any responsive variant and URLs of an earlier storage backend all count.
+Files that stay unreferenced are removed by `python manage.py cleanup_media`.
+
+Files go to the configured storage backend (apps/uploads/storage.py).
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from collections import Counter
+from functools import reduce
+from operator import or_
+from urllib.parse import unquote, urlsplit
+
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+
+from apps.products.models import (
+    Brand, Collection, Color, Material, Product, ProductImage, ResponsiveImage, TutorialCategory,
+)
+from apps.uploads.images import process_upload, register_variants
+from apps.uploads.models import MediaFile
+from apps.uploads.storage import get_storage, put_file, put_files
+
+# Поля моделей, которые могут ссылаться на файлы из хранилища
+MEDIA_URL_FIELDS = {
+    ProductImage: ('image_url',),
+    Product: ('main_image_url', 'hover_image_url'),
+    Collection: ('image',),
+    Material: ('file_url', 'image_url'),
+    Brand: ('image',),
+    Color: ('texture_image',),
+    TutorialCategory: ('banner_image_url',),
+}
+
+# JSON-поля со списками URL
+MEDIA_JSON_FIELDS = {
+    Product: ('images',),
+}
+
+MEDIA_MODELS = list(dict.fromkeys([*MEDIA_URL_FIELDS, *MEDIA_JSON_FIELDS]))
+
+SHA256_NAME = re.compile(r'^([0-9a-f]{64})(?:[-.]|$)')
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_upload(file):
+    """SHA-256 of an UploadedFile, read chunk by chunk (no full copy in memory)"""
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def hash_path(path):
+    """SHA-256 of a file on disk, read in 1MB blocks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_stored(media_file):
+    """All files of `media_file` are still in storage"""
+    storage = get_storage()
+    return all(storage.exists(name) for name in media_file.files)
+
+
+def store_image(file, sha256, size):
+    """
+    Re-encode an image into responsive variants named after `sha256`.
+
+    Returns (media_file, registry, deduplicated). If the same content is
+    already stored, nothing is processed. Raises the errors of process_upload.
+    """
+    media_file = MediaFile.objects.filter(sha256=sha256).first()
+    if media_file and is_stored(media_file):
+        registry = ResponsiveImage.objects.filter(source_url=media_file.url).first()
+        if registry:
+            return media_file, registry, True
+
+    storage = get_storage()
+    with tempfile.TemporaryDirectory(prefix='upload-') as directory:
+        result = process_upload(file, directory, sha256)
+        filenames = [variant['filename'] for items in result['variants'].values() for variant in items]
+        put_files(storage, [
+            (f'products/{filename}', os.path.join(directory, filename))
+            for filename in filenames
+        ])
+
+    largest = result['variants']['webp'][-1]
+    url = storage.url(f"products/{largest['filename']}")
+    registry = register_variants(url, result, storage.url('products/'))
+
+    # New files start with ref_count=0; cleanup_media keeps them for a grace
+    # period so the admin has time to attach the URL to a product
+    media_file, _ = MediaFile.objects.update_or_create(
+        sha256=sha256,
+        defaults={
+            'url': url,
+            'size': size,
+            'files': [f'products/{filename}' for filename in filenames],
+        },
+    )
+    return media_file, registry, False
+
+
+def store_file(path, sha256, extension):
+    """
+    Store a finished file (e.g. a PDF catalog) as-is under files/.
+
+    Returns (media_file, deduplicated). `path` is consumed in both cases.
+    """
+    name = f'files/{sha256}.{extension}'
+    size = os.path.getsize(path)
+
+    media_file = MediaFile.objects.filter(sha256=sha256).first()
+    if media_file and is_stored(media_file):
+        os.remove(path)
+        return media_file, True
+
+    storage = get_storage()
+    put_file(storage, name, path)
+    os.remove(path)
+    media_file, _ = MediaFile.objects.update_or_create(
+        sha256=sha256,
+        defaults={
+            'url': storage.url(name),
+            'size': size,
+            'files': [name],
+        },
+    )
+    return media_file, False
+
+
+def media_key(url):
+    """
+    SHA-256 of the stored file a URL points at, or None.
+    Works for relative and absolute URLs and for every variant of an image.
+    """
+    if not isinstance(url, str) or not url:
+        return None
+    match = SHA256_NAME.match(posixpath.basename(unquote(urlsplit(url).path)))
+    return match.group(1) if match else None
+
+
+def json_urls(value):
+    """Strings anywhere in a JSON value (Product.images is a list of URLs)"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from json_urls(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from json_urls(item)
+
+
+def media_urls(instance):
+    """All URLs in the media fields of a catalog object"""
+    model = type(instance)
+    urls = {getattr(instance, field) for field in MEDIA_URL_FIELDS.get(model, ())}
+    for field in MEDIA_JSON_FIELDS.get(model, ()):
+        urls.update(json_urls(getattr(instance, field)))
+    return {url for url in urls if url}
+
+
+def media_fields(model):
+    return MEDIA_URL_FIELDS.get(model, ()) + MEDIA_JSON_FIELDS.get(model, ())
+
+
+def referencing(model, keys):
+    """Objects of `model` whose media fields mention any of the hashes in `keys` (substring match)"""
+    queryset = model.objects.all()
+    conditions = []
+    for field in MEDIA_URL_FIELDS.get(model, ()):
+        conditions.extend(Q(**{f'{field}__contains': key}) for key in keys)
+    for field in MEDIA_JSON_FIELDS.get(model, ()):
+        queryset = queryset.annotate(**{f'{field}_text': Cast(field, TextField())})
+        conditions.extend(Q(**{f'{field}_text__contains': key}) for key in keys)
+    return queryset.filter(reduce(or_, conditions))
+
+
+def count_references(keys=None):
+    """
+    Number of catalog references per file hash.
+    `keys=None` counts every reference (used by cleanup_media).
+    """
+    counts = Counter()
+    for model in MEDIA_MODELS:
+        queryset = model.objects.all() if keys is None else referencing(model, keys)
+        for obj in queryset.only('pk', *media_fields(model)).iterator():
+            counts.update(filter(None, map(media_key, media_urls(obj))))
+    return counts
+
+
+def is_referenced(media_file):
+    """
+    Any catalog field mentions the hash of `media_file`, in any form.
+    Last check of cleanup_media before deleting: a plain substring search,
+    broader than media_key and current at the time of the delete.
+    """
+    return any(referencing(model, [media_file.sha256]).exists() for model in MEDIA_MODELS)
+
+
+def update_ref_counts(urls=None):
+    """Recompute MediaFile.ref_count for the files `urls` point at (or for all files)"""
+    media_files = MediaFile.objects.all()
+    keys = None
+    if urls is not None:
+        keys = {media_key(url) for url in urls} - {None}
+        if not keys:
+            return 0
+        media_files = media_files.filter(sha256__in=keys)
+
+    media_files = list(media_files.only('id', 'sha256', 'ref_count'))
+    if not media_files:
+        return 0
+
+    counts = count_references(keys)
+    changed = []
+    for media_file in media_files:
+        if media_file.ref_count != counts[media_file.sha256]:
+            media_file.ref_count = counts[media_file.sha256]
+            changed.append(media_file)
+    MediaFile.objects.bulk_update(changed, ['ref_count'])
+    return len(changed)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2 on 2026-10-19 01:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='SHA-256')),
+                ('url', models.CharField(max_length=500, unique=True, verbose_name='URL')),
+                ('size', models.PositiveIntegerField(verbose_name='Размер оригинала')),
+                ('files', models.JSONField(default=list, help_text='Пути всех вариантов относительно MEDIA_ROOT', verbose_name='Файлы')),
+                ('ref_count', models.PositiveIntegerField(db_index=True, default=0, verbose_name='Ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Медиафайл',
+                'verbose_name_plural': 'Медиафайлы',
+                'db_table': 'media_files',
+            },
+        ),
+    ]
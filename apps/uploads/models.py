@@ -1,3 +1,97 @@
+"""
+Models for uploads app
+"""
+
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class MediaFile(models.Model):
+    """
+    Загруженный файл в content-addressed хранилище.
+
+    Файлы называются по SHA-256 содержимого, поэтому одна и та же фотография,
+    загруженная для нескольких цветовых вариаций, хранится один раз.
+    ref_count - число ссылок на любой из файлов (по SHA-256 в имени файла) из
+    полей media_store.MEDIA_URL_FIELDS и Product.images
+    (обновляется сигналами, пересчитывается командой cleanup_media).
+    """
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="SHA-256")
+    url = models.CharField(max_length=500, unique=True, verbose_name="URL")
+    size = models.PositiveIntegerField(verbose_name="Размер оригинала")
+    files = models.JSONField(
+        default=list,
+        verbose_name="Файлы",
+        help_text="Пути всех вариантов относительно MEDIA_ROOT"
+    )
+    ref_count = models.PositiveIntegerField(default=0, db_index=True, verbose_name="Ссылок")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'media_files'
+        verbose_name = 'Медиафайл'
+        verbose_name_plural = 'Медиафайлы'
+
+    def __str__(self):
+        return self.url
+
+
+class UploadSession(models.Model):
+    """
+    Возобновляемая загрузка по частям (init / chunk / complete).
+
+    Части пишутся сразу на диск в CHUNKED_UPLOAD_DIR/<id>.part,
+    `offset` - сколько байт уже принято (с него клиент продолжает после обрыва).
+    """
+    class Status(models.TextChoices):
+        ACTIVE = 'active', 'Загружается'
+        COMPLETE = 'complete', 'Завершена'
+        FAILED = 'failed', 'Ошибка'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255, verbose_name="Имя файла")
+    size = models.PositiveBigIntegerField(verbose_name="Размер")
+    offset = models.PositiveBigIntegerField(default=0, verbose_name="Принято байт")
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.ACTIVE,
+        verbose_name="Статус"
+    )
+    media_file = models.ForeignKey(
+        MediaFile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions',
+        verbose_name="Файл"
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'Сессия загрузки'
+        verbose_name_plural = 'Сессии загрузки'
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.filename)[1].lstrip('.').lower()
+
+    @property
+    def path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{self.id}.part')
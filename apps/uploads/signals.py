@@ -0,0 +1,46 @@
+"""
+Signals keeping MediaFile.ref_count in sync with catalog media fields
+(MEDIA_URL_FIELDS and the URL lists in MEDIA_JSON_FIELDS)
+
+bulk_create/bulk_update/QuerySet.update() bypass these signals;
+cleanup_media recounts all references before deleting anything.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+
+from apps.uploads.media_store import MEDIA_MODELS, media_fields, media_urls, update_ref_counts
+
+
+def _schedule_update(urls):
+    urls = {url for url in urls if url}
+    if urls:
+        transaction.on_commit(lambda: update_ref_counts(urls))
+
+
+def remember_media_urls(sender, instance, raw=False, **kwargs):
+    """Запоминаем старые URL, чтобы пересчитать и их после сохранения"""
+    if raw or instance.pk is None:
+        instance._media_urls_before = set()
+        return
+    previous = sender.objects.filter(pk=instance.pk).only('pk', *media_fields(sender)).first()
+    instance._media_urls_before = media_urls(previous) if previous else set()
+
+
+def media_urls_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_media_urls_before', set())
+    after = media_urls(instance)
+    if before != after:
+        _schedule_update(before | after)
+
+
+def media_urls_deleted(sender, instance, **kwargs):
+    _schedule_update(media_urls(instance))
+
+
+for model in MEDIA_MODELS:
+    pre_save.connect(remember_media_urls, sender=model)
+    post_save.connect(media_urls_saved, sender=model)
+    post_delete.connect(media_urls_deleted, sender=model)
@@ -0,0 +1,175 @@
+"""
+Media storage backends
+
+MEDIA_STORAGE_BACKEND selects where uploads and catalog media live:
+- filesystem: MEDIA_ROOT served under MEDIA_URL (Django FileSystemStorage)
+- s3: any S3-compatible service (Cloudflare R2, MinIO or another local
+  stand-in via S3_ENDPOINT_URL), public URLs under S3_PUBLIC_URL
+
+Both are Django Storage objects. Names are relative keys ("products/<sha256>-640w.webp").
+The S3 backend shares one pooled client between threads and uploads large
+files as parallel multipart uploads; boto3 is only needed when it is used.
+"""
+
+import mimetypes
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urljoin
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.functional import cached_property
+
+BACKENDS = ('filesystem', 's3')
+
+_storages = {}
+
+
+@deconstructible
+class S3Storage(Storage):
+    """Storage on an S3-compatible bucket; keys are never renamed (content-addressed names)"""
+
+    def __init__(self, bucket=None, endpoint_url=None, public_url=None):
+        self.bucket = bucket or settings.S3_BUCKET
+        self.endpoint_url = endpoint_url or settings.S3_ENDPOINT_URL or None
+        self.public_url = public_url or settings.S3_PUBLIC_URL
+        if not self.bucket:
+            raise ImproperlyConfigured('S3_BUCKET is required for MEDIA_STORAGE_BACKEND=s3')
+
+    @cached_property
+    def client(self):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError:
+            raise ImproperlyConfigured('MEDIA_STORAGE_BACKEND=s3 requires boto3 (pip install boto3)')
+
+        # botocore clients are thread-safe; one client = one shared connection pool
+        return boto3.client(
+            's3',
+            endpoint_url=self.endpoint_url,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            region_name=settings.S3_REGION,
+            config=Config(
+                max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+                retries={'max_attempts': 5, 'mode': 'standard'},
+                # Path-style addressing works with local stand-ins without DNS tricks
+                s3={'addressing_style': 'path'},
+            ),
+        )
+
+    @cached_property
+    def transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.S3_MAX_CONCURRENCY,
+        )
+
+    def _is_missing(self, error):
+        return error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound')
+
+    def _open(self, name, mode='rb'):
+        # Ranged parallel download into a spooled file (seekable, bounded memory)
+        spooled = tempfile.SpooledTemporaryFile(max_size=settings.S3_MULTIPART_THRESHOLD)
+        self.client.download_fileobj(self.bucket, name, spooled, Config=self.transfer_config)
+        spooled.seek(0)
+        return File(spooled, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        self.client.upload_fileobj(
+            content,
+            self.bucket,
+            name,
+            ExtraArgs={
+                'ContentType': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+                'CacheControl': settings.S3_CACHE_CONTROL,
+            },
+            Config=self.transfer_config,
+        )
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def exists(self, name):
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=name)
+        except ClientError as e:
+            if self._is_missing(e):
+                return False
+            raise
+        return True
+
+    def delete(self, name):
+        self.client.delete_object(Bucket=self.bucket, Key=name)
+
+    def size(self, name):
+        return self.client.head_object(Bucket=self.bucket, Key=name)['ContentLength']
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = [], []
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            directories.extend(p['Prefix'][len(prefix):].rstrip('/') for p in page.get('CommonPrefixes', []))
+            files.extend(o['Key'][len(prefix):] for o in page.get('Contents', []))
+        return directories, files
+
+    def url(self, name):
+        return urljoin(self.public_url, quote(name))
+
+
+def get_storage(backend=None):
+    """Storage instance for `backend` (default: MEDIA_STORAGE_BACKEND), cached per process"""
+    backend = backend or settings.MEDIA_STORAGE_BACKEND
+    if backend not in _storages:
+        if backend == 'filesystem':
+            _storages[backend] = FileSystemStorage(location=settings.MEDIA_ROOT, base_url=settings.MEDIA_URL)
+        elif backend == 's3':
+            _storages[backend] = S3Storage()
+        else:
+            raise ImproperlyConfigured(f'Unknown MEDIA_STORAGE_BACKEND: {backend} (use one of {", ".join(BACKENDS)})')
+    return _storages[backend]
+
+
+def name_from_url(url, storage=None):
+    """Storage name for a public URL of `storage`, or None if the URL is elsewhere"""
+    storage = storage or get_storage()
+    base_url = storage.url('')
+    if url and url.startswith(base_url):
+        return url[len(base_url):]
+    return None
+
+
+def put_file(storage, name, path, overwrite=False):
+    """
+    Upload a local file under `name`.
+    Existing names are kept as-is (content-addressed) unless `overwrite`.
+    """
+    if storage.exists(name):
+        if not overwrite:
+            return name
+        # FileSystemStorage would otherwise save under a new "_abc123" name
+        storage.delete(name)
+    with open(path, 'rb') as f:
+        return storage.save(name, File(f, name=os.path.basename(name)))
+
+
+def put_files(storage, files, workers=None, overwrite=False):
+    """Upload [(name, local path)] in parallel; returns the stored names"""
+    files = list(files)
+    if len(files) <= 1:
+        return [put_file(storage, name, path, overwrite) for name, path in files]
+    with ThreadPoolExecutor(max_workers=workers or settings.MEDIA_UPLOAD_WORKERS) as executor:
+        return list(executor.map(lambda item: put_file(storage, *item, overwrite=overwrite), files))
@@ -3,8 +3,13 @@ URL Configuration for Uploads App
 """
 
 from django.urls import path
-from apps.uploads.views import ImageUploadView
+from apps.uploads.views import (
+    ImageUploadView, ChunkedUploadInitView, ChunkedUploadSessionView, ChunkedUploadCompleteView
+)
 
 urlpatterns = [
     path('upload/', ImageUploadView.as_view(), name='image-upload'),
+    path('upload/sessions/', ChunkedUploadInitView.as_view(), name='upload-session-init'),
+    path('upload/sessions/<uuid:pk>/', ChunkedUploadSessionView.as_view(), name='upload-session'),
+    path('upload/sessions/<uuid:pk>/complete/', ChunkedUploadCompleteView.as_view(), name='upload-session-complete'),
 ]
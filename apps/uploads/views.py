@@ -3,14 +3,75 @@ Views for file uploads
 Admin-only access
 """
 
+import hashlib
 import os
-import uuid
+import re
+import shutil
+import tempfile
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
 from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from PIL import Image, UnidentifiedImageError
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from apps.products.permissions import IsAdmin
+from apps.uploads.media_store import hash_path, hash_upload, store_file, store_image
+from apps.uploads.models import UploadSession
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunk writes rely on the offset compare-and-set alone
+    fcntl = None
+
+SHA256_HEX = re.compile(r'[0-9a-f]{64}')
+
+
+def image_payload(media_file, registry, deduplicated):
+    """Response body for a stored image (ImageUploadView / chunked upload)"""
+    variants = {}
+    for variant in sorted(registry.variants, key=lambda v: v['width']):
+        variants.setdefault(variant['format'], []).append({
+            'width': variant['width'],
+            'height': variant['height'],
+            'url': variant['url'],
+            'size': variant.get('size'),
+        })
+
+    return {
+        'url': media_file.url,
+        'filename': media_file.url.rsplit('/', 1)[-1],
+        'sha256': media_file.sha256,
+        'deduplicated': deduplicated,
+        'size': media_file.size,
+        'width': registry.width,
+        'height': registry.height,
+        'placeholder': registry.placeholder,
+        'variants': variants,
+    }
+
+
+@contextmanager
+def part_lock(session):
+    """
+    Exclusive lock on the session's part file, held while a received chunk
+    is written and while the upload is completed (across worker processes).
+    Callers re-read the session under the lock: the part file is removed
+    when the upload completes or fails, then there is nothing to lock.
+    """
+    try:
+        f = open(session.path, 'rb') if fcntl is not None else None
+    except FileNotFoundError:
+        f = None
+    if f is None:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
 
 
 class ImageUploadView(APIView):
@@ -18,10 +79,32 @@ class ImageUploadView(APIView):
     Upload image file
     POST /api/v1/admin/upload/
 
+    The image is re-encoded without metadata into several widths
+    (see apps/uploads/images.py); `url` points to the largest WebP.
+
+    Files are stored under the SHA-256 of the uploaded content: uploading
+    the same file again returns the already stored variants
+    ("deduplicated": true) instead of writing new copies.
+
     Returns:
     {
-        "url": "/media/products/uuid-filename.jpg"
+        "url": "/media/products/<sha256>-1920w.webp",
+        "filename": "<sha256>-1920w.webp",
+        "sha256": "<sha256>",
+        "deduplicated": false,
+        "size": 2483123,
+        "width": 1920,
+        "height": 1280,
+        "placeholder": "data:image/webp;base64,...",
+        "variants": {
+            "webp": [{"width": 320, "height": 213, "url": "...-320w.webp", "size": 9120}, ...],
+            "jpeg": [...]
+        }
     }
+
+    The variants are also stored in the ResponsiveImage registry under `url`,
+    so product/collection serializers can return srcset for it.
+    Files larger than 5MB go through the chunked upload (ChunkedUploadInitView).
     """
     permission_classes = [IsAdmin]
     parser_classes = [MultiPartParser, FormParser]
@@ -53,23 +136,302 @@ class ImageUploadView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4().hex}_{file.name}"
-        file_path = os.path.join(settings.MEDIA_ROOT, 'products', unique_filename)
+        try:
+            # Content address: identical uploads map to the same files
+            media_file, registry, deduplicated = store_image(file, hash_upload(file), file.size)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+            return Response(
+                {'error': 'File is not a valid image'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except FutureTimeoutError:
+            return Response(
+                {'error': 'Image processing timed out, please retry'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        return Response(
+            image_payload(media_file, registry, deduplicated),
+            status=status.HTTP_200_OK if deduplicated else status.HTTP_201_CREATED
+        )
+
+
+class ChunkedUploadInitView(APIView):
+    """
+    Start a resumable upload
+    POST /api/v1/admin/upload/sessions/
+    {"filename": "catalog-2025.pdf", "size": 73400320}
+
+    Returns:
+    {"id": "<uuid>", "offset": 0, "size": 73400320, "max_chunk_size": 8388608}
+
+    Protocol:
+    1. PUT /upload/sessions/{id}/ with raw bytes (Content-Type: application/octet-stream)
+       and header `Upload-Offset: <offset>`; repeat until offset == size.
+       With `Upload-Checksum: sha256 <hex of the chunk>` a chunk damaged in
+       transit is rejected (400) and the offset stays: re-send that chunk.
+    2. After a network error GET /upload/sessions/{id}/ and continue from `offset`.
+    3. POST /upload/sessions/{id}/complete/ {"sha256": "<hex>"} verifies the
+       checksum and stores the file (images get responsive variants,
+       other files are stored as-is under /media/files/). On a mismatch the
+       session and the received bytes are kept, complete can be retried.
+    """
+    permission_classes = [IsAdmin]
+    parser_classes = [JSONParser]
+
+    ALLOWED_EXTENSIONS = ['pdf', 'zip', 'jpg', 'jpeg', 'png', 'webp']
+
+    def post(self, request):
+        filename = os.path.basename(str(request.data.get('filename', '')))
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'size is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        extension = os.path.splitext(filename)[1].lstrip('.').lower()
+        if extension not in self.ALLOWED_EXTENSIONS:
+            return Response(
+                {'error': f'Invalid file type. Allowed: {", ".join(self.ALLOWED_EXTENSIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Save file
-        with open(file_path, 'wb+') as destination:
-            for chunk in file.chunks():
-                destination.write(chunk)
+        if not 0 < size <= settings.CHUNKED_UPLOAD_MAX_SIZE:
+            return Response(
+                {'error': f'Invalid size. Max size: {settings.CHUNKED_UPLOAD_MAX_SIZE / 1024 / 1024}MB'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Return URL
-        file_url = f"{settings.MEDIA_URL}products/{unique_filename}"
+        session = UploadSession.objects.create(
+            filename=filename,
+            size=size,
+            created_by=request.user,
+        )
+        os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+        open(session.path, 'wb').close()
 
         return Response({
-            'url': file_url,
-            'filename': unique_filename,
-            'size': file.size
+            'id': session.id,
+            'offset': session.offset,
+            'size': session.size,
+            'max_chunk_size': settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE,
         }, status=status.HTTP_201_CREATED)
+
+
+class ChunkedUploadSessionView(APIView):
+    """
+    Upload session status / append a chunk
+    GET /api/v1/admin/upload/sessions/{id}/
+    PUT /api/v1/admin/upload/sessions/{id}/   (raw body, header Upload-Offset,
+                                               optional Upload-Checksum: sha256 <hex>)
+
+    A chunk is accepted only at the current offset (409 with the current
+    offset otherwise), so retries after a lost response are safe.
+    The body is never parsed by DRF: it is received into a temporary file in
+    64KB blocks, then written at the offset under part_lock, and the offset
+    is moved with a compare-and-set. No transaction is open while the client
+    sends the body.
+    """
+    permission_classes = [IsAdmin]
+    parser_classes = []
+
+    BLOCK_SIZE = 64 * 1024
+
+    def get(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk)
+        return Response(self._state(session))
+
+    def put(self, request, pk):
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            return Response(
+                {'error': 'Upload-Offset header is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if length > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            return Response(
+                {'error': f'Chunk too large. Max size: {settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        checksum = request.headers.get('Upload-Checksum')
+        if checksum is not None:
+            algorithm, _, checksum = checksum.partition(' ')
+            checksum = checksum.strip().lower()
+            if algorithm.lower() != 'sha256' or not SHA256_HEX.fullmatch(checksum):
+                return Response(
+                    {'error': 'Upload-Checksum must be "sha256 <hex digest of the chunk>"'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        session = get_object_or_404(UploadSession, pk=pk)
+        rejected = self._reject(session, offset, length)
+        if rejected:
+            return rejected
+
+        # Receive the whole chunk before locking anything: a slow client
+        # holds neither a database transaction nor the part file
+        with tempfile.TemporaryFile(dir=settings.CHUNKED_UPLOAD_DIR) as chunk:
+            received, digest = self._receive(request.stream, length, chunk)
+            if checksum is not None and digest != checksum:
+                return Response(
+                    {'error': 'Chunk checksum mismatch', 'sha256': digest, **self._state(session)},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            with part_lock(session):
+                session.refresh_from_db()
+                rejected = self._reject(session, offset, length)
+                if rejected:
+                    return rejected
+                self._write(session, offset, chunk)
+                # Compare-and-set: only the writer that found `offset` moves it
+                moved = UploadSession.objects.filter(
+                    pk=session.pk, status=UploadSession.Status.ACTIVE, offset=offset
+                ).update(offset=offset + received, updated_at=timezone.now())
+
+        session.refresh_from_db()
+        if not moved:
+            return self._reject(session, offset, length) or Response(
+                {'error': 'Offset mismatch', **self._state(session)},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(self._state(session))
+
+    def _reject(self, session, offset, length):
+        """Error response if a chunk of `length` bytes cannot be appended at `offset`"""
+        if session.status != UploadSession.Status.ACTIVE:
+            return Response(
+                {'error': f'Upload is {session.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if offset != session.offset:
+            return Response(
+                {'error': 'Offset mismatch', **self._state(session)},
+                status=status.HTTP_409_CONFLICT
+            )
+        if offset + length > session.size:
+            return Response(
+                {'error': 'Chunk exceeds declared file size'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
+
+    def _receive(self, stream, length, chunk):
+        """Copy up to `length` bytes from `stream` into `chunk`; returns (bytes received, hex SHA-256)"""
+        received = 0
+        digest = hashlib.sha256()
+        while stream is not None and received < length:
+            block = stream.read(min(self.BLOCK_SIZE, length - received))
+            if not block:
+                break  # client disconnected: keep what arrived, client resumes
+            chunk.write(block)
+            digest.update(block)
+            received += len(block)
+        return received, digest.hexdigest()
+
+    def _write(self, session, offset, chunk):
+        """Write the received chunk at `offset` of the part file"""
+        chunk.seek(0)
+        with open(session.path, 'r+b') as f:
+            f.seek(offset)
+            shutil.copyfileobj(chunk, f, self.BLOCK_SIZE)
+            # Drop bytes of an earlier interrupted attempt past the new offset
+            f.truncate()
+
+    def _state(self, session):
+        return {
+            'id': session.id,
+            'offset': session.offset,
+            'size': session.size,
+            'status': session.status,
+        }
+
+
+class ChunkedUploadCompleteView(APIView):
+    """
+    Finish a resumable upload
+    POST /api/v1/admin/upload/sessions/{id}/complete/
+    {"sha256": "<hex digest of the whole file>"}
+
+    Images return the same body as ImageUploadView, other files:
+    {"url": "/media/files/<sha256>.pdf", "absolute_url": "https://...", "sha256": "...",
+     "size": 73400320, "deduplicated": false}
+    """
+    permission_classes = [IsAdmin]
+    parser_classes = [JSONParser]
+
+    def post(self, request, pk):
+        data = request.data if isinstance(request.data, dict) else {}
+        expected = str(data.get('sha256', '')).strip().lower()
+        # Checked before the file is touched: a client bug must not cost the upload
+        if not SHA256_HEX.fullmatch(expected):
+            return Response(
+                {'error': 'sha256 must be the hex SHA-256 digest of the whole file'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        session = get_object_or_404(UploadSession, pk=pk)
+        # Serializes completion with chunk writes and with a second complete
+        # request; no database transaction is held while the file is hashed
+        with part_lock(session):
+            session.refresh_from_db()
+            return self._complete(request, session, expected)
+
+    def _complete(self, request, session, expected):
+        if session.status != UploadSession.Status.ACTIVE:
+            return Response(
+                {'error': f'Upload is {session.status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if session.offset != session.size:
+            return Response(
+                {'error': 'Upload is not finished', 'offset': session.offset, 'size': session.size},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        sha256 = hash_path(session.path)
+        if sha256 != expected:
+            # The session and the received bytes stay: the client can retry
+            # (abandoned sessions are removed by cleanup_media)
+            return Response(
+                {'error': 'Checksum mismatch', 'sha256': sha256, 'offset': session.offset, 'size': session.size},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if session.extension in ImageUploadView.ALLOWED_EXTENSIONS:
+            try:
+                with open(session.path, 'rb') as f:
+                    media_file, registry, deduplicated = store_image(f, sha256, session.size)
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+                return Response(
+                    {'error': 'File is not a valid image'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except FutureTimeoutError:
+                return Response(
+                    {'error': 'Image processing timed out, please retry'},
+                    status=status.HTTP_503_SERVICE_UNAVAILABLE
+                )
+            os.remove(session.path)
+            payload = image_payload(media_file, registry, deduplicated)
+        else:
+            media_file, deduplicated = store_file(session.path, sha256, session.extension)
+            payload = {
+                'url': media_file.url,
+                'sha256': media_file.sha256,
+                'size': media_file.size,
+                'deduplicated': deduplicated,
+            }
+
+        session.status = UploadSession.Status.COMPLETE
+        session.media_file = media_file
+        session.save(update_fields=['status', 'media_file', 'updated_at'])
+
+        # Material.file_url is a URLField, so also return an absolute URL
+        payload['absolute_url'] = request.build_absolute_uri(media_file.url)
+        return Response(payload, status=status.HTTP_201_CREATED)
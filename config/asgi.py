@@ -3,14 +3,41 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+ASGI mode serves the async catalog/search views (apps/products/async_views.py);
+run it with uvicorn workers, see ASGI_DEPLOYMENT.md:
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+os.environ.setdefault("ASGI_MODE", "True")
+
+from django.conf import settings  # noqa: E402
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.exceptions import SuspiciousFileOperation  # noqa: E402
+from django.http import Http404  # noqa: E402
+from django.views import static  # noqa: E402
+
+
+class CollectedStaticFilesHandler(ASGIStaticFilesHandler):
+    """
+    Static files from STATIC_ROOT, replacing the sync WhiteNoise middleware.
+
+    The stock handler looks files up with the staticfiles finders, which do not
+    know the hashed names written by CompressedManifestStaticFilesStorage.
+    """
+
+    def serve(self, request):
+        try:
+            return static.serve(request, self.file_path(request.path), document_root=settings.STATIC_ROOT)
+        except SuspiciousFileOperation:  # ../ outside STATIC_ROOT
+            raise Http404
+
 
-application = get_asgi_application()
+application = CollectedStaticFilesHandler(get_asgi_application())
@@ -0,0 +1,142 @@
+"""
+Primary / read-replica database routing
+
+Replicas are configured with DATABASE_REPLICA_URLS (comma-separated, aliases
+replica_1, replica_2, ...). Reads go to a random replica only when all of these hold:
+
+- the request is GET/HEAD/OPTIONS and its view has `use_read_replica = True`
+  (ProductViewSet, SearchViewSet, catalog views)
+- nothing has been written in this request yet: the first write pins the
+  rest of the request to the primary
+- the client did not write recently: a request that wrote sets a short-lived
+  cookie (DB_REPLICA_PIN_SECONDS) so the client reads its own writes despite
+  replication lag
+
+Everything else (admin, admin API, writes, management commands, the job
+worker) uses `default`. State is kept in a contextvar, so it works for
+threaded and async workers.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@dataclass
+class RoutingState:
+    request: object = None
+    pinned: bool = False
+    wrote: bool = False
+    _replica_allowed: bool = None
+
+    @property
+    def replica_allowed(self):
+        # Resolved on the first read: the view is known once URL resolution
+        # has set request.resolver_match (no process_view, which would cost
+        # a thread hop per request under ASGI)
+        if self._replica_allowed is None:
+            match = getattr(self.request, 'resolver_match', None)
+            if match is None:
+                return False
+            self._replica_allowed = view_uses_read_replica(match.func)
+        return self._replica_allowed
+
+
+def view_uses_read_replica(view_func):
+    # DRF: as_view() keeps the class in .cls, Django CBV in .view_class
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return bool(getattr(view_class, 'use_read_replica', False) or getattr(view_func, 'use_read_replica', False))
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+@contextmanager
+def use_primary():
+    """Force reads inside the block to the primary (e.g. read-modify-write in a public view)"""
+    token = _state.set(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or not state.replica_allowed:
+            return PRIMARY
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else PRIMARY
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """Sets up RoutingState per request and the read-your-writes pin cookie"""
+
+    cookie_name = 'db_pinned'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = self.start(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(request, response, state)
+
+    def start(self, request):
+        return RoutingState(
+            request=request,
+            pinned=request.method not in SAFE_METHODS or self.cookie_name in request.COOKIES,
+        )
+
+    def finish(self, request, response, state):
+        if state.wrote and replica_aliases():
+            response.set_cookie(
+                self.cookie_name,
+                '1',
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
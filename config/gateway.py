@@ -0,0 +1,61 @@
+"""
+Gateway: the Django project and the FastAPI app (app/) in one ASGI process.
+
+Requests under settings.GATEWAY_FASTAPI_PREFIX (/api/fastapi by default) go
+to FastAPI, everything else to Django in ASGI mode (config/asgi.py):
+
+    gunicorn config.gateway:application -k uvicorn.workers.UvicornWorker
+
+    /api/v1/...             -> Django (DRF, admin, static files)
+    /api/fastapi/products   -> FastAPI GET /products
+    /api/fastapi/docs       -> FastAPI Swagger UI
+
+Each app keeps its own database and pool: both define users, categories
+and products tables with different columns, so they cannot share a
+database. The FastAPI side reads FASTAPI_DATABASE_URL and FASTAPI_SECRET_KEY
+(see app/core/config.py); here both are required, startup fails without
+them. See ASGI_DEPLOYMENT.md.
+"""
+
+import contextlib
+
+from decouple import config
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from starlette.routing import Mount, Router
+
+# Checked before app.core.config is imported: alone, FastAPI falls back to
+# DATABASE_URL / SECRET_KEY, which in this process are Django's
+FASTAPI_REQUIRED = ('FASTAPI_DATABASE_URL', 'FASTAPI_SECRET_KEY')
+missing = [name for name in FASTAPI_REQUIRED if not config(name, default='')]
+if missing:
+    raise ImproperlyConfigured(
+        f'The gateway requires {" and ".join(missing)}: FastAPI must not fall back '
+        f'to DATABASE_URL / SECRET_KEY, they are Django\'s (see ASGI_DEPLOYMENT.md)'
+    )
+
+from config.asgi import application as django_application  # noqa: E402
+from app.main import app as fastapi_application  # noqa: E402
+from app.db.database import engine as fastapi_engine  # noqa: E402
+
+
+@contextlib.asynccontextmanager
+async def lifespan(router):
+    """
+    Django's ASGI handler does not accept lifespan events, the gateway
+    answers them: runs FastAPI's lifespan, closes its pool on shutdown
+    """
+    async with fastapi_application.router.lifespan_context(fastapi_application):
+        yield
+    await fastapi_engine.dispose()
+
+
+# Mount keeps the full path and sets root_path: FastAPI routes and its
+# /docs links work under the prefix
+application = Router(
+    routes=[
+        Mount(settings.GATEWAY_FASTAPI_PREFIX, app=fastapi_application),
+        Mount('', app=django_application),
+    ],
+    lifespan=lifespan,
+)
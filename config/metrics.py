@@ -0,0 +1,513 @@
+"""
+Request performance metrics (Prometheus histograms per view).
+
+PerformanceMetricsMiddleware samples PERF_METRICS_SAMPLE_RATE of the requests
+and records, per resolved view (ProductViewSet.list, AsyncSearchView.get, ...):
+
+- wall time (the rest of the middleware chain and the view)
+- database time and query count (execute_wrapper on the request's connections)
+- duplicate queries: same SQL more than once in a request, the N+1 signature
+- serializer time: DRF serializer .data, i.e. to_representation (including
+  the queries it triggers, which also count as database time)
+- render time: JSON rendering of the response (TimedJSONRenderer)
+- response size in bytes
+
+Each worker process observes into its own histograms and writes a snapshot
+of them (and of its connection pools) to PERF_METRICS_DIR every
+PERF_METRICS_FLUSH_INTERVAL seconds. GET /api/v1/admin/metrics/ (admin only)
+merges the snapshots of all workers of the host, so whichever worker answers
+the scrape, the series are the same monotonic counters (at most one interval
+behind). Snapshots of exited workers keep counting towards the histograms
+and pool counters; pool gauges only come from running workers. At each
+scrape the files of exited workers are added to one aggregate file
+(exited.json) and deleted, so worker restarts do not grow the directory.
+Series carry a host label: replicas are separate hosts with separate
+directories.
+
+With the rate at 0 (default) the middleware removes itself (MiddlewareNotUsed)
+and TimedJSONRenderer costs one ContextVar lookup; serializer .data is only
+wrapped once the middleware is enabled.
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.serializers import BaseSerializer
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, scrapes may race while folding
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+BYTES_BUCKETS = (1_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+
+class Histogram:
+    """Prometheus histogram with one label (view); thread-safe"""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # view -> [count per bucket (+Inf last), sum]
+        self._series = defaultdict(lambda: [[0] * (len(buckets) + 1), 0.0])
+
+    def observe(self, view, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._series[view]
+            series[0][index] += 1
+            series[1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self):
+        """{view: [counts per bucket, sum]} of this process"""
+        with self._lock:
+            return {view: [list(counts), total] for view, (counts, total) in self._series.items()}
+
+    def exposition(self, series, host):
+        """Text lines for `series` ({view: [counts, sum]}, merged from all workers)"""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for view, (counts, total) in sorted(series.items()):
+            label = f'host="{escape_label(host)}",view="{escape_label(view)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {total:g}')
+            lines.append(f'{self.name}_count{{{label}}} {cumulative}')
+        return lines
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+REQUEST_SECONDS = Histogram('lamis_request_duration_seconds', 'Wall time of sampled requests', TIME_BUCKETS)
+DB_SECONDS = Histogram('lamis_request_db_seconds', 'Time spent in database queries per request', TIME_BUCKETS)
+QUERIES = Histogram('lamis_request_queries', 'Database queries per request', COUNT_BUCKETS)
+DUPLICATE_QUERIES = Histogram(
+    'lamis_request_duplicate_queries', 'Queries repeating an earlier SQL of the same request (N+1)', COUNT_BUCKETS
+)
+SERIALIZER_SECONDS = Histogram(
+    'lamis_request_serializer_seconds', 'DRF serializer .data (to_representation) time per request', TIME_BUCKETS
+)
+RENDER_SECONDS = Histogram('lamis_request_render_seconds', 'JSON rendering time per request', TIME_BUCKETS)
+RESPONSE_BYTES = Histogram('lamis_response_bytes', 'Response body size', BYTES_BUCKETS)
+
+HISTOGRAMS = (
+    REQUEST_SECONDS, DB_SECONDS, QUERIES, DUPLICATE_QUERIES, SERIALIZER_SECONDS, RENDER_SECONDS, RESPONSE_BYTES
+)
+
+
+class RequestMetrics:
+    """Measurements of one sampled request"""
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0  # nested .data (SerializerMethodField) is already inside the outer one
+        self.render_seconds = 0.0
+        self.queries = Counter()  # SQL (placeholders, no values) -> executions
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries[sql] += 1
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.queries.values())
+
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def view_label(request):
+    """ProductViewSet.list, AsyncSearchView.get, ... or 'unresolved' (404)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    func = match.func
+    # DRF: as_view() keeps the class in .cls (and the viewset actions), Django CBV in .view_class
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return getattr(func, '__qualname__', match.view_name or 'unknown')
+    method = request.method.lower()
+    action = (getattr(func, 'actions', None) or {}).get(method, method)
+    return f'{view_class.__name__}.{action}'
+
+
+class PerformanceMetricsMiddleware:
+    """
+    Records the histograms above for a sample of the requests.
+
+    Database time is measured like StatementTimeoutMiddleware sets its
+    timeout: execute_wrapper on the connections of the request's thread
+    (under ASGI the thread-sensitive thread of the async ORM and sync views).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.PERF_METRICS_SAMPLE_RATE
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        start_flusher()
+        install_serializer_timer()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        stack = self.install(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.close()
+            _current.reset(token)
+        self.record(request, response, metrics, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        stack = await sync_to_async(self.install)(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        self.record(request, response, metrics, elapsed)
+        return response
+
+    def install(self, metrics):
+        stack = ExitStack()
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(metrics.record_query))
+        return stack
+
+    def record(self, request, response, metrics, elapsed):
+        view = view_label(request)
+        REQUEST_SECONDS.observe(view, elapsed)
+        DB_SECONDS.observe(view, metrics.db_seconds)
+        QUERIES.observe(view, metrics.query_count)
+        DUPLICATE_QUERIES.observe(view, metrics.duplicate_count)
+        SERIALIZER_SECONDS.observe(view, metrics.serializer_seconds)
+        RENDER_SECONDS.observe(view, metrics.render_seconds)
+        size = response_size(response)
+        if size is not None:
+            RESPONSE_BYTES.observe(view, size)
+
+        threshold = settings.PERF_METRICS_DUPLICATE_WARNING
+        if threshold and metrics.duplicate_count >= threshold:
+            sql, count = metrics.queries.most_common(1)[0]
+            logger.warning(
+                'Possible N+1 in %s: %d duplicate queries, %d x %s',
+                view, metrics.duplicate_count, count, sql[:300]
+            )
+
+
+def response_size(response):
+    if not getattr(response, 'streaming', False):
+        return len(response.content)
+    length = response.get('Content-Length')
+    return int(length) if length else None
+
+
+_serializer_data = BaseSerializer.data
+
+
+def timed_serializer_data(serializer):
+    metrics = _current.get()
+    if metrics is None or metrics.serializer_depth:
+        return _serializer_data.fget(serializer)
+    metrics.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        return _serializer_data.fget(serializer)
+    finally:
+        metrics.serializer_seconds += time.perf_counter() - started
+        metrics.serializer_depth -= 1
+
+
+def install_serializer_timer():
+    """
+    Time BaseSerializer.data for sampled requests.
+
+    Serializer.data and ListSerializer.data wrap BaseSerializer.data, so every
+    viewset mixin (list, retrieve, create, ...) and APIView is covered
+    without changing the views.
+    """
+    BaseSerializer.data = property(timed_serializer_data)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """DRF JSONRenderer adding its time to the sampled request's render time"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_seconds += time.perf_counter() - started
+
+
+class PrometheusRenderer(BaseRenderer):
+    """Prometheus text exposition format"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode(self.charset) if isinstance(data, str) else data
+
+
+POOL_GAUGES = {'max_size', 'in_use', 'idle'}  # the other pool stats are counters
+AGGREGATE_FILE = 'exited.json'
+
+_flush_lock = threading.Lock()
+_snapshot_path = None  # (pid, file of this process in PERF_METRICS_DIR)
+_flusher_pid = None
+
+
+def snapshot_path():
+    """<pid>-<start time>.json: a restarted worker reusing a pid gets a new file"""
+    global _snapshot_path
+    pid = os.getpid()
+    if _snapshot_path is None or _snapshot_path[0] != pid:
+        os.makedirs(settings.PERF_METRICS_DIR, exist_ok=True)
+        _snapshot_path = (pid, os.path.join(settings.PERF_METRICS_DIR, f'{pid}-{time.time_ns()}.json'))
+    return _snapshot_path[1]
+
+
+def flush():
+    """Write the histograms and pool stats of this process to its snapshot file"""
+    from config.postgresql_pool.base import pool_stats
+
+    data = {
+        'pid': os.getpid(),
+        'histograms': {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS},
+        'pools': pool_stats(),
+    }
+    with _flush_lock:
+        path = snapshot_path()
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(data, f)
+        os.replace(f'{path}.tmp', path)  # readers never see a partial file
+
+
+def start_flusher():
+    """Daemon thread flushing every PERF_METRICS_FLUSH_INTERVAL and at exit, once per process"""
+    global _flusher_pid
+    with _flush_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+
+    def run():
+        while True:
+            time.sleep(settings.PERF_METRICS_FLUSH_INTERVAL)
+            try:
+                flush()
+            except Exception:
+                logger.exception('Could not write the metrics snapshot')
+
+    threading.Thread(target=run, name='metrics-flusher', daemon=True).start()
+    # A worker recycled by max_requests or stopped on deploy keeps its last interval
+    atexit.register(flush)
+
+
+def is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def load_snapshots(skip=()):
+    """[(filename, snapshot, running)] of every worker file in PERF_METRICS_DIR, except `skip`"""
+    directory = settings.PERF_METRICS_DIR
+    latest = {}  # pid -> newest file: an older file with the same pid is a previous process
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith('.json') or filename == AGGREGATE_FILE or filename in skip:
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        started = int(filename[:-len('.json')].rsplit('-', 1)[-1])
+        snapshots.append((filename, snapshot, started))
+        pid = snapshot['pid']
+        latest[pid] = max(latest.get(pid, 0), started)
+    return [
+        (filename, snapshot, started == latest[snapshot['pid']] and is_running(snapshot['pid']))
+        for filename, snapshot, started in snapshots
+    ]
+
+
+def load_aggregate():
+    """Totals of the exited workers folded so far, and the names of their files"""
+    try:
+        with open(os.path.join(settings.PERF_METRICS_DIR, AGGREGATE_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'histograms': {}, 'pools': {}, 'folded': []}
+
+
+def add_snapshot(aggregate, snapshot):
+    """Add the histograms and pool counters (not gauges) of a worker snapshot to `aggregate`"""
+    for name, series in snapshot['histograms'].items():
+        merged = aggregate['histograms'].setdefault(name, {})
+        for view, (counts, total) in series.items():
+            current = merged.get(view)
+            if current is None:
+                merged[view] = [list(counts), total]
+            elif len(current[0]) == len(counts):
+                merged[view] = [[a + b for a, b in zip(current[0], counts)], current[1] + total]
+    for alias, stats in snapshot['pools'].items():
+        for name, value in stats.items():
+            if name not in POOL_GAUGES:
+                pools = aggregate['pools'].setdefault(alias, {})
+                pools[name] = pools.get(name, 0) + value
+
+
+def collect():
+    """
+    [(snapshot, running)] of the running workers plus one for all exited ones.
+
+    Files of exited workers are added to AGGREGATE_FILE, then deleted. The
+    aggregate lists the files it contains, so a file left behind by a crash
+    between the two steps is not counted twice (and is deleted next time). Runs under an exclusive
+    lock: a concurrent scrape never sees a file both in the aggregate and
+    on its own.
+    """
+    directory = settings.PERF_METRICS_DIR
+    with open(os.path.join(directory, '.lock'), 'a') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        aggregate = load_aggregate()
+        folded = set(aggregate['folded'])
+        snapshots = load_snapshots(skip=folded)
+        exited = [filename for filename, _, running in snapshots if not running]
+        if exited:
+            for filename, snapshot, running in snapshots:
+                if not running:
+                    add_snapshot(aggregate, snapshot)
+            # Names of files already deleted are dropped, they cannot come back
+            aggregate['folded'] = sorted(
+                {name for name in folded if os.path.exists(os.path.join(directory, name))} | set(exited)
+            )
+            path = os.path.join(directory, AGGREGATE_FILE)
+            with open(f'{path}.tmp', 'w') as f:
+                json.dump(aggregate, f)
+            os.replace(f'{path}.tmp', path)
+        # Counted in the aggregate: every folded file still on disk can go
+        for filename in aggregate['folded']:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(directory, filename))
+
+        return [(aggregate, False)] + [
+            (snapshot, running) for _, snapshot, running in snapshots if running
+        ]
+
+
+def exposition():
+    """Histograms and Django connection pool stats of all workers, Prometheus text"""
+    flush()
+    snapshots = collect()
+    host = socket.gethostname()
+
+    lines = []
+    for histogram in HISTOGRAMS:
+        merged = {}
+        for snapshot, _ in snapshots:
+            for view, (counts, total) in snapshot['histograms'].get(histogram.name, {}).items():
+                if len(counts) != len(histogram.buckets) + 1:
+                    continue  # written with other buckets (previous deploy)
+                series = merged.setdefault(view, [[0] * len(counts), 0.0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+        lines.extend(histogram.exposition(merged, host))
+
+    pools = {}  # alias -> stat -> value summed over workers
+    for snapshot, running in snapshots:
+        for alias, stats in snapshot['pools'].items():
+            for name, value in stats.items():
+                if running or name not in POOL_GAUGES:
+                    pools.setdefault(alias, {}).setdefault(name, 0)
+                    pools[alias][name] += value
+    names = sorted({name for stats in pools.values() for name in stats})
+    for name in names:
+        if name in POOL_GAUGES:
+            metric, kind = f'lamis_db_pool_{name}', 'gauge'
+        else:
+            metric, kind = f'lamis_db_pool_{name}_total', 'counter'
+        lines.append(f'# TYPE {metric} {kind}')
+        for alias, stats in sorted(pools.items()):
+            if name in stats:
+                lines.append(f'{metric}{{host="{escape_label(host)}",alias="{escape_label(alias)}"}} {stats[name]:g}')
+    lines.append('# TYPE lamis_metrics_workers gauge')
+    lines.append(f'lamis_metrics_workers{{host="{escape_label(host)}"}} {sum(running for _, running in snapshots)}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,114 @@
+"""
+Project-wide middleware
+"""
+
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+
+class StatementTimeoutMiddleware:
+    """
+    Server-side statement timeout for public API requests.
+
+    A slow query on a public endpoint is cancelled by PostgreSQL after
+    DB_STATEMENT_TIMEOUT ms instead of holding a connection (and a worker).
+    Admin, admin API and management commands keep no limit.
+
+    SET statement_timeout is sent lazily before the first query of the request
+    (requests served without the database cost nothing) and reset afterwards,
+    because pooled / persistent connections are reused by other requests.
+
+    Under ASGI the wrappers are installed in the request's thread-sensitive
+    thread: the one where the async ORM and sync views of this request run.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.timeout = settings.DB_STATEMENT_TIMEOUT
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def applies_to(self, request):
+        path = request.path_info
+        return (
+            self.timeout > 0
+            and path.startswith(settings.DB_STATEMENT_TIMEOUT_PATHS)
+            and not path.startswith(settings.DB_STATEMENT_TIMEOUT_EXCLUDE)
+        )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.applies_to(request):
+            return self.get_response(request)
+
+        limited = {}  # alias -> DB-API connection with the timeout set
+        stack = self.install(limited)
+        try:
+            return self.get_response(request)
+        finally:
+            self.uninstall(stack, limited)
+
+    async def __acall__(self, request):
+        if not self.applies_to(request):
+            return await self.get_response(request)
+
+        limited = {}
+        stack = await sync_to_async(self.install)(limited)
+        try:
+            return await self.get_response(request)
+        finally:
+            await sync_to_async(self.uninstall)(stack, limited)
+
+    def install(self, limited):
+        """execute_wrapper on the connections of the current thread"""
+        def set_timeout(execute, sql, params, many, context):
+            db = context['connection']
+            if db.vendor == 'postgresql' and limited.get(db.alias) is not db.connection:
+                # Raw cursor: does not go through execute wrappers again
+                with db.connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout = %s', [self.timeout])
+                limited[db.alias] = db.connection
+            return execute(sql, params, many, context)
+
+        stack = ExitStack()
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(set_timeout))
+        return stack
+
+    def uninstall(self, stack, limited):
+        try:
+            self.reset(limited)
+        finally:
+            stack.close()
+
+    def process_exception(self, request, exception):
+        # 57014 query_canceled: the statement hit the timeout
+        if isinstance(exception, OperationalError) and getattr(exception.__cause__, 'pgcode', None) == '57014':
+            logger.warning('Statement timeout on %s %s', request.method, request.get_full_path())
+            return JsonResponse({'error': 'Request timed out, try again later'}, status=503)
+        return None
+
+    def reset(self, limited):
+        for alias, raw_connection in limited.items():
+            db = connections[alias]
+            if db.connection is not raw_connection or raw_connection.closed:
+                continue
+            try:
+                with raw_connection.cursor() as cursor:
+                    cursor.execute('SET statement_timeout TO DEFAULT')
+            except db.Database.Error:
+                # Do not let the next request inherit the timeout
+                logger.warning('Could not reset statement_timeout on %s, closing the connection', alias)
+                raw_connection.close()
+                db.close()
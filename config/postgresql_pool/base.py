@@ -0,0 +1,248 @@
+"""
+PostgreSQL backend with a per-process connection pool
+
+Django 4.2 has no built-in pool: with CONN_MAX_AGE=0 every request opens
+a new connection, with CONN_MAX_AGE>0 every thread keeps its own one. Here
+Django still "closes" the connection at the end of each request (CONN_MAX_AGE=0),
+but the physical psycopg2 connection goes back to a pool shared by all
+threads of the process and is handed to the next request:
+
+- at most POOL['MAX_SIZE'] connections per process; when all are busy a
+  request waits up to POOL['TIMEOUT'] seconds (no connection storm after
+  a deploy or a traffic spike)
+- connections idle longer than POOL['CHECK_AFTER'] seconds are checked with
+  SELECT 1 before reuse, broken ones are replaced
+- connections are recycled after POOL['MAX_LIFETIME'] seconds (+-10% jitter,
+  so the workers do not reconnect all at once)
+- an idle connection is only reused for the same connection parameters:
+  when the test runner switches NAME to the test database, connections to
+  the original database are closed, not handed out
+
+DATABASES['default'] = {'ENGINE': 'config.postgresql_pool', 'POOL': {...}, ...}
+Pool counters: pool_stats() (GET /api/v1/admin/db/pool/).
+"""
+
+import random
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from django.db.backends.postgresql import base, creation
+
+DEFAULT_POOL = {
+    'MAX_SIZE': 10,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 1800,
+    'CHECK_AFTER': 30,
+}
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PooledConnection:
+    def __init__(self, connection, isolation_level, max_lifetime, params_key=None):
+        self.connection = connection
+        self.isolation_level = isolation_level
+        self.params_key = params_key
+        self.expires_at = time.monotonic() + max_lifetime * random.uniform(0.9, 1.1)
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe pool of psycopg2 connections for one database alias"""
+
+    def __init__(self, alias, max_size, timeout, max_lifetime, check_after):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._counters = {
+            'checkouts': 0,
+            'connects': 0,
+            'discarded': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+        }
+
+    def checkout(self, connect, params_key=None):
+        """
+        Idle connection opened with `params_key` or a new one from connect();
+        blocks while the pool is full
+        """
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count(timeouts=1)
+            raise psycopg2.OperationalError(
+                f'Connection pool "{self.alias}" exhausted: '
+                f'{self.max_size} connections busy for {self.timeout}s'
+            )
+        waited = time.monotonic() - started
+        if waited > 0.001:
+            self._count(waits=1, wait_time=waited)
+
+        try:
+            while True:
+                with self._lock:
+                    # LIFO: hot connections are reused, cold ones expire
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    entry = connect()
+                    self._count(connects=1)
+                    break
+                if entry.params_key == params_key and self._is_usable(entry):
+                    break
+                self._discard(entry)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._counters['checkouts'] += 1
+        return entry
+
+    def checkin(self, entry, discard=False):
+        """Return a connection; it is rolled back, or closed if broken or expired"""
+        try:
+            connection = entry.connection
+            if not discard and not connection.closed and time.monotonic() < entry.expires_at:
+                status = connection.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        connection.rollback()
+                    except psycopg2.Error:
+                        discard = True
+            else:
+                discard = True
+
+            if discard:
+                self._discard(entry)
+            else:
+                entry.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(entry)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def close_idle(self):
+        """Close all idle connections (busy ones are closed on checkin if discarded)"""
+        with self._lock:
+            entries, self._idle = list(self._idle), deque()
+        for entry in entries:
+            self._discard(entry)
+        return len(entries)
+
+    def _is_usable(self, entry):
+        if entry.connection.closed or time.monotonic() >= entry.expires_at:
+            return False
+        if time.monotonic() - entry.last_used < self.check_after:
+            return True
+        try:
+            with entry.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    def _discard(self, entry):
+        self._count(discarded=1)
+        try:
+            entry.connection.close()
+        except psycopg2.Error:
+            pass
+
+    def _count(self, **values):
+        with self._lock:
+            for name, value in values.items():
+                self._counters[name] += value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                **self._counters,
+            }
+
+
+def get_pool(alias, settings_dict):
+    with _pools_lock:
+        if alias not in _pools:
+            options = {**DEFAULT_POOL, **settings_dict.get('POOL', {})}
+            _pools[alias] = ConnectionPool(
+                alias,
+                max_size=options['MAX_SIZE'],
+                timeout=options['TIMEOUT'],
+                max_lifetime=options['MAX_LIFETIME'],
+                check_after=options['CHECK_AFTER'],
+            )
+        return _pools[alias]
+
+
+def pool_stats():
+    """Counters of all pools of this process: {alias: {...}}"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.alias: pool.stats() for pool in pools}
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """
+    The test database cannot be dropped while the pool keeps idle
+    connections to it (Django's close() only checks them in)
+    """
+
+    def _create_test_db(self, verbosity, autoclobber, keepdb=False):
+        self.connection.pool.close_idle()
+        return super()._create_test_db(verbosity, autoclobber, keepdb)
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.pool.close_idle()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+def params_key(conn_params):
+    return tuple(sorted((name, repr(value)) for name, value in conn_params.items()))
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    _pool_entry = None
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        key = params_key(conn_params)
+
+        def connect():
+            # Physical connection, configured once by the stock backend
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            return PooledConnection(connection, self.isolation_level, self.pool.max_lifetime, key)
+
+        entry = self.pool.checkout(connect, key)
+        self.isolation_level = entry.isolation_level
+        self._pool_entry = entry
+        return entry.connection
+
+    def _close(self):
+        entry, self._pool_entry = self._pool_entry, None
+        if entry is None or self.connection is not entry.connection:
+            return super()._close()
+        # Closed inside atomic(): Django keeps a reference, so never hand it out again
+        self.pool.checkin(entry, discard=self.in_atomic_block)
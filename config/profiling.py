@@ -0,0 +1,312 @@
+"""
+On-demand profiling of single requests.
+
+An admin adds ?__profile=1 (or the header X-Profile: 1) to any request and
+gets, instead of the normal response body, the profile of that request:
+
+- stack samples of the threads running it, in the collapsed format read by
+  flamegraph.pl, speedscope and inferno ("frame;frame;frame count" per line)
+- the SQL log: every query with its duration, in execution order
+
+?__profile=collapsed returns the stacks alone as text/plain:
+
+    curl -H "Authorization: Bearer $TOKEN" \\
+        "$API/api/v1/products/?section=1&__profile=collapsed" | flamegraph.pl > list.svg
+
+Anyone else, and admins over the rate limit, gets the normal response
+(with X-Profile: rate-limited in the second case). PROFILING_RATE_LIMIT
+profiles per minute per process, one at a time; 0 removes the middleware.
+Sampling costs the profiled request some time (the sampler thread takes
+the GIL every PROFILING_INTERVAL), other requests are not affected; a
+request shorter than the interval has SQL log but no samples.
+"""
+
+import collections
+import logging
+import sys
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from config.metrics import view_label
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PARAM = '__profile'
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+MAX_LOGGED_QUERIES = 1000
+
+
+class StackSampler:
+    """
+    Samples the stacks of some threads every interval seconds, from a
+    thread of its own (sys._current_frames), and counts identical stacks
+
+    threads maps a thread id to (root name, boundary frame). Stacks are cut
+    at the boundary (the middleware's frame: the server and the outer
+    middleware are left out); a sample in which the thread is not inside
+    the boundary is dropped. Boundary None keeps whole stacks.
+    """
+
+    def __init__(self, threads, interval):
+        self.threads = threads
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self.run, name='request-profiler', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, (root, boundary) in self.threads.items():
+                frame = frames.get(thread_id)
+                stack = collapse(root, frame, boundary) if frame is not None else None
+                if stack is not None:
+                    self.stacks[stack] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def collapse(root, frame, boundary=None):
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        if frame is boundary:
+            break
+        frame = frame.f_back
+    else:
+        if boundary is not None:
+            return None
+    names.append(root)
+    return ';'.join(reversed(names))
+
+
+_frame_names = {}
+_path_prefixes = None
+
+
+def frame_name(code):
+    """'ProductViewSet.list (apps/products/views.py:120)', cached per code object"""
+    name = _frame_names.get(code)
+    if name is None:
+        qualname = getattr(code, 'co_qualname', code.co_name)
+        name = f'{qualname} ({short_path(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+        _frame_names[code] = name
+    return name
+
+
+def short_path(filename):
+    """File name relative to the project or the sys.path entry containing it"""
+    global _path_prefixes
+    if _path_prefixes is None:
+        roots = {str(settings.BASE_DIR)} | {path for path in sys.path if path}
+        _path_prefixes = sorted((root.rstrip('/') + '/' for root in roots), key=len, reverse=True)
+    for prefix in _path_prefixes:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+class QueryLog:
+    """execute_wrapper keeping each query (SQL without parameters) and its duration"""
+
+    def __init__(self):
+        self.queries = []
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'duration_ms': round(elapsed * 1000, 3),
+                })
+
+
+class RateLimit:
+    """At most `limit` acquisitions per minute and one at a time (per process)"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._recent = collections.deque()  # monotonic times of the last acquisitions
+        self._lock = threading.Lock()
+        self._running = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.limit or not self._running.acquire(blocking=False):
+                return False
+            self._recent.append(now)
+            return True
+
+    def release(self):
+        self._running.release()
+
+
+def profile_mode(request):
+    """'json', 'collapsed' or None (not asked for)"""
+    value = request.GET.get(PROFILE_PARAM) or request.META.get(PROFILE_HEADER)
+    if not value or value in ('0', 'false'):
+        return None
+    return 'collapsed' if value == 'collapsed' else 'json'
+
+
+def is_admin(request):
+    """Session user (admin site, browsable API) or JWT bearer, with is_admin as IsAdmin checks"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        try:
+            result = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        if result is None:
+            return False
+        user = result[0]
+    return bool(user.is_active and user.is_admin)
+
+
+class ProfilingMiddleware:
+    """
+    Runs the requests asking for a profile (see the module docstring) under
+    StackSampler and QueryLog.
+
+    Placed after AuthenticationMiddleware for the session user. Under ASGI
+    two threads are sampled: the event loop, while it runs this request's
+    coroutines (async views, middleware), and the request's thread-sensitive
+    thread (ORM, sync views, serializers; idle while the request is on the
+    event loop). Stacks start with "event-loop" or "request-thread".
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if settings.PROFILING_RATE_LIMIT <= 0:
+            raise MiddlewareNotUsed
+        self.rate_limit = RateLimit(settings.PROFILING_RATE_LIMIT)
+        self.interval = settings.PROFILING_INTERVAL
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = profile_mode(request)
+        if mode is None or not is_admin(request):
+            return self.get_response(request)
+        if not self.rate_limit.acquire():
+            return self.rate_limited(self.get_response(request))
+
+        try:
+            query_log = QueryLog()
+            threads = {threading.get_ident(): ('request-thread', sys._getframe())}
+            stack = self.install(query_log)
+            started = time.perf_counter()
+            try:
+                with StackSampler(threads, self.interval) as sampler:
+                    response = self.get_response(request)
+            finally:
+                elapsed = time.perf_counter() - started
+                stack.close()
+        finally:
+            self.rate_limit.release()
+        return self.profile_response(request, response, mode, elapsed, sampler, query_log)
+
+    async def __acall__(self, request):
+        mode = profile_mode(request)
+        if mode is None or not await sync_to_async(is_admin)(request):
+            return await self.get_response(request)
+        if not self.rate_limit.acquire():
+            return self.rate_limited(await self.get_response(request))
+
+        try:
+            query_log = QueryLog()
+            threads = {
+                threading.get_ident(): ('event-loop', sys._getframe()),
+                await sync_to_async(threading.get_ident)(): ('request-thread', None),
+            }
+            stack = await sync_to_async(self.install)(query_log)
+            started = time.perf_counter()
+            try:
+                with StackSampler(threads, self.interval) as sampler:
+                    response = await self.get_response(request)
+            finally:
+                elapsed = time.perf_counter() - started
+                await sync_to_async(stack.close)()
+        finally:
+            self.rate_limit.release()
+        return self.profile_response(request, response, mode, elapsed, sampler, query_log)
+
+    def install(self, query_log):
+        stack = ExitStack()
+        for db in connections.all():
+            stack.enter_context(db.execute_wrapper(query_log))
+        return stack
+
+    def rate_limited(self, response):
+        response['X-Profile'] = 'rate-limited'
+        return response
+
+    def profile_response(self, request, response, mode, elapsed, sampler, query_log):
+        view = view_label(request)
+        logger.info(
+            'Profiled %s %s (%s): %.1f ms, %d queries in %.1f ms, %d samples',
+            request.method, request.get_full_path(), view, elapsed * 1000,
+            query_log.count, query_log.seconds * 1000, sampler.samples
+        )
+        if mode == 'collapsed':
+            profile = HttpResponse(sampler.collapsed(), content_type='text/plain; charset=utf-8')
+        else:
+            profile = JsonResponse({
+                'method': request.method,
+                'path': request.get_full_path(),
+                'view': view,
+                'status': response.status_code,
+                'duration_ms': round(elapsed * 1000, 3),
+                'sql': {
+                    'count': query_log.count,
+                    'duration_ms': round(query_log.seconds * 1000, 3),
+                    'queries': query_log.queries,
+                },
+                'profile': {
+                    'format': 'collapsed',
+                    'interval_ms': self.interval * 1000,
+                    'samples': sampler.samples,
+                    'stacks': sampler.collapsed(),
+                },
+            })
+        profile['X-Profile'] = 'profiled'
+        profile['Cache-Control'] = 'no-store'
+        return profile
@@ -4,6 +4,7 @@ Django settings for LAMIS E-commerce Backend
 
 from pathlib import Path
 from datetime import timedelta
+import tempfile
 from decouple import config
 import dj_database_url
 
@@ -68,21 +69,52 @@ INSTALLED_APPS = [
     "apps.products",
     "apps.authentication",
     "apps.uploads",
+    "apps.jobs",
     'apps.partners',
 ]
 
+# ASGI mode (config/asgi.py, see ASGI_DEPLOYMENT.md): async views for public
+# catalog reads; set by the ASGI entry point, the WSGI deployment is unchanged
+ASGI_MODE = config('ASGI_MODE', default=False, cast=bool)
+
+# Gateway (config/gateway.py): the FastAPI app (app/) is mounted under this
+# prefix in the same ASGI process, everything else goes to Django
+GATEWAY_FASTAPI_PREFIX = config('GATEWAY_FASTAPI_PREFIX', default='/api/fastapi').rstrip('/')
+
+# Request metrics (config/metrics.py, GET /api/v1/admin/metrics/): share of
+# requests measured, 0 = middleware off
+PERF_METRICS_SAMPLE_RATE = config('PERF_METRICS_SAMPLE_RATE', default=0.0, cast=float)
+PERF_METRICS_DUPLICATE_WARNING = config('PERF_METRICS_DUPLICATE_WARNING', default=10, cast=int)  # log N+1 from N duplicates (0 = off)
+# Per-worker snapshots merged by the metrics endpoint: one directory per host, shared by its workers
+PERF_METRICS_DIR = config('PERF_METRICS_DIR', default=str(Path(tempfile.gettempdir()) / 'lamis-metrics'))
+PERF_METRICS_FLUSH_INTERVAL = config('PERF_METRICS_FLUSH_INTERVAL', default=5, cast=float)  # seconds
+
+# ?__profile=1 / X-Profile: 1 from an admin returns the request's profile
+# (config/profiling.py): profiles per minute per process, 0 = middleware off
+PROFILING_RATE_LIMIT = config('PROFILING_RATE_LIMIT', default=6, cast=int)
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.002, cast=float)  # seconds between stack samples
+
 MIDDLEWARE = [
+    "config.metrics.PerformanceMetricsMiddleware",  # first: wall time covers the whole chain
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",  # Serve static files
+    "whitenoise.middleware.WhiteNoiseMiddleware",  # Serve static files (WSGI only, see below)
     "corsheaders.middleware.CorsMiddleware",  # CORS должен быть первым после Security
+    "config.db_router.ReplicaRoutingMiddleware",  # primary / read replica per request
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "config.profiling.ProfilingMiddleware",  # after auth: checks the session user
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.middleware.StatementTimeoutMiddleware",
 ]
 
+if ASGI_MODE:
+    # WhiteNoise middleware is sync-only: under ASGI it would push every request
+    # through a thread; static files are served by the ASGI handler instead
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 ROOT_URLCONF = "config.urls"
 
 TEMPLATES = [
@@ -107,10 +139,49 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Railway provides DATABASE_URL automatically
 DATABASE_URL = config('DATABASE_URL', default=None)
 
+# Connection management for PostgreSQL
+# DB_POOL=True: pooled backend (config/postgresql_pool) - connections are shared by
+# the threads of a process and reused between requests, at most DB_POOL_MAX_SIZE
+# per process. DB_POOL=False: one persistent connection per thread (CONN_MAX_AGE).
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+DB_POOL_MAX_SIZE = config('DB_POOL_MAX_SIZE', default=10, cast=int)
+DB_POOL_TIMEOUT = config('DB_POOL_TIMEOUT', default=10, cast=int)  # seconds to wait for a free connection
+DB_POOL_MAX_LIFETIME = config('DB_POOL_MAX_LIFETIME', default=1800, cast=int)  # seconds, then reconnect
+DB_POOL_CHECK_AFTER = config('DB_POOL_CHECK_AFTER', default=30, cast=int)  # idle seconds before SELECT 1 on reuse
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=600, cast=int)  # without pool
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=5, cast=int)
+
+# Server-side statement timeout for public API requests (config/middleware.py), 0 = off
+DB_STATEMENT_TIMEOUT = config('DB_STATEMENT_TIMEOUT', default=5000, cast=int)  # ms
+DB_STATEMENT_TIMEOUT_PATHS = ('/api/v1/',)
+DB_STATEMENT_TIMEOUT_EXCLUDE = ('/api/v1/admin/',)
+
+
+def postgres_database(database):
+    """Pool / persistent connections, health checks and connect timeout for a PostgreSQL entry"""
+    if not database['ENGINE'].endswith('postgresql'):
+        return database
+    database.setdefault('OPTIONS', {}).setdefault('connect_timeout', DB_CONNECT_TIMEOUT)
+    database['CONN_HEALTH_CHECKS'] = True
+    if DB_POOL:
+        database['ENGINE'] = 'config.postgresql_pool'
+        # Django "closes" after every request = returns the connection to the pool
+        database['CONN_MAX_AGE'] = 0
+        database['POOL'] = {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'TIMEOUT': DB_POOL_TIMEOUT,
+            'MAX_LIFETIME': DB_POOL_MAX_LIFETIME,
+            'CHECK_AFTER': DB_POOL_CHECK_AFTER,
+        }
+    else:
+        database['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+    return database
+
+
 if DATABASE_URL:
     # Use Railway's DATABASE_URL (PostgreSQL)
     DATABASES = {
-        "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600)
+        "default": postgres_database(dj_database_url.parse(DATABASE_URL))
     }
 else:
     # Fallback for local development
@@ -120,14 +191,14 @@ else:
     if db_host and db_host != 'localhost':
         # Use PostgreSQL with explicit configuration
         DATABASES = {
-            "default": {
+            "default": postgres_database({
                 "ENGINE": "django.db.backends.postgresql",
                 "NAME": config('DB_NAME', default='lamis_db'),
                 "USER": config('DB_USER', default='lamis_user'),
                 "PASSWORD": config('DB_PASSWORD', default='lamis_password'),
                 "HOST": db_host,
                 "PORT": config('DB_PORT', default='5432'),
-            }
+            })
         }
     else:
         # SQLite for local development and build phase
@@ -138,6 +209,33 @@ else:
             }
         }
 
+# Read replicas for public GET traffic (config/db_router.py)
+# DATABASE_REPLICA_URLS=postgres://...replica1,postgres://...replica2 -> aliases replica_1, replica_2
+# Local check with SQLite: DATABASE_REPLICA_URLS=sqlite:///db-replica.sqlite3
+# (copy db.sqlite3 or run migrate --database replica_1 first)
+DATABASE_REPLICA_URLS = config(
+    'DATABASE_REPLICA_URLS',
+    default='',
+    cast=lambda v: [s.strip() for s in v.split(',') if s.strip()]
+)
+for number, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{number}'] = {
+        **postgres_database(dj_database_url.parse(replica_url)),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['config.db_router.PrimaryReplicaRouter']
+DB_REPLICA_PIN_SECONDS = config('DB_REPLICA_PIN_SECONDS', default=5, cast=int)  # reads stay on primary after a write
+
+# Catalog snapshot (apps/products/snapshot.py): taxonomy and product cards in one
+# file mapped read-only by every worker of the host, rebuilt after catalog changes.
+# Off by default: writes made on another host (another replica of the service)
+# reach it only after CATALOG_SNAPSHOT_MAX_AGE, so enable it for a single host
+CATALOG_SNAPSHOT = config('CATALOG_SNAPSHOT', default=False, cast=bool)
+# Empty: a file in the temp directory named after BASE_DIR and the database
+# (snapshot_path()), so checkouts, test runs and projects never share one
+CATALOG_SNAPSHOT_PATH = config('CATALOG_SNAPSHOT_PATH', default='')
+CATALOG_SNAPSHOT_MAX_AGE = config('CATALOG_SNAPSHOT_MAX_AGE', default=300, cast=int)  # seconds, then rebuilt
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -179,6 +277,45 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Media storage backend (apps/uploads/storage.py): filesystem | s3
+# s3 works with Cloudflare R2 or a local S3-compatible server (S3_ENDPOINT_URL=http://localhost:9000)
+MEDIA_STORAGE_BACKEND = config('MEDIA_STORAGE_BACKEND', default='filesystem')
+S3_ENDPOINT_URL = config('S3_ENDPOINT_URL', default='')
+S3_BUCKET = config('S3_BUCKET', default='')
+S3_ACCESS_KEY_ID = config('S3_ACCESS_KEY_ID', default='')
+S3_SECRET_ACCESS_KEY = config('S3_SECRET_ACCESS_KEY', default='')
+S3_REGION = config('S3_REGION', default='auto')
+S3_PUBLIC_URL = config('S3_PUBLIC_URL', default='https://pub-abbe62b0e52d438ea38505b6a2c733d7.r2.dev/')
+S3_CACHE_CONTROL = config('S3_CACHE_CONTROL', default='public, max-age=31536000')
+S3_MAX_POOL_CONNECTIONS = config('S3_MAX_POOL_CONNECTIONS', default=32, cast=int)
+S3_MULTIPART_THRESHOLD = config('S3_MULTIPART_THRESHOLD', default=8 * 1024 * 1024, cast=int)
+S3_MULTIPART_CHUNK_SIZE = config('S3_MULTIPART_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+S3_MAX_CONCURRENCY = config('S3_MAX_CONCURRENCY', default=8, cast=int)  # parts per multipart upload
+MEDIA_UPLOAD_WORKERS = config('MEDIA_UPLOAD_WORKERS', default=8, cast=int)  # files uploaded in parallel
+
+# Upload image pipeline (apps/uploads/images.py)
+# Every uploaded image is re-encoded into these widths (never upscaled)
+IMAGE_VARIANT_WIDTHS = config(
+    'IMAGE_VARIANT_WIDTHS',
+    default='320,640,960,1280,1920',
+    cast=lambda v: [int(w) for w in v.split(',') if w.strip()]
+)
+IMAGE_PROCESSING_WORKERS = config('IMAGE_PROCESSING_WORKERS', default=2, cast=int)
+IMAGE_PROCESSING_TIMEOUT = config('IMAGE_PROCESSING_TIMEOUT', default=60, cast=int)
+
+# Resumable chunked uploads (PDF catalogs, high-res renders)
+# Partial files are kept outside MEDIA_ROOT until the upload is verified
+CHUNKED_UPLOAD_DIR = config('CHUNKED_UPLOAD_DIR', default=str(BASE_DIR / "uploads_tmp"))
+CHUNKED_UPLOAD_MAX_SIZE = config('CHUNKED_UPLOAD_MAX_SIZE', default=500 * 1024 * 1024, cast=int)  # 500MB
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = config('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)  # 8MB
+
+# Background jobs (apps/jobs): DB queue, worker = python manage.py run_jobs
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=2, cast=float)  # seconds between polls of an empty queue
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=3, cast=int)
+JOBS_RETRY_DELAY = config('JOBS_RETRY_DELAY', default=30, cast=int)  # seconds, doubled on every retry
+JOBS_STALE_TIMEOUT = config('JOBS_STALE_TIMEOUT', default=600, cast=int)  # running job without heartbeat -> requeued
+JOBS_KEEP_DAYS = config('JOBS_KEEP_DAYS', default=14, cast=int)  # succeeded jobs are purged after N days
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -195,6 +332,10 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'config.metrics.TimedJSONRenderer',  # JSONRenderer + render time (config/metrics.py)
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'config.pagination.CustomPageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
@@ -221,6 +362,12 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Refresh token blacklist (apps/authentication/blacklist.py): every rotation adds
+# a row to token_blacklist_outstandingtoken and blacklistedtoken
+TOKEN_BLACKLIST_CACHE_SIZE = config('TOKEN_BLACKLIST_CACHE_SIZE', default=10000, cast=int)  # blacklisted JTIs kept per process
+TOKEN_BLACKLIST_COMPACT_BATCH = config('TOKEN_BLACKLIST_COMPACT_BATCH', default=1000, cast=int)  # expired tokens deleted per transaction
+TOKEN_BLACKLIST_COMPACT_INTERVAL = config('TOKEN_BLACKLIST_COMPACT_INTERVAL', default=3600, cast=int)  # seconds, run_jobs compaction (0 = off)
+
 # CORS Settings
 CORS_ALLOWED_ORIGINS = config(
     'CORS_ALLOWED_ORIGINS',
@@ -442,6 +589,8 @@ JAZZMIN_SETTINGS = {
         "products.TutorialVideo": "fas fa-video",
         "products.Material": "fas fa-file-download",
 
+        "jobs.Job": "fas fa-tasks",
+
         "auth": "fas fa-users-cog",
         "auth.Group": "fas fa-users",
     },
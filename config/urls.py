@@ -7,6 +7,7 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
+from config.views import DatabasePoolStatsView, MetricsView
 
 urlpatterns = [
     # Django Admin
@@ -20,6 +21,8 @@ urlpatterns = [
     # API v1 - Admin endpoints
     # path('api/v1/admin/', include('apps.logs.urls')),  # Disabled - apps.logs doesn't exist
     path('api/v1/admin/', include('apps.uploads.urls')),
+    path('api/v1/admin/db/pool/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('api/v1/admin/metrics/', MetricsView.as_view(), name='metrics'),
 
     # API Documentation (Swagger/OpenAPI)
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
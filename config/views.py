@@ -0,0 +1,50 @@
+"""
+Project-level API views
+"""
+
+from django.db import connections
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.products.permissions import IsAdmin
+from config.metrics import PrometheusRenderer, exposition
+
+
+class DatabasePoolStatsView(APIView):
+    """
+    GET /api/v1/admin/db/pool/
+
+    Connection pool counters of the process that served the request
+    (each gunicorn worker has its own pool).
+    """
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        from config.postgresql_pool.base import pool_stats
+
+        return Response({
+            'pools': pool_stats(),
+            'databases': {
+                db.alias: {
+                    'engine': db.settings_dict['ENGINE'],
+                    'conn_max_age': db.settings_dict['CONN_MAX_AGE'],
+                    'conn_health_checks': db.settings_dict['CONN_HEALTH_CHECKS'],
+                }
+                for db in connections.all()
+            },
+        })
+
+
+class MetricsView(APIView):
+    """
+    GET /api/v1/admin/metrics/
+
+    Request histograms per view and connection pool stats, merged over all
+    workers of the host, Prometheus text format (config/metrics.py).
+    Empty histograms while PERF_METRICS_SAMPLE_RATE is 0.
+    """
+    permission_classes = [IsAdmin]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request):
+        return Response(exposition(), content_type='text/plain; version=0.0.4; charset=utf-8')
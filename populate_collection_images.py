@@ -1,18 +1,26 @@
 #!/usr/bin/env python
 """
 Скрипт для заполнения URLs картинок коллекций из R2 storage
+
+URL строит хранилище медиа (MEDIA_STORAGE_BACKEND). С filesystem (по умолчанию)
+все коллекции получили бы /media/ вместо R2, поэтому скрипт отказывается
+работать без флага --allow-filesystem.
 """
+import argparse
 import os
+import sys
 import django
 
 # Настройка Django окружения
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.conf import settings
 from apps.products.models import Collection
+from apps.uploads.storage import get_storage
 
-# Базовый URL для картинок коллекций на R2
-BASE_R2_URL = "https://pub-abbe62b0e52d438ea38505b6a2c733d7.r2.dev/images"
+# Картинки коллекций лежат в images/ хранилища медиа (R2 при MEDIA_STORAGE_BACKEND=s3)
+IMAGES_PREFIX = 'images/'
 
 # Mapping: имя коллекции -> имя файла на R2 (коллекции относятся к секции "Мебель для ванной")
 COLLECTION_IMAGES = {
@@ -41,12 +49,13 @@ def populate_collection_images():
     updated_count = 0
     not_found_count = 0
 
+    storage = get_storage()
     collections = Collection.objects.all()
 
     for collection in collections:
         if collection.name in COLLECTION_IMAGES:
             image_filename = COLLECTION_IMAGES[collection.name]
-            image_url = f"{BASE_R2_URL}/{image_filename}"
+            image_url = storage.url(f"{IMAGES_PREFIX}{image_filename}")
 
             collection.image = image_url
             collection.save()
@@ -63,4 +72,15 @@ def populate_collection_images():
     print(f"   Всего коллекций: {collections.count()}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Заполнить URLs картинок коллекций')
+    parser.add_argument(
+        '--allow-filesystem', action='store_true',
+        help='Записать /media/ URLs при MEDIA_STORAGE_BACKEND=filesystem'
+    )
+    args = parser.parse_args()
+    if settings.MEDIA_STORAGE_BACKEND == 'filesystem' and not args.allow_filesystem:
+        sys.exit(
+            '❌ MEDIA_STORAGE_BACKEND=filesystem: коллекции получили бы /media/ URLs вместо R2. '
+            'Задайте MEDIA_STORAGE_BACKEND=s3 и S3_* (см. .env.example) или передайте --allow-filesystem.'
+        )
     populate_collection_images()
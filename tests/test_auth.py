@@ -0,0 +1,83 @@
+"""
+Tests for password hashing in the auth endpoints (app/api/endpoints/auth.py)
+"""
+
+import asyncio
+import time
+
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.db.database import AsyncSessionLocal
+from app.models.user import User
+
+PASSWORD = "secret123"
+
+
+async def stored_hash(email: str) -> str:
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(select(User.hashed_password).where(User.email == email))).scalar_one()
+
+
+async def test_login_burst_does_not_block_other_endpoints(client):
+    """bcrypt runs in password_executor: other requests are served during a burst of logins"""
+    response = await client.post("/auth/register", json={"email": "burst@example.com", "password": PASSWORD})
+    assert response.status_code == 201
+
+    # One bcrypt verification: the wait any request would see if it ran on the event loop
+    started = time.perf_counter()
+    pwd_context.verify(PASSWORD, await stored_hash("burst@example.com"))
+    bcrypt_seconds = time.perf_counter() - started
+
+    latencies = []
+    burst_done = asyncio.Event()
+
+    async def probe():
+        while not burst_done.is_set():
+            started = time.perf_counter()
+            response = await client.get("/products", params={"limit": 12})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200
+
+    async def burst():
+        try:
+            return await asyncio.gather(*(
+                client.post("/auth/login", json={"email": "burst@example.com", "password": PASSWORD})
+                for _ in range(4 * settings.PASSWORD_HASH_WORKERS)
+            ))
+        finally:
+            burst_done.set()
+
+    logins, _ = await asyncio.gather(burst(), probe())
+
+    assert [response.status_code for response in logins] == [200] * len(logins)
+    # The burst takes >= 4 rounds of bcrypt; a blocked loop would allow about one probe per round
+    assert len(latencies) > 10
+    assert max(latencies) < bcrypt_seconds
+
+
+async def test_login_rehashes_password_with_another_cost(client):
+    """A hash made with another BCRYPT_ROUNDS is replaced on login, the password keeps working"""
+    old_rounds = 4 if settings.BCRYPT_ROUNDS != 4 else 5
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=old_rounds).hash(PASSWORD)
+    async with AsyncSessionLocal() as session:
+        session.add(User(email="rehash@example.com", hashed_password=old_hash))
+        await session.commit()
+
+    response = await client.post("/auth/login", json={"email": "rehash@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+
+    new_hash = await stored_hash("rehash@example.com")
+    assert new_hash != old_hash
+    assert new_hash.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert not pwd_context.needs_update(new_hash)
+
+    # Same password, current cost: verified again, not rehashed
+    response = await client.post("/auth/login", json={"email": "rehash@example.com", "password": PASSWORD})
+    assert response.status_code == 200
+    assert await stored_hash("rehash@example.com") == new_hash
+
+    response = await client.post("/auth/login", json={"email": "rehash@example.com", "password": "wrong-password"})
+    assert response.status_code == 401